@@ -0,0 +1,248 @@
+import abc
+import ast
+import asyncio
+import random
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional
+from github_app.analysis.result_cache import AnalysisResult
+
+
+class DocstringRequest(NamedTuple):
+    """One symbol to check against its docstring."""
+
+    qualified_name: str
+    kind: str
+    signature: str
+    docstring: Optional[str]
+    source: str  # the definition's code in the head revision
+
+
+class RetryableBackendError(Exception):
+    """Transient backend failure (rate limit, overload, timeout) worth retrying."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(request: DocstringRequest) -> int:
+    """Rough token count of a request, at about four characters per token."""
+    characters = len(request.signature) + len(request.docstring or "") + len(request.source)
+    return characters // 4 + 1
+
+
+class LLMBackend(abc.ABC):
+    """Model that reviews a batch of symbols in one request."""
+
+    model_id: str = ""
+
+    @abc.abstractmethod
+    async def review(self, requests: List[DocstringRequest]) -> List[AnalysisResult]:
+        """Return one result per request, in order."""
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend.
+
+    Flags missing docstrings and parameters the docstring does not mention;
+    ``latency_seconds`` simulates a model round trip for throughput tests.
+    """
+
+    model_id = "stub"
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    async def review(self, requests: List[DocstringRequest]) -> List[AnalysisResult]:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return [self._review(request) for request in requests]
+
+    @staticmethod
+    def _review(request: DocstringRequest) -> AnalysisResult:
+        if not request.docstring:
+            return AnalysisResult(
+                f"Add a docstring to {request.qualified_name}.", f"The {request.kind} has no docstring."
+            )
+        missing = [name for name in _parameter_names(request.signature) if name not in request.docstring]
+        if missing:
+            return AnalysisResult(
+                f"Document {', '.join(missing)} in the docstring of {request.qualified_name}.",
+                "The signature has parameters the docstring does not mention.",
+            )
+        return AnalysisResult("", "The docstring is consistent with the signature.")
+
+
+def _parameter_names(signature: str) -> List[str]:
+    try:
+        definition = ast.parse(f"{signature}:\n    pass").body[0]
+    except SyntaxError:
+        return []
+    if isinstance(definition, ast.ClassDef):
+        return []
+    arguments = definition.args
+    names = [
+        argument.arg for argument in arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+    ] + [argument.arg for argument in (arguments.vararg, arguments.kwarg) if argument is not None]
+    return [name for name in names if name not in ("self", "cls")]
+
+
+def create_llm_backend(model_id: str) -> LLMBackend:
+    """Build the backend for the configured model id."""
+    if model_id == "stub":
+        return StubBackend()
+    raise RuntimeError(f"No LLM backend is available for ANALYSIS_MODEL_ID={model_id!r}")
+
+
+class TokenBucket:
+    """Tokens-per-minute budget, refilled continuously."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until ``tokens`` are available, take them and return the seconds waited."""
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        # Callers are served in order so large batches are not starved
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.capacity / 60)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) * 60 / self.capacity
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class LLMDispatcher:
+    """
+    Sends docstring reviews to the model in batches.
+
+    Requests are packed into batches of at most ``max_batch_tokens``
+    estimated tokens, at most ``max_concurrency`` batches are in flight, and
+    each installation may spend ``tokens_per_minute``. Retryable failures
+    are retried up to ``max_retries`` times with full-jitter exponential
+    backoff, or after the backend's ``retry_after``. A batch that still
+    fails does not take the other batches down with it.
+    """
+
+    def __init__(
+        self, backend: LLMBackend, max_concurrency: int = 4, max_batch_tokens: int = 6000,
+        tokens_per_minute: int = 90_000, max_retries: int = 4, retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 30.0
+    ):
+        self.backend = backend
+        self.max_batch_tokens = max_batch_tokens
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._budgets: Dict[Hashable, TokenBucket] = {}
+        self.requests = 0
+        self.batches = 0
+        self.tokens = 0
+        self.retries = 0
+        self.failed_batches = 0
+        self.throttled_seconds = 0.0
+
+    @property
+    def model_id(self) -> str:
+        return self.backend.model_id
+
+    def pack(self, requests: List[DocstringRequest]) -> List[List[int]]:
+        """Group request indices into batches within the token budget, keeping order."""
+        batches: List[List[int]] = []
+        batch_tokens = 0
+        for i, request in enumerate(requests):
+            tokens = estimate_tokens(request)
+            if not batches or batch_tokens + tokens > self.max_batch_tokens:
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(i)
+            batch_tokens += tokens
+        return batches
+
+    async def dispatch(
+        self, installation_id: Hashable, requests: List[DocstringRequest]
+    ) -> List[Optional[AnalysisResult]]:
+        """
+        Review every request and return the results in request order.
+
+        Requests in a batch that failed get None; the error is raised only
+        when every batch failed.
+        """
+        results: List[Optional[AnalysisResult]] = [None] * len(requests)
+        batches = self.pack(requests)
+
+        async def run(batch: List[int]) -> None:
+            batch_requests = [requests[i] for i in batch]
+            for i, result in zip(batch, await self._send(installation_id, batch_requests)):
+                results[i] = result
+
+        outcomes = await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors and len(errors) == len(batches):
+            raise errors[0]
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, BaseException):
+                self.failed_batches += 1
+                print(f"Model request for {len(batch)} symbols failed: {str(outcome)}")
+        return results
+
+    async def _send(self, installation_id: Hashable, requests: List[DocstringRequest]) -> List[AnalysisResult]:
+        tokens = sum(estimate_tokens(request) for request in requests)
+        budget = self._budgets.get(installation_id)
+        if budget is None:
+            budget = self._budgets[installation_id] = TokenBucket(self.tokens_per_minute)
+        self.throttled_seconds += await budget.acquire(tokens)
+
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                try:
+                    results = await self.backend.review(requests)
+                except RetryableBackendError as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt, e.retry_after)
+                    print(f"Model request failed ({str(e)}), retrying in {delay:.1f}s")
+                else:
+                    break
+            # Back off outside the semaphore so other batches can proceed
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+        if len(results) != len(requests):
+            raise ValueError(f"Model returned {len(results)} results for {len(requests)} requests")
+        self.requests += len(requests)
+        self.batches += 1
+        self.tokens += tokens
+        return results
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    def stats(self) -> Dict[str, float]:
+        """Return request, batch, token, retry and failure counters."""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "tokens": self.tokens,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "throttled_seconds": self.throttled_seconds,
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from github_app.analysis.patch_parser import LineRange
+from github_app.analysis.symbol_diff import SymbolDiff, diff_symbols
+from github_app.analysis.symbol_extractor import Symbol, SymbolTable, extract_symbols
+from github_app.monitoring.metrics import time_stage
+from github_app.monitoring.tracing import tracer
+
+
+def _extract_symbol_list(source: str, filename: str) -> List[Symbol]:
+    # Runs in a worker process; plain tuples pickle compactly, the table is rebuilt by the caller
+    return extract_symbols(source, filename).symbols
+
+
+class ParserPool:
+    """
+    Runs AST parsing and structural hashing off the event loop.
+
+    Sources of at least ``inline_max_bytes`` (UTF-8 encoded) are parsed in a
+    process pool of ``max_workers`` processes, started on first use, so large
+    PRs use every core without blocking request handling; smaller ones are
+    parsed in-process, where that is cheaper than the round trip to a worker.
+    Workers are started from a fork server rather than forked from the
+    application, which runs threads (the GitHub executor) and an event loop.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, inline_max_bytes: int = 32 * 1024):
+        self.max_workers = max_workers
+        self.inline_max_bytes = inline_max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.inline = 0
+        self.offloaded = 0
+        self.failed = 0
+
+    async def extract(self, source: str, filename: str = "<unknown>") -> Optional[SymbolTable]:
+        """Return the symbol table of ``source``, or None when it does not parse."""
+        try:
+            if len(source.encode("utf-8")) < self.inline_max_bytes:
+                self.inline += 1
+                return extract_symbols(source, filename)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+                )
+            self.offloaded += 1
+            symbols = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _extract_symbol_list, source, filename
+            )
+            return SymbolTable(symbols)
+        except Exception as e:
+            self.failed += 1
+            print(f"Error parsing {filename}: {str(e)}")
+            return None
+
+    async def diff(
+        self, filename: str, head_source: str, base_source: str, head_ranges: Optional[Sequence[LineRange]] = None
+    ) -> Optional[SymbolDiff]:
+        """Parse both revisions of a file concurrently and diff their symbols, see ``diff_symbols``."""
+        with time_stage("parse"), tracer.span("parse", path=filename, size_bytes=len(head_source) + len(base_source)):
+            head, base = await asyncio.gather(
+                self.extract(head_source, filename), self.extract(base_source, filename)
+            )
+            if head is None or base is None:
+                return None
+            return diff_symbols(base, head, head_ranges)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many sources were parsed in-process, in workers, or failed."""
+        return {"inline": self.inline, "offloaded": self.offloaded, "failed": self.failed}
@@ -0,0 +1,137 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+from github_app.handlers.pull_request_context import ChangedFile
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Inclusive (first_line, last_line) range, 1-based
+LineRange = Tuple[int, int]
+
+
+@dataclass
+class Hunk:
+    """One ``@@ -old_start,old_count +new_start,new_count @@`` block of a unified diff."""
+
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+
+
+@dataclass
+class FileChanges:
+    """
+    Changed line ranges of one pull request file, parsed from its patch.
+
+    ``head_ranges`` are lines of the head revision that were added, plus the
+    line just before any run of removed lines; ``base_ranges`` mirror that
+    for the base revision. ``complete`` is False when GitHub sent no patch
+    (binary or very large diffs) or one that does not parse, in which case
+    every line counts as changed.
+    """
+
+    filename: str
+    status: str = "modified"
+    previous_filename: Optional[str] = None
+    hunks: List[Hunk] = field(default_factory=list)
+    head_ranges: List[LineRange] = field(default_factory=list)
+    base_ranges: List[LineRange] = field(default_factory=list)
+    complete: bool = True
+
+    @property
+    def head_path(self) -> Optional[str]:
+        """Path of the head revision, or None when the file was removed."""
+        return head_path_of(self.status, self.filename)
+
+    @property
+    def base_path(self) -> Optional[str]:
+        """Path of the base revision, or None when the file was added."""
+        return base_path_of(self.status, self.filename, self.previous_filename)
+
+    def touches(self, first_line: int, last_line: int, ref_type: str = "head") -> bool:
+        """Return True if any changed line of ``ref_type`` falls within ``first_line..last_line``."""
+        if not self.complete:
+            return True
+        ranges = self.head_ranges if ref_type == "head" else self.base_ranges
+        return any(start <= last_line and first_line <= end for start, end in ranges)
+
+    @classmethod
+    def from_changed_file(cls, file: ChangedFile) -> "FileChanges":
+        """Parse the patch of a listed pull request file."""
+        changes = cls(file.filename, status=file.status, previous_filename=file.previous_filename)
+        if file.patch is None:
+            # A pure rename has no patch and no changed lines
+            changes.complete = file.status == "renamed" and not (file.additions or file.deletions)
+            return changes
+        try:
+            changes.hunks, changes.head_ranges, changes.base_ranges = parse_patch(file.patch)
+        except ValueError:
+            changes.complete = False
+        return changes
+
+
+def head_path_of(status: str, filename: str) -> Optional[str]:
+    """Path a file has in the head revision, given its pull request ``status``."""
+    return None if status == "removed" else filename
+
+
+def base_path_of(status: str, filename: str, previous_filename: Optional[str] = None) -> Optional[str]:
+    """Path a file had in the base revision, given its pull request ``status``."""
+    if status == "added":
+        return None
+    if status in ("renamed", "copied") and previous_filename:
+        return previous_filename
+    return filename
+
+
+def parse_patch(patch: str) -> Tuple[List[Hunk], List[LineRange], List[LineRange]]:
+    """
+    Parse a unified diff as found in GitHub's ``patch`` field.
+
+    Return the hunks with the changed head and base line ranges, merged and sorted.
+    """
+    hunks: List[Hunk] = []
+    head_lines: List[int] = []
+    base_lines: List[int] = []
+    old_line = new_line = 0
+    for line in patch.splitlines():
+        if line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            if match is None:
+                raise ValueError(f"Malformed hunk header: {line!r}")
+            old_start, old_count, new_start, new_count = match.groups()
+            hunk = Hunk(
+                int(old_start), 1 if old_count is None else int(old_count),
+                int(new_start), 1 if new_count is None else int(new_count),
+            )
+            hunks.append(hunk)
+            # Empty sides are reported as the line *before* the hunk
+            old_line = hunk.old_start if hunk.old_count else hunk.old_start + 1
+            new_line = hunk.new_start if hunk.new_count else hunk.new_start + 1
+        elif not hunks or line.startswith("\\"):
+            # Preamble or "\ No newline at end of file"
+            continue
+        elif line.startswith("+"):
+            head_lines.append(new_line)
+            base_lines.append(max(old_line - 1, 1))
+            new_line += 1
+        elif line.startswith("-"):
+            base_lines.append(old_line)
+            head_lines.append(max(new_line - 1, 1))
+            old_line += 1
+        else:
+            old_line += 1
+            new_line += 1
+    return hunks, merge_lines(head_lines), merge_lines(base_lines)
+
+
+def merge_lines(lines: Iterable[int]) -> List[LineRange]:
+    """Collapse line numbers into sorted, non-overlapping inclusive ranges."""
+    ranges: List[LineRange] = []
+    for line in sorted(set(lines)):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], line)
+        else:
+            ranges.append((line, line))
+    return ranges
@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# (body hash, docstring hash or "", prompt version, model id)
+ResultKey = Tuple[str, str, str, str]
+
+
+class AnalysisResult(NamedTuple):
+    """What the model said about one symbol's docstring."""
+
+    suggestion: str
+    rationale: str
+
+
+class AnalysisResultCache:
+    """
+    Cache of docstring analysis results keyed by code, docstring, prompt and model.
+
+    A symbol whose body hash and docstring hash are unchanged gets the same
+    answer from the same prompt and model, wherever it shows up again
+    (pushes, rebases, forks). An in-memory LRU sits in front of an optional
+    SQLite database that survives restarts and is shared between workers.
+    Lookups and writes block on SQLite, so async callers run them in an
+    executor, a whole pull request's worth at a time.
+    """
+
+    def __init__(self, max_entries: int = 10_000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[ResultKey, AnalysisResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_results ("
+                " body_hash TEXT NOT NULL, docstring_hash TEXT NOT NULL,"
+                " prompt_version TEXT NOT NULL, model_id TEXT NOT NULL,"
+                " suggestion TEXT NOT NULL, rationale TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (body_hash, docstring_hash, prompt_version, model_id))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(body_hash: str, docstring_hash: Optional[str], prompt_version: str, model_id: str) -> ResultKey:
+        return body_hash, docstring_hash or "", prompt_version, model_id
+
+    def get(self, key: ResultKey) -> Optional[AnalysisResult]:
+        """Return the cached result for ``key``, or None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[ResultKey]) -> Dict[ResultKey, AnalysisResult]:
+        """Return the cached results for those of ``keys`` that have one."""
+        found: Dict[ResultKey, AnalysisResult] = {}
+        with self._lock:
+            for key in keys:
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[key] = result
+                    continue
+
+                result = self._read_db(key)
+                if result is None:
+                    self.misses += 1
+                    continue
+                self.disk_hits += 1
+                self._store_memory(key, result)
+                found[key] = result
+        return found
+
+    def put(self, key: ResultKey, result: AnalysisResult) -> None:
+        """Cache a result in memory and, if configured, in SQLite."""
+        self.put_many([(key, result)])
+
+    def put_many(self, items: Iterable[Tuple[ResultKey, AnalysisResult]]) -> None:
+        """Cache several results, written to SQLite in a single transaction."""
+        items = list(items)
+        with self._lock:
+            for key, result in items:
+                self._store_memory(key, result)
+            if self._db is None or not items:
+                return
+            now = time.time()
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO analysis_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(*key, result.suggestion, result.rationale, now) for key, result in items],
+                    )
+            except sqlite3.Error as e:
+                print(f"Error writing analysis results to cache: {str(e)}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, the model calls saved and the hit rate."""
+        saved_calls = self.hits + self.disk_hits
+        lookups = saved_calls + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "saved_calls": saved_calls,
+            "hit_rate": saved_calls / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def _store_memory(self, key: ResultKey, result: AnalysisResult) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_db(self, key: ResultKey) -> Optional[AnalysisResult]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT suggestion, rationale FROM analysis_results"
+                " WHERE body_hash = ? AND docstring_hash = ? AND prompt_version = ? AND model_id = ?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading analysis result from cache: {str(e)}")
+            return None
+        return AnalysisResult(*row) if row is not None else None
@@ -0,0 +1,102 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from github_app.analysis.patch_parser import LineRange
+from github_app.analysis.symbol_extractor import Symbol, SymbolKey, SymbolTable
+
+
+@dataclass
+class SymbolDiff:
+    """
+    Symbol-level changes between the base and head revision of one module.
+
+    ``modified`` and ``renamed`` hold ``(base, head)`` pairs. A renamed or
+    moved symbol whose body also changed is listed in both.
+    """
+
+    added: List[Symbol] = field(default_factory=list)
+    removed: List[Symbol] = field(default_factory=list)
+    modified: List[Tuple[Symbol, Symbol]] = field(default_factory=list)
+    renamed: List[Tuple[Symbol, Symbol]] = field(default_factory=list)
+
+    @property
+    def changed_symbols(self) -> List[Symbol]:
+        """Head symbols whose code is new or changed, i.e. what needs docstring analysis."""
+        return self.added + [head for _, head in self.modified]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified or self.renamed)
+
+
+def diff_symbols(
+    base: SymbolTable, head: SymbolTable, head_ranges: Optional[Sequence[LineRange]] = None
+) -> SymbolDiff:
+    """
+    Match base and head symbols and classify them as added, removed, modified or renamed.
+
+    Symbols are matched by qualified name first, with repeated definitions
+    of a name (e.g. a property getter and setter) paired in order. Leftovers are paired as
+    renames (or moves) when their body hashes are equal, then when they
+    share a kind, enclosing scope and non-empty docstring. Every step is a
+    dictionary lookup, so the diff is linear in the number of symbols.
+
+    ``head_ranges`` are the head lines changed by the file's patch, when
+    known. Added and modified head symbols outside them kept their code
+    (e.g. a definition that only moved down the ordinals of its name when
+    another one was inserted before it) and are left out; the touched ones
+    come from the head table's interval index, not a scan of every symbol.
+    """
+    diff = SymbolDiff()
+    unmatched_base: Dict[SymbolKey, Symbol] = {}
+    unmatched_head: List[Symbol] = []
+
+    for key, symbol in base.items():
+        if head.get(*key) is None:
+            unmatched_base[key] = symbol
+    for key, symbol in head.items():
+        previous = base.get(*key)
+        if previous is None:
+            unmatched_head.append(symbol)
+        elif previous.body_hash != symbol.body_hash:
+            diff.modified.append((previous, symbol))
+
+    # Renames and moves that kept the body
+    by_body: Dict[Tuple[str, str], Deque[SymbolKey]] = {}
+    for key, symbol in unmatched_base.items():
+        by_body.setdefault((symbol.kind, symbol.body_hash), deque()).append(key)
+    remaining_head: List[Symbol] = []
+    for symbol in unmatched_head:
+        candidates = by_body.get((symbol.kind, symbol.body_hash))
+        if candidates:
+            previous = unmatched_base.pop(candidates.popleft())
+            diff.renamed.append((previous, symbol))
+        else:
+            remaining_head.append(symbol)
+
+    # Renames within the same scope that also changed the body but kept the docstring
+    by_docstring: Dict[Tuple[str, str, str], Deque[SymbolKey]] = {}
+    for key, symbol in unmatched_base.items():
+        if symbol.docstring_hash is not None:
+            group = (symbol.kind, _scope(symbol.qualified_name), symbol.docstring_hash)
+            by_docstring.setdefault(group, deque()).append(key)
+    for symbol in remaining_head:
+        candidates = None
+        if symbol.docstring_hash is not None:
+            candidates = by_docstring.get((symbol.kind, _scope(symbol.qualified_name), symbol.docstring_hash))
+        if candidates:
+            previous = unmatched_base.pop(candidates.popleft())
+            diff.renamed.append((previous, symbol))
+            diff.modified.append((previous, symbol))
+        else:
+            diff.added.append(symbol)
+
+    diff.removed = list(unmatched_base.values())
+    if head_ranges is not None:
+        touched = set(head.touched_by(head_ranges))
+        diff.added = [symbol for symbol in diff.added if symbol in touched]
+        diff.modified = [(previous, symbol) for previous, symbol in diff.modified if symbol in touched]
+    return diff
+
+
+def _scope(qualified_name: str) -> str:
+    return qualified_name.rpartition(".")[0]
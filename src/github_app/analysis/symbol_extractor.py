@@ -0,0 +1,222 @@
+import ast
+import hashlib
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+DefinitionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef]
+# (qualified name, ordinal among definitions sharing that name)
+SymbolKey = Tuple[str, int]
+
+# Statement fields that hold nested statements a definition can hide in
+# (if TYPE_CHECKING:, try/except import fallbacks, with blocks, ...)
+BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+class Symbol(NamedTuple):
+    """One function, method or class definition."""
+
+    qualified_name: str  # e.g. "Outer.method" or "func.<locals>.helper"
+    kind: str  # "function", "method" or "class"
+    start_line: int  # first decorator line, if any
+    end_line: int
+    signature: str
+    docstring: Optional[str]
+    body_hash: str  # normalized AST hash, see ``body_hash``
+    docstring_hash: Optional[str]
+
+
+class IntervalIndex:
+    """
+    Static index answering "which intervals overlap [first, last]".
+
+    Intervals are sorted by start and covered by a segment tree of maximum
+    end lines, so a query visits O(log n) nodes per match instead of every
+    interval.
+    """
+
+    def __init__(self, intervals: Sequence[Tuple[int, int]]):
+        self._order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+        self._starts = [intervals[i][0] for i in self._order]
+        size = 1
+        while size < len(intervals):
+            size *= 2
+        self._size = size
+        self._max_end = [0] * (2 * size)
+        for position, i in enumerate(self._order):
+            self._max_end[size + position] = intervals[i][1]
+        for node in range(size - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+
+    def overlapping(self, first: int, last: int) -> List[int]:
+        """Return the indices of intervals overlapping ``first..last``, ordered by start."""
+        # Only intervals starting at or before ``last`` can overlap
+        limit = bisect_right(self._starts, last)
+        matches: List[int] = []
+        # Depth-first, left to right, pruning subtrees that end before ``first``
+        stack = [(1, 0, self._size)] if limit else []
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self._max_end[node] < first:
+                continue
+            if high - low == 1:
+                matches.append(self._order[low])
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class SymbolTable:
+    """
+    Symbols of one module, with lookups by qualified name and by line range.
+
+    A name can be defined more than once (property getter and setter,
+    ``@overload`` stubs, conditional definitions), so each symbol is keyed
+    by its qualified name and its ordinal among the definitions of that
+    name, in source order.
+    """
+
+    def __init__(self, symbols: List[Symbol]):
+        self.symbols = symbols
+        self.keys: List[SymbolKey] = []
+        counts: Dict[str, int] = {}
+        for symbol in symbols:
+            ordinal = counts.get(symbol.qualified_name, 0)
+            counts[symbol.qualified_name] = ordinal + 1
+            self.keys.append((symbol.qualified_name, ordinal))
+        self._by_key: Dict[SymbolKey, Symbol] = dict(zip(self.keys, symbols))
+        self._index = IntervalIndex([(symbol.start_line, symbol.end_line) for symbol in symbols])
+
+    def get(self, qualified_name: str, ordinal: int = 0) -> Optional[Symbol]:
+        return self._by_key.get((qualified_name, ordinal))
+
+    def items(self) -> Iterator[Tuple[SymbolKey, Symbol]]:
+        return zip(self.keys, self.symbols)
+
+    def overlapping(self, first_line: int, last_line: int) -> List[Symbol]:
+        """Return the symbols whose span overlaps ``first_line..last_line``, outermost first."""
+        return [self.symbols[i] for i in self._index.overlapping(first_line, last_line)]
+
+    def touched_by(self, line_ranges: Iterable[Tuple[int, int]]) -> List[Symbol]:
+        """Return the symbols overlapping any of ``line_ranges``, each once, in source order."""
+        touched = set()
+        for first_line, last_line in line_ranges:
+            touched.update(self._index.overlapping(first_line, last_line))
+        return [self.symbols[i] for i in sorted(touched)]
+
+    def __iter__(self) -> Iterator[Symbol]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+def extract_symbols(source: Union[str, bytes], filename: str = "<unknown>") -> SymbolTable:
+    """
+    Parse ``source`` once and extract its functions, classes and methods.
+
+    Raises ``SyntaxError`` when the module does not parse.
+    """
+    tree = ast.parse(source, filename=filename)
+    symbols: List[Symbol] = []
+    # (statement, qualified name prefix, enclosing definition node)
+    stack: List[Tuple[ast.AST, str, Optional[DefinitionNode]]] = [
+        (statement, "", None) for statement in reversed(tree.body)
+    ]
+    while stack:
+        node, prefix, parent = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            qualified_name = prefix + node.name
+            symbols.append(_symbol(node, qualified_name, parent))
+            if isinstance(node, ast.ClassDef):
+                child_prefix = qualified_name + "."
+            else:
+                child_prefix = qualified_name + ".<locals>."
+            stack.extend((child, child_prefix, node) for child in reversed(_child_statements(node)))
+        else:
+            # Compound statements keep the enclosing prefix and parent
+            stack.extend((child, prefix, parent) for child in reversed(_child_statements(node)))
+    return SymbolTable(symbols)
+
+
+def _child_statements(node: ast.AST) -> List[ast.AST]:
+    children: List[ast.AST] = []
+    for field in BODY_FIELDS:
+        value = getattr(node, field, None)
+        if value:
+            children.extend(value)
+    return children
+
+
+def _symbol(node: DefinitionNode, qualified_name: str, parent: Optional[DefinitionNode]) -> Symbol:
+    if isinstance(node, ast.ClassDef):
+        kind = "class"
+        signature = _class_signature(node)
+    else:
+        kind = "method" if isinstance(parent, ast.ClassDef) else "function"
+        signature = _function_signature(node)
+    start_line = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+    docstring = ast.get_docstring(node)
+    return Symbol(
+        qualified_name, kind, start_line, node.end_lineno, signature, docstring,
+        body_hash(node), _hash_text(docstring) if docstring is not None else None,
+    )
+
+
+def body_hash(node: DefinitionNode) -> str:
+    """
+    Hash a definition's code, ignoring its name, docstring and formatting.
+
+    The hash covers decorators, the signature and the body with positions
+    stripped, so reformatting, moving the definition or editing only its
+    docstring keeps the hash. For classes, nested definitions are left out
+    since they are symbols of their own.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    parts: List[ast.AST] = list(node.decorator_list)
+    if isinstance(node, ast.ClassDef):
+        hasher.update(b"class")
+        parts.extend(node.bases)
+        parts.extend(node.keywords)
+        body = [
+            statement for statement in _body_without_docstring(node)
+            if not isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        ]
+    else:
+        hasher.update(b"async def" if isinstance(node, ast.AsyncFunctionDef) else b"def")
+        parts.append(node.args)
+        if node.returns is not None:
+            parts.append(node.returns)
+        body = _body_without_docstring(node)
+    parts.extend(body)
+    for part in parts:
+        hasher.update(b"\0")
+        hasher.update(ast.dump(part, annotate_fields=False).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _body_without_docstring(node: DefinitionNode) -> List[ast.stmt]:
+    body = node.body
+    if ast.get_docstring(node, clean=False) is not None:
+        return body[1:]
+    return body
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _function_signature(node: FunctionNode) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _class_signature(node: ast.ClassDef) -> str:
+    bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+    return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
@@ -16,6 +16,95 @@ class Config:
     GITHUB_API_BASE_URL = "https://api.github.com"
     GITHUB_API_VERSION = "2022-11-28"
 
+    # Installation tokens live for an hour; refresh them this many seconds early
+    TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+    # Authenticated clients kept alive (one per installation), and keep-alive HTTP connections
+    # shared by all of them (raised to GITHUB_IO_WORKERS so no worker's connection is discarded)
+    GITHUB_CLIENT_POOL_SIZE = int(os.getenv("GITHUB_CLIENT_POOL_SIZE", "64"))
+    GITHUB_HTTP_POOL_SIZE = int(os.getenv("GITHUB_HTTP_POOL_SIZE", "10"))
+
+    # Threads running blocking GitHub calls off the event loop
+    GITHUB_IO_WORKERS = int(os.getenv("GITHUB_IO_WORKERS", "16"))
+    # PyGithub spaces reads 0.25s apart per client by default, which serializes concurrent calls
+    GITHUB_SECONDS_BETWEEN_REQUESTS = float(os.getenv("GITHUB_SECONDS_BETWEEN_REQUESTS", "0"))
+
+    # Items per page of paginated listings; 100 is GitHub's maximum
+    GITHUB_PER_PAGE = int(os.getenv("GITHUB_PER_PAGE", "100"))
+
+    # Per-installation pacing: below this fraction of the hourly budget, requests are spread
+    # until the reset; rate-limited requests are retried when the wait is short enough
+    GITHUB_RATE_LIMIT_PACE_FRACTION = float(os.getenv("GITHUB_RATE_LIMIT_PACE_FRACTION", "0.2"))
+    GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", "120"))
+    GITHUB_RATE_LIMIT_MAX_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_MAX_RETRIES", "3"))
+
+    # GET responses revalidated with ETag/Last-Modified (304s are free); 0 disables the cache
+    GITHUB_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("GITHUB_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # Larger webhook bodies are rejected with 413 while still streaming in; GitHub caps payloads at 25MB
+    WEBHOOK_MAX_PAYLOAD_BYTES = int(os.getenv("WEBHOOK_MAX_PAYLOAD_BYTES", str(25 * 1024 * 1024)))
+
+    # Webhook delivery deduplication; GitHub allows manual redelivery for 3 days
+    DELIVERY_TTL_SECONDS = int(os.getenv("DELIVERY_TTL_SECONDS", str(3 * 24 * 3600)))
+    DELIVERY_STORE_MAX_ENTRIES = int(os.getenv("DELIVERY_STORE_MAX_ENTRIES", "100000"))
+    DELIVERY_STORE_REDIS_URL = os.getenv("DELIVERY_STORE_REDIS_URL")
+
+    # Webhook job queue
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "1000"))
+    JOB_DRAIN_TIMEOUT_SECONDS = float(os.getenv("JOB_DRAIN_TIMEOUT_SECONDS", "30"))
+
+    # Events for one PR arriving within this window are coalesced into one analysis
+    PR_DEBOUNCE_SECONDS = float(os.getenv("PR_DEBOUNCE_SECONDS", "3"))
+
+    # Pull requests whose last analysis is kept for incremental re-analysis
+    ANALYSIS_STATE_MAX_PRS = int(os.getenv("ANALYSIS_STATE_MAX_PRS", "1000"))
+
+    # Pipeline settings
+    FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+    # Listing pages whose files may be fetched at once; further pages wait
+    PAGES_IN_FLIGHT = int(os.getenv("PAGES_IN_FLIGHT", "2"))
+    # Above this many changed files, revisions are fetched through batched GraphQL queries
+    BATCH_FETCH_THRESHOLD = int(os.getenv("BATCH_FETCH_THRESHOLD", "5"))
+    # File revisions resolved per GraphQL query
+    GRAPHQL_BATCH_SIZE = int(os.getenv("GRAPHQL_BATCH_SIZE", "50"))
+    # From this many changed files, head/base tarballs are streamed instead, unless the
+    # repository (size in KB, from the webhook payload) is too big to download twice
+    ARCHIVE_FETCH_THRESHOLD = int(os.getenv("ARCHIVE_FETCH_THRESHOLD", "200"))
+    ARCHIVE_MAX_REPO_KB = int(os.getenv("ARCHIVE_MAX_REPO_KB", "100000"))
+    ARCHIVE_TIMEOUT_SECONDS = int(os.getenv("ARCHIVE_TIMEOUT_SECONDS", "120"))
+
+    # AST parsing: sources of at least PARSER_INLINE_MAX_BYTES go to a pool of PARSER_WORKERS processes
+    PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 1)))
+    PARSER_INLINE_MAX_BYTES = int(os.getenv("PARSER_INLINE_MAX_BYTES", str(32 * 1024)))
+
+    # Docstring analysis; results are cached per (body hash, docstring hash, prompt version, model id)
+    ANALYSIS_PROMPT_VERSION = os.getenv("ANALYSIS_PROMPT_VERSION", "1")
+    ANALYSIS_MODEL_ID = os.getenv("ANALYSIS_MODEL_ID", "stub")
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH")  # SQLite file; memory only when unset
+    # Model requests: symbols are packed up to LLM_MAX_BATCH_TOKENS per request,
+    # and each installation may spend LLM_TOKENS_PER_MINUTE
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_MAX_BATCH_TOKENS = int(os.getenv("LLM_MAX_BATCH_TOKENS", "6000"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+
+    # Content-addressed blob cache; the on-disk layer is off unless a directory is set
+    BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR")
+
+    # Per-delivery tracing: "jsonl" appends spans to TRACING_JSONL_PATH, "otlp" posts them to an
+    # OTLP/HTTP collector; off when unset. Only repositories listed (comma-separated "owner/repo",
+    # or "*") are traced; TRACING_REPOSITORIES_FILE, one per line, is re-read when it changes
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+    TRACING_JSONL_PATH = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+    TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACING_REPOSITORIES = os.getenv("TRACING_REPOSITORIES", "")
+    TRACING_REPOSITORIES_FILE = os.getenv("TRACING_REPOSITORIES_FILE")
+    TRACING_RELOAD_SECONDS = float(os.getenv("TRACING_RELOAD_SECONDS", "5"))
+
 
 config = Config()
 
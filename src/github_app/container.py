@@ -0,0 +1,66 @@
+from github_app.configure.config import config
+from github_app.controllers.pull_request_controller import PullRequestController
+from github_app.handlers.git_hub_client import GitHubClient
+from github_app.handlers.pull_request_handler import PullRequestEventHandler
+from github_app.monitoring.metrics import registry
+from github_app.monitoring.tracing import create_span_exporter, tracer
+from github_app.security.auth import GitHubAuth
+from github_app.services.job_queue import JobQueue
+from github_app.services.pull_request_scheduler import PullRequestScheduler
+from github_app.services.pull_request_service import PullRequestService
+
+
+class AppContainer:
+    """
+    The process-wide resources of the GitHub App, built once when the app starts.
+
+    Auth (private key, token cache, client pool), the GitHub I/O pool and
+    caches, the parser and LLM workers and the job queue are shared by every
+    request served by this worker process, and released together on close.
+    """
+
+    def __init__(self):
+        tracer.configure(
+            create_span_exporter(config.TRACING_EXPORTER, config.TRACING_JSONL_PATH, config.TRACING_OTLP_ENDPOINT),
+            config.TRACING_REPOSITORIES.split(","),
+            config.TRACING_REPOSITORIES_FILE,
+            config.TRACING_RELOAD_SECONDS,
+        )
+        self.auth = GitHubAuth()
+        self.github_client = GitHubClient(self.auth)
+        self.service = PullRequestService(self.github_client)
+        self.job_queue = JobQueue(config.JOB_WORKERS, config.JOB_QUEUE_MAX_SIZE)
+        self.handler = PullRequestEventHandler(
+            self.service,
+            job_queue=self.job_queue,
+            scheduler=PullRequestScheduler(self.job_queue, config.PR_DEBOUNCE_SECONDS),
+        )
+        self.pull_request_controller = PullRequestController(self.handler)
+        self.collectors = {
+            "job_queue": self.job_queue.stats,
+            "scheduler": self.handler.scheduler.stats,
+            "token_cache": self.auth.token_cache.stats,
+            "github_client_pool": self.auth.client_pool.stats,
+            "github_rate_limiter": self.github_client.rate_limiter.stats,
+            "blob_cache": self.github_client.blob_cache.stats,
+            "parser_pool": self.service.parser_pool.stats,
+            "result_cache": self.service.result_cache.stats,
+            "llm_dispatcher": self.service.dispatcher.stats,
+            "tracing": tracer.stats,
+        }
+        if self.github_client.response_cache is not None:
+            self.collectors["github_response_cache"] = self.github_client.response_cache.stats
+        # Exported on /metrics alongside the per-stage metrics
+        for component, stats in self.collectors.items():
+            registry.register_collector(component, stats)
+
+    async def close(self) -> None:
+        """Finish queued work, then stop worker pools and close clients, sessions and caches."""
+        for component in self.collectors:
+            registry.unregister_collector(component)
+        try:
+            await self.pull_request_controller.shutdown()
+        finally:
+            self.github_client.close()
+            # Last, so spans of the drained jobs are exported
+            tracer.shutdown()
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+def git_blob_sha(content: bytes) -> str:
+    """Compute the git blob SHA-1 of ``content``."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class BlobCache:
+    """
+    Content-addressed cache of file contents keyed by git blob SHA.
+
+    Blobs are immutable, so entries never need invalidation: an in-memory LRU
+    bounded by total bytes sits in front of an optional on-disk layer. A
+    second, count-bounded index maps ``(commit SHA, path)`` to blob SHA so
+    revisions whose blob SHA is not listed (the base side) can be served too.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None, max_refs: int = 65536):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.max_refs = max_refs
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._refs: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, blob_sha: str) -> Optional[bytes]:
+        """Return the cached content of a blob, or None."""
+        with self._lock:
+            content = self._blobs.get(blob_sha)
+            if content is not None:
+                self._blobs.move_to_end(blob_sha)
+                self.hits += 1
+                return content
+
+        content = self._read_disk(blob_sha)
+        if content is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._store_memory(blob_sha, content)
+        return content
+
+    def put(self, blob_sha: str, content: bytes) -> None:
+        """Cache the content of a blob in memory and, if configured, on disk."""
+        self._store_memory(blob_sha, content)
+        self._write_disk(blob_sha, content)
+
+    def blob_sha_for(self, ref_sha: str, path: str) -> Optional[str]:
+        """Return the blob SHA last seen for ``path`` at commit ``ref_sha``."""
+        with self._lock:
+            return self._refs.get((ref_sha, path))
+
+    def remember(self, ref_sha: str, path: str, blob_sha: str) -> None:
+        """Record which blob ``path`` points to at commit ``ref_sha``."""
+        with self._lock:
+            self._refs[(ref_sha, path)] = blob_sha
+            self._refs.move_to_end((ref_sha, path))
+            while len(self._refs) > self.max_refs:
+                self._refs.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the memory layer's size."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._blobs),
+            "bytes": self._size,
+        }
+
+    def _store_memory(self, blob_sha: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._blobs.pop(blob_sha, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._blobs[blob_sha] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _disk_path(self, blob_sha: str) -> Path:
+        return self.directory / blob_sha[:2] / blob_sha[2:]
+
+    def _read_disk(self, blob_sha: str) -> Optional[bytes]:
+        if self.directory is None:
+            return None
+        try:
+            content = self._disk_path(blob_sha).read_bytes()
+        except OSError:
+            return None
+        # Guard against truncated or corrupted files
+        if git_blob_sha(content) != blob_sha:
+            return None
+        return content
+
+    def _write_disk(self, blob_sha: str, content: bytes) -> None:
+        if self.directory is None:
+            return
+        path = self._disk_path(blob_sha)
+        if path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing blob {blob_sha} to cache: {str(e)}")
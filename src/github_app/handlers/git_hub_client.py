@@ -1,74 +1,552 @@
-from typing import List
+import asyncio
+import itertools
+import tarfile
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+import requests
 from fastapi import HTTPException
 from github.GithubException import GithubException
+from github.Repository import Repository
+from github_app.configure.config import config
+from github_app.handlers.blob_cache import BlobCache, git_blob_sha
+from github_app.handlers.github_executor import GitHubExecutor
+from github_app.handlers.github_rate_limiter import (
+    DeferredWaits, GitHubRateLimiter, RateLimitDeferred, current_deferred_waits, current_installation,
+)
+from github_app.handlers.github_response_cache import ConditionalResponseCache
+from github_app.handlers.github_transport import close_transport, install_transport
+from github_app.handlers.pull_request_context import ChangedFile, PullRequestContext
+from github_app.monitoring.metrics import time_stage
+from github_app.monitoring.tracing import set_attributes, tracer
 from github_app.security.auth import GitHubAuth
 
 
+BLOB_FIELDS = "... on Blob { oid text isBinary isTruncated }"
+# The compare API lists at most this many files
+COMPARE_FILES_LIMIT = 300
+
+T = TypeVar("T")
+
+
+def github_error_message(error: GithubException) -> str:
+    """The ``message`` GitHub sent with an error response, or the exception text."""
+    if isinstance(error.data, dict) and error.data.get("message"):
+        return error.data["message"]
+    return str(error)
+
+
 class GitHubClient:
     """ interactions with the GitHub API. """
 
-    def __init__(self, auth: GitHubAuth):
+    def __init__(
+        self, auth: GitHubAuth, executor: Optional[GitHubExecutor] = None, blob_cache: Optional[BlobCache] = None,
+        rate_limiter: Optional[GitHubRateLimiter] = None, response_cache: Optional[ConditionalResponseCache] = None
+    ):
         self.auth = auth
+        self.rate_limiter = rate_limiter or GitHubRateLimiter(
+            pace_fraction=config.GITHUB_RATE_LIMIT_PACE_FRACTION,
+            max_wait_seconds=config.GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS,
+            max_retries=config.GITHUB_RATE_LIMIT_MAX_RETRIES,
+        )
+        self.response_cache = response_cache
+        if self.response_cache is None and config.GITHUB_RESPONSE_CACHE_MAX_BYTES > 0:
+            self.response_cache = ConditionalResponseCache(config.GITHUB_RESPONSE_CACHE_MAX_BYTES)
+        # Every IO worker may hold a connection at once; fewer pooled connections would be discarded
+        install_transport(
+            self.rate_limiter, self.response_cache,
+            pool_size=max(config.GITHUB_HTTP_POOL_SIZE, config.GITHUB_IO_WORKERS),
+        )
+        # PyGithub is blocking; every call goes through this bounded pool
+        self.executor = executor or GitHubExecutor(config.GITHUB_IO_WORKERS)
+        self.blob_cache = blob_cache or BlobCache(config.BLOB_CACHE_MAX_BYTES, config.BLOB_CACHE_DIR)
+
+    async def _run(
+        self, installation_id: Optional[int], func: Callable[..., T], *args: Any, rerunnable: bool = True
+    ) -> T:
+        """
+        Run a blocking call in the executor, rate-limited under ``installation_id``'s budget.
+
+        When the call's first request has to wait for its rate-limit slot,
+        the call gives up its thread before sending anything, the wait is
+        awaited here and ``func`` runs again with the slot already reserved.
+        Calls that must not run twice (e.g. advancing a shared iterator)
+        pass ``rerunnable=False`` and wait in the thread instead. A 401
+        means the installation token was revoked or expired early, so it is
+        dropped from the token cache before the error propagates.
+        """
+        token = current_installation.set(installation_id)
+        deferred = DeferredWaits() if rerunnable else None
+        deferred_token = current_deferred_waits.set(deferred)
+        try:
+            while True:
+                try:
+                    return await self.executor.run(func, *args)
+                except RateLimitDeferred as wait:
+                    await asyncio.sleep(wait.delay)
+                    deferred.reserved = wait.resource
+        except GithubException as e:
+            if e.status == 401 and installation_id is not None:
+                self.auth.invalidate_installation_token(installation_id)
+            raise
+        finally:
+            current_deferred_waits.reset(deferred_token)
+            current_installation.reset(token)
+
+    async def resolve_context(self, context: PullRequestContext) -> PullRequestContext:
+        """
+        Resolve the repository handle and head/base SHAs of a pull request once per event.
+
+        Whatever the webhook payload already carried is used as is; the API is
+        only asked for the missing parts.
+        """
+        try:
+            return await self._run(context.installation_id, self._resolve_context, context)
+        except GithubException as e:
+            print(f"GitHub API error resolving pull request context: {github_error_message(e)}")
+            return context
+        except Exception as e:
+            # Leave the context unresolved; each call will retry resolving it
+            print(f"Error resolving pull request context: {str(e)}")
+            return context
+
+    def _resolve_context(self, context: PullRequestContext, need_shas: bool = True) -> PullRequestContext:
+        if context.repository is None:
+            github = self.auth.get_github_instance(context.installation_id)
+            if context.repository_data is not None:
+                context.repository = github.create_from_raw_data(Repository, context.repository_data)
+            else:
+                context.repository = github.get_repo(context.full_name)
+
+        if need_shas and not (context.head_sha and context.base_sha):
+            pull_request = context.repository.get_pull(context.pr_number)
+            context.head_sha = pull_request.head.sha
+            context.base_sha = pull_request.base.sha
+        return context
+
+    @staticmethod
+    def _mark_incomplete(context: Optional[PullRequestContext]) -> None:
+        """Record on the caller's context that a listing or fetch failed and its results are partial."""
+        if context is not None:
+            context.incomplete = True
+
+    def _context_for(
+        self, installation_id: int, owner: str, repo: str, pr_number: int,
+        context: Optional[PullRequestContext], need_shas: bool = False
+    ) -> PullRequestContext:
+        if context is None:
+            context = PullRequestContext(installation_id, owner, repo, pr_number)
+        return self._resolve_context(context, need_shas)
 
     async def get_changed_python_files(
-        self, installation_id: int, owner: str, repo: str, pr_number: int
+        self, installation_id: int, owner: str, repo: str, pr_number: int,
+        context: Optional[PullRequestContext] = None
     ) -> List[str]:
         """
                Get all changed Python files in a pull request.
                Retrieves the list of files modified in a specific pull request and filters to return only Python files.
+               File metadata (blob SHA, status, patch) is kept on ``context.files``.
                """
         try:
-            github = self.auth.get_github_instance(installation_id)
-            repository = github.get_repo(f"{owner}/{repo}")
-            pull_request = repository.get_pull(pr_number)
-
-            return [
-                file.filename for file in pull_request.get_files()
-                if file.filename.endswith(".py")
-            ]
+            with time_stage("file_listing"), tracer.span("get_changed_python_files"):
+                return await self._run(
+                    installation_id, self._list_changed_python_files, installation_id, owner, repo, pr_number, context
+                )
+        except GithubException as e:
+            print(f"GitHub API error getting changed files: {github_error_message(e)}")
+            self._mark_incomplete(context)
+            return []
         except Exception as e:
             print(f"Error getting changed files: {str(e)}")
+            self._mark_incomplete(context)
             return []
 
+    def _list_changed_python_files(
+        self, installation_id: int, owner: str, repo: str, pr_number: int,
+        context: Optional[PullRequestContext]
+    ) -> List[str]:
+        repository = self._context_for(installation_id, owner, repo, pr_number, context).repository
+        pull_request = repository.get_pull(pr_number)
+
+        python_files = [
+            file for file in pull_request.get_files()
+            if file.filename.endswith(".py")
+        ]
+        if context is not None:
+            context.files = [ChangedFile.from_github_file(file) for file in python_files]
+        return [file.filename for file in python_files]
+
+    async def iter_changed_python_files(
+        self, installation_id: int, owner: str, repo: str, pr_number: int,
+        context: Optional[PullRequestContext] = None
+    ) -> AsyncIterator[List[ChangedFile]]:
+        """
+        Stream the changed Python files of a pull request, one listing page at a time.
+
+        Each page is yielded as soon as it arrives, with the next one already
+        being fetched; no further page is requested until the consumer asks
+        for it. Pages are also appended to ``context.files``. A listing error
+        ends the stream early and sets ``context.incomplete``, so a partial
+        listing can be told apart from a complete one.
+        """
+        if context is None:
+            context = PullRequestContext(installation_id, owner, repo, pr_number)
+        context.files = []
+        pending: Optional[asyncio.Future] = None
+        try:
+            files = await self._run(installation_id, self._changed_files_iterator, context)
+            # A page request advances the listing iterator, so it is never rerun
+            pending = asyncio.ensure_future(
+                self._run(installation_id, self._next_python_files_page, files, rerunnable=False)
+            )
+            while True:
+                page = await pending
+                pending = None
+                if page is None:
+                    return
+                # Prefetch one page ahead while the consumer works on this one
+                pending = asyncio.ensure_future(
+                    self._run(installation_id, self._next_python_files_page, files, rerunnable=False)
+                )
+                if page:
+                    context.files.extend(page)
+                    yield page
+        except GithubException as e:
+            print(f"GitHub API error getting changed files: {github_error_message(e)}")
+            context.incomplete = True
+        except Exception as e:
+            print(f"Error getting changed files: {str(e)}")
+            context.incomplete = True
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def _changed_files_iterator(self, context: PullRequestContext) -> Iterator[Any]:
+        repository = self._resolve_context(context, need_shas=False).repository
+        return iter(repository.get_pull(context.pr_number).get_files())
+
+    @staticmethod
+    def _next_python_files_page(files: Iterator[Any]) -> Optional[List[ChangedFile]]:
+        # Taking exactly one page of items makes PaginatedList request exactly one page
+        with time_stage("file_listing"), tracer.span("list_changed_files_page") as span:
+            page = list(itertools.islice(files, config.GITHUB_PER_PAGE))
+            span.set("files", len(page))
+        if not page:
+            return None
+        return [ChangedFile.from_github_file(file) for file in page if file.filename.endswith(".py")]
+
+    async def get_compare_python_files(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, base_sha: str, head_sha: str,
+        context: Optional[PullRequestContext] = None
+    ) -> Optional[List[ChangedFile]]:
+        """
+        Get the Python files changed between two commits, e.g. a push's ``before`` and ``after``.
+
+        Returns None when the comparison cannot stand in for a full listing:
+        force pushes (``after`` does not descend from ``before``), truncated
+        file lists, or API errors.
+        """
+        try:
+            with time_stage("file_listing"), tracer.span("get_compare_python_files", base=base_sha, head=head_sha):
+                return await self._run(
+                    installation_id, self._compare_python_files,
+                    installation_id, owner, repo, pr_number, base_sha, head_sha, context
+                )
+        except GithubException as e:
+            print(f"GitHub API error comparing {base_sha}...{head_sha}: {github_error_message(e)}")
+            return None
+        except Exception as e:
+            print(f"Error comparing {base_sha}...{head_sha}: {str(e)}")
+            return None
+
+    def _compare_python_files(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, base_sha: str, head_sha: str,
+        context: Optional[PullRequestContext]
+    ) -> Optional[List[ChangedFile]]:
+        repository = self._context_for(installation_id, owner, repo, pr_number, context).repository
+        comparison = repository.compare(base_sha, head_sha)
+        if comparison.status not in ("ahead", "identical"):
+            return None
+        files = comparison.files
+        if len(files) >= COMPARE_FILES_LIMIT:
+            return None
+        return [
+            ChangedFile.from_github_file(file) for file in files
+            if file.filename.endswith(".py") or (file.previous_filename or "").endswith(".py")
+        ]
+
     async def post_pr_comment(
-        self, installation_id: int, owner: str, repo: str, pr_number: int, body: str
+        self, installation_id: int, owner: str, repo: str, pr_number: int, body: str,
+        context: Optional[PullRequestContext] = None
     ) -> str:
         """
             Post a comment to a pull request.
                Creates a new comment on the specified pull request with the provided content.
                """
         try:
-            github = self.auth.get_github_instance(installation_id)
-            repository = github.get_repo(f"{owner}/{repo}")
-            issue = repository.get_issue(pr_number)
-            comment = issue.create_comment(body)
-            return comment.html_url
-
+            with time_stage("comment_post"), tracer.span("post_pr_comment"):
+                return await self._run(
+                    installation_id, self._create_pr_comment, installation_id, owner, repo, pr_number, body, context
+                )
 
+        except GithubException as e:
+            print(f"GitHub API error posting comment on PR #{pr_number}: {github_error_message(e)}")
+            return ""
         except Exception as e:
             print(f"Error getting changed files: {str(e)}")
             return ""
 
+    def _create_pr_comment(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, body: str,
+        context: Optional[PullRequestContext]
+    ) -> str:
+        repository = self._context_for(installation_id, owner, repo, pr_number, context).repository
+        issue = repository.get_issue(pr_number)
+        comment = issue.create_comment(body)
+        return comment.html_url
+
     async def get_file_content(
-        self, installation_id: int, owner: str, repo: str, pr_number: int, file_path: str, ref_type: str = "head"
+        self, installation_id: int, owner: str, repo: str, pr_number: int, file_path: str, ref_type: str = "head",
+        context: Optional[PullRequestContext] = None
     ) -> str:
         """
         Fetch raw content of a file from a pull request base or head commit.
 
         Retrieves the content of a specific file at the state it exists in
         either the base commit (target branch) or head commit (PR branch).
+        With a resolved ``context`` no repository or pull request lookups are made.
         """
         try:
-            github = self.auth.get_github_instance(installation_id)
-            repository = github.get_repo(f"{owner}/{repo}")
-            pull_request = repository.get_pull(pr_number)
-
-            # Resolve the correct commit SHA based on ref_type. Default to head.
-            ref_sha = pull_request.head.sha if ref_type == "head" else pull_request.base.sha
-
-            contents = repository.get_contents(file_path, ref=ref_sha)
-            return contents.decoded_content.decode("utf-8")
+            with time_stage("content_fetch"), tracer.span("get_file_content", path=file_path, ref_type=ref_type):
+                return await self._run(
+                    installation_id, self._fetch_file_content,
+                    installation_id, owner, repo, pr_number, file_path, ref_type, context
+                )
 
+        except GithubException as e:
+            print(f"GitHub API error getting file content for {file_path}: {github_error_message(e)}")
+            self._mark_incomplete(context)
+            return ""
         except Exception as e:
             print(f"Error getting file content for {file_path}: {str(e)}")
+            self._mark_incomplete(context)
             return ""
+
+    def _fetch_file_content(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, file_path: str, ref_type: str,
+        context: Optional[PullRequestContext]
+    ) -> str:
+        context = self._context_for(installation_id, owner, repo, pr_number, context, need_shas=True)
+
+        # Resolve the correct commit SHA based on ref_type. Default to head.
+        ref_sha = context.ref_sha(ref_type)
+
+        blob_sha = self._known_blob_sha(context, file_path, ref_type, ref_sha)
+        if blob_sha is not None:
+            content = self.blob_cache.get(blob_sha)
+            if content is not None:
+                set_attributes(cache_hit=True, size_bytes=len(content))
+                return content.decode("utf-8")
+
+        contents = context.repository.get_contents(file_path, ref=ref_sha)
+        content = contents.decoded_content
+        set_attributes(cache_hit=False, size_bytes=len(content))
+        self.blob_cache.put(contents.sha, content)
+        self.blob_cache.remember(ref_sha, file_path, contents.sha)
+        return content.decode("utf-8")
+
+    def _known_blob_sha(
+        self, context: PullRequestContext, file_path: str, ref_type: str, ref_sha: str
+    ) -> Optional[str]:
+        """Return the blob SHA of a file revision if it is known without an API call."""
+        if ref_type == "head":
+            changed_file = context.changed_file(file_path)
+            if changed_file is not None and changed_file.sha:
+                return changed_file.sha
+        return self.blob_cache.blob_sha_for(ref_sha, file_path)
+
+    async def get_file_contents_batch(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, revisions: List[Tuple[str, str]],
+        context: Optional[PullRequestContext] = None
+    ) -> List[str]:
+        """
+        Fetch many file revisions with a few GraphQL queries instead of one REST call each.
+
+        ``revisions`` are ``(ref_type, file_path)`` pairs; contents come back in
+        the same order. Cached blobs are served locally, the rest are resolved
+        ``config.GRAPHQL_BATCH_SIZE`` at a time through ``object(expression:
+        "sha:path")`` aliases. Revisions GraphQL cannot return as text (truncated
+        blobs, failed chunks) fall back to ``get_file_content``.
+        """
+        if context is None:
+            context = PullRequestContext(installation_id, owner, repo, pr_number)
+        context = await self.resolve_context(context)
+        if context.repository is None or not (context.head_sha and context.base_sha):
+            context.incomplete = True
+            return [""] * len(revisions)
+
+        contents: List[Optional[str]] = [None] * len(revisions)
+        pending: List[int] = []
+        for index, (ref_type, file_path) in enumerate(revisions):
+            ref_sha = context.ref_sha(ref_type)
+            blob_sha = self._known_blob_sha(context, file_path, ref_type, ref_sha)
+            cached = self.blob_cache.get(blob_sha) if blob_sha is not None else None
+            if cached is None:
+                pending.append(index)
+                continue
+            try:
+                contents[index] = cached.decode("utf-8")
+            except UnicodeDecodeError:
+                contents[index] = ""
+
+        batch_size = config.GRAPHQL_BATCH_SIZE
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        results = await asyncio.gather(*(
+            self._run(context.installation_id, self._fetch_graphql_chunk, context, [revisions[i] for i in chunk])
+            for chunk in chunks
+        ), return_exceptions=True)
+
+        fallback: List[int] = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                print(f"Error fetching file contents batch: {str(result)}")
+                fallback.extend(chunk)
+                continue
+            for index, content in zip(chunk, result):
+                if content is None:
+                    fallback.append(index)
+                else:
+                    contents[index] = content
+
+        fallback_contents = await asyncio.gather(*(
+            self.get_file_content(
+                installation_id, owner, repo, pr_number, revisions[i][1], ref_type=revisions[i][0], context=context
+            )
+            for i in fallback
+        ))
+        for index, content in zip(fallback, fallback_contents):
+            contents[index] = content
+        return [content or "" for content in contents]
+
+    def _fetch_graphql_chunk(
+        self, context: PullRequestContext, revisions: List[Tuple[str, str]]
+    ) -> List[Optional[str]]:
+        """
+        Resolve one chunk of revisions in a single GraphQL query.
+
+        Returns the text of each revision, ``""`` for missing or binary files and
+        None where the text must be fetched over REST.
+        """
+        variables: Dict[str, Any] = {"owner": context.owner, "name": context.repo}
+        declarations = ["$owner: String!", "$name: String!"]
+        selections = []
+        for i, (ref_type, file_path) in enumerate(revisions):
+            variables[f"e{i}"] = f"{context.ref_sha(ref_type)}:{file_path}"
+            declarations.append(f"$e{i}: String!")
+            selections.append(f"f{i}: object(expression: $e{i}) {{ {BLOB_FIELDS} }}")
+        query = (
+            f"query({', '.join(declarations)}) {{ repository(owner: $owner, name: $name) {{ "
+            f"{' '.join(selections)} }} }}"
+        )
+
+        requester = context.repository._requester
+        with time_stage("content_fetch_batch"), tracer.span("graphql_contents_batch", revisions=len(revisions)):
+            _, data = requester.requestJsonAndCheck(
+                "POST", self._graphql_url(requester.base_url), input={"query": query, "variables": variables}
+            )
+        repository = (data.get("data") or {}).get("repository")
+        if repository is None:
+            raise Exception(str(data.get("errors") or "repository not found"))
+
+        contents: List[Optional[str]] = []
+        for i, (ref_type, file_path) in enumerate(revisions):
+            blob = repository.get(f"f{i}")
+            if not blob:
+                # No such file at this revision (e.g. added or deleted in the PR)
+                contents.append("")
+            elif blob.get("isBinary"):
+                contents.append("")
+            elif blob.get("isTruncated") or blob.get("text") is None:
+                contents.append(None)
+            else:
+                text = blob["text"]
+                self.blob_cache.put(blob["oid"], text.encode("utf-8"))
+                self.blob_cache.remember(context.ref_sha(ref_type), file_path, blob["oid"])
+                contents.append(text)
+        return contents
+
+    @staticmethod
+    def _graphql_url(base_url: str) -> str:
+        """Map a REST base URL to its GraphQL endpoint (GitHub Enterprise serves it under /api)."""
+        base_url = base_url.rstrip("/")
+        if base_url.endswith("/api/v3"):
+            return base_url[:-len("/v3")] + "/graphql"
+        return base_url + "/graphql"
+
+    async def get_archive_contents(
+        self, installation_id: int, owner: str, repo: str, pr_number: int, ref_type: str, file_paths: List[str],
+        context: Optional[PullRequestContext] = None
+    ) -> List[str]:
+        """
+        Fetch many files of one revision by streaming the repository tarball once.
+
+        The archive is read straight from the HTTP response through ``tarfile``
+        without touching disk, and only ``file_paths`` are extracted. Contents
+        come back in the order of ``file_paths``; files absent from the
+        revision are returned as ``""``. When the caller is cancelled, the
+        worker thread stops reading the archive at the next member.
+        """
+        if context is None:
+            context = PullRequestContext(installation_id, owner, repo, pr_number)
+        context = await self.resolve_context(context)
+        cancelled = threading.Event()
+        span = tracer.span("get_archive_contents", ref_type=ref_type, files=len(file_paths))
+        try:
+            with time_stage("archive_fetch"), span:
+                return await self._run(
+                    context.installation_id, self._extract_archive_files, context, ref_type, file_paths, cancelled
+                )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def _extract_archive_files(
+        self, context: PullRequestContext, ref_type: str, file_paths: List[str],
+        cancelled: Optional[threading.Event] = None
+    ) -> List[str]:
+        ref_sha = context.ref_sha(ref_type)
+        wanted = set(file_paths)
+        found: Dict[str, str] = {}
+
+        url = context.repository.get_archive_link("tarball", ref=ref_sha)
+        with requests.get(url, stream=True, timeout=config.ARCHIVE_TIMEOUT_SECONDS) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                for member in archive:
+                    if cancelled is not None and cancelled.is_set():
+                        break
+                    if not member.isfile():
+                        continue
+                    # Members are prefixed with "<owner>-<repo>-<sha>/"
+                    path = member.name.split("/", 1)[-1]
+                    if path not in wanted or path in found:
+                        continue
+                    content = archive.extractfile(member).read()
+                    blob_sha = git_blob_sha(content)
+                    self.blob_cache.put(blob_sha, content)
+                    self.blob_cache.remember(ref_sha, path, blob_sha)
+                    try:
+                        found[path] = content.decode("utf-8")
+                    except UnicodeDecodeError:
+                        found[path] = ""
+                    if len(found) == len(wanted):
+                        # Skip downloading the rest of the archive
+                        break
+
+        return [found.get(file_path, "") for file_path in file_paths]
+
+    def close(self) -> None:
+        """Wait for running GitHub calls, then release pooled clients and the shared HTTP sessions."""
+        self.executor.shutdown()
+        self.auth.close()
+        close_transport()
@@ -0,0 +1,26 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class GitHubExecutor:
+    """Bounded thread pool that runs blocking PyGithub calls off the event loop."""
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="github-io")
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func`` in the pool and await its result; context variables are carried over."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and optionally wait for running calls to finish."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,220 @@
+import contextvars
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+# Installation the current GitHub request is made for; set by GitHubClient and
+# carried into executor threads, where the transport reads it
+current_installation: contextvars.ContextVar[Optional[Hashable]] = contextvars.ContextVar(
+    "github_installation", default=None
+)
+
+
+class DeferredWaits:
+    """
+    Waits handed back from an executor thread to the coroutine that started the call.
+
+    Only a wait before the call's first request is handed back, since the
+    call is then rerun from the start without having sent anything; later
+    waits are slept in the thread. ``reserved`` is the resource whose slot
+    the coroutine has already waited for.
+    """
+
+    def __init__(self):
+        self.reserved: Optional[str] = None
+        self.sent = False
+
+
+# Set by GitHubClient around each executor call; without it the limiter sleeps in the calling thread
+current_deferred_waits: contextvars.ContextVar[Optional[DeferredWaits]] = contextvars.ContextVar(
+    "github_deferred_waits", default=None
+)
+
+
+class RateLimitDeferred(Exception):
+    """A request must wait ``delay`` seconds for its reserved slot; raised instead of sleeping in the thread."""
+
+    def __init__(self, delay: float, resource: str):
+        super().__init__(f"GitHub {resource} request deferred by {delay:.1f}s")
+        self.delay = delay
+        self.resource = resource
+
+
+@dataclass
+class RateLimitState:
+    """What the last responses said about one installation's budget for one resource."""
+
+    remaining: Optional[int] = None
+    limit: Optional[int] = None
+    reset_at: float = 0.0  # epoch seconds
+    blocked_until: float = 0.0  # epoch seconds; set by secondary rate limits
+    next_allowed: float = 0.0  # epoch seconds; the last paced request's slot
+
+
+class GitHubRateLimiter:
+    """
+    Paces GitHub requests per installation from the rate-limit headers of earlier responses.
+
+    Installations share one hourly budget per resource (``core`` REST,
+    ``graphql``, ...) across all their repositories, so once fewer than
+    ``pace_fraction`` of it remain, each request reserves the next free slot
+    and requests are spread evenly over the time left until the reset
+    instead of draining it in one burst. Secondary rate limits (and
+    exhausted budgets) block the installation's resource for ``Retry-After``
+    or until the reset, and the request is retried; waits longer than
+    ``max_wait_seconds`` are not retried.
+
+    Under ``GitHubClient`` a wait before a call's first request is raised as
+    ``RateLimitDeferred`` and awaited off the executor, so a throttled
+    installation does not hold the shared I/O threads while its calls
+    queue up; every other wait is slept in the calling thread with ``sleep``.
+    """
+
+    def __init__(
+        self, pace_fraction: float = 0.2, max_wait_seconds: float = 120.0, max_retries: int = 3,
+        secondary_backoff_seconds: float = 60.0, clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.pace_fraction = pace_fraction
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.secondary_backoff_seconds = secondary_backoff_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self._states: Dict[Tuple[Hashable, str], RateLimitState] = {}
+        self._lock = threading.Lock()
+        self.paced = 0
+        self.paced_seconds = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def state(self, installation_id: Hashable, resource: str = "core") -> RateLimitState:
+        with self._lock:
+            state = self._states.get((installation_id, resource))
+            if state is None:
+                state = self._states[installation_id, resource] = RateLimitState()
+            return state
+
+    def delay_for(self, installation_id: Hashable, resource: str = "core") -> float:
+        """Reserve one request and return how long to wait before sending it."""
+        now = self.clock()
+        with self._lock:
+            state = self._states.get((installation_id, resource))
+            if state is None:
+                return 0.0
+            start = max(now, state.blocked_until)
+            if state.remaining is not None and state.limit and now < state.reset_at:
+                if state.remaining <= self.pace_fraction * state.limit and start < state.reset_at:
+                    # Take the next free slot, so concurrent requests are spaced instead of sent together
+                    interval = (state.reset_at - start) / max(state.remaining, 1)
+                    state.next_allowed = max(state.next_allowed, start) + interval
+                    start = state.next_allowed
+                # Count the request now so concurrent threads see the lower budget
+                state.remaining = max(state.remaining - 1, 0)
+        return min(start - now, self.max_wait_seconds)
+
+    def before_request(self, installation_id: Hashable, resource: str = "core") -> None:
+        """Wait until the request may be sent, or raise ``RateLimitDeferred`` for the caller to wait."""
+        deferred = current_deferred_waits.get()
+        if deferred is not None and not deferred.sent and deferred.reserved == resource:
+            # The caller already waited for this request's slot
+            deferred.reserved = None
+            deferred.sent = True
+            return
+        delay = self.delay_for(installation_id, resource)
+        if delay > 0:
+            self.paced += 1
+            self.paced_seconds += delay
+            if deferred is not None and not deferred.sent:
+                raise RateLimitDeferred(delay, resource)
+            self.sleep(delay)
+        if deferred is not None:
+            deferred.sent = True
+
+    def after_response(
+        self, installation_id: Hashable, status: int, headers: Mapping[str, str], body: Any = b"",
+        resource: str = "core"
+    ) -> Optional[float]:
+        """
+        Record the budget from a response's headers, under the resource they name.
+
+        Returns the seconds to wait before retrying a rate-limited request,
+        or None when the response should be returned as is.
+        """
+        now = self.clock()
+        state = self.state(installation_id, headers.get("X-RateLimit-Resource") or resource)
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        with self._lock:
+            if remaining is not None:
+                state.remaining = remaining
+                state.limit = _int_header(headers, "X-RateLimit-Limit") or state.limit
+                state.reset_at = float(_int_header(headers, "X-RateLimit-Reset") or state.reset_at)
+
+            if status not in (403, 429):
+                return None
+            retry_after = _int_header(headers, "Retry-After")
+            if retry_after is not None:
+                wait = float(retry_after)
+            elif remaining == 0:
+                wait = max(0.0, state.reset_at - now)
+            elif b"secondary rate limit" in _body_bytes(body).lower():
+                wait = self.secondary_backoff_seconds
+            else:
+                # A plain permission error, or a limit without any hint of when it ends
+                return None
+            self.rate_limited += 1
+            state.blocked_until = max(state.blocked_until, now + wait)
+        if wait > self.max_wait_seconds:
+            return None
+        return wait
+
+    def call(self, installation_id: Hashable, send: Callable[[], Any], resource: str = "core") -> Any:
+        """Send a request through the limiter; ``send`` returns a ``requests.Response``."""
+        attempt = 0
+        while True:
+            self.before_request(installation_id, resource)
+            response = send()
+            wait = self.after_response(
+                installation_id, response.status_code, response.headers, response.content, resource
+            )
+            if wait is None or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            self.retries += 1
+            print(f"GitHub rate limit hit for installation {installation_id}, retrying in {wait:.0f}s")
+            # before_request waits until the installation is unblocked
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pacing and retry counters and the lowest remaining budget."""
+        with self._lock:
+            budgets = [state.remaining for state in self._states.values() if state.remaining is not None]
+        return {
+            "paced": self.paced,
+            "paced_seconds": self.paced_seconds,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "min_remaining": min(budgets) if budgets else None,
+        }
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def _body_bytes(body: Any) -> bytes:
+    if isinstance(body, str):
+        return body.encode("utf-8", "replace")
+    return body or b""
+
+
+def request_resource(url: str) -> str:
+    """The rate-limit resource a request URL counts against, before its response names it."""
+    path = url.split("?", 1)[0].rstrip("/")
+    return "graphql" if path.endswith("/graphql") else "core"
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, NamedTuple, Optional, Tuple
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# (installation, URL, Accept header): one URL can be served as JSON, raw or diff
+ResponseKey = Tuple[Optional[Hashable], str, str]
+
+
+class CachedResponse(NamedTuple):
+    """A validated 200 response with the validators to revalidate it."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    body: bytes
+    encoding: Optional[str]
+
+
+class ConditionalResponseCache:
+    """
+    Byte-bounded LRU of GitHub GET responses, revalidated with conditional requests.
+
+    Responses carrying an ETag or Last-Modified are stored per installation
+    and URL; the next request for them sends ``If-None-Match`` /
+    ``If-Modified-Since`` and a ``304 Not Modified``, which GitHub does not
+    count against the rate limit, is answered with the stored body.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[ResponseKey, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(installation_id: Optional[Hashable], url: str, headers: Mapping[str, str]) -> ResponseKey:
+        accept = next((value for name, value in headers.items() if name.lower() == "accept"), "")
+        return installation_id, url, accept
+
+    def conditional_headers(self, key: ResponseKey, headers: Dict[str, str]) -> Tuple[Dict[str, str], bool]:
+        """Return ``headers`` with validators added, and whether a cached response exists."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return headers, False
+            self._entries.move_to_end(key)
+            self.conditional_requests += 1
+        headers = dict(headers)
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers, True
+
+    def resolve(self, key: ResponseKey, response: requests.Response) -> requests.Response:
+        """Store a cacheable 200 response, or turn a 304 into the stored 200 response."""
+        if response.status_code == 304:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.not_modified += 1
+            if entry is None:
+                return response
+            return self._replay(entry, response)
+
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._store(key, CachedResponse(
+                    etag, last_modified, dict(response.headers), response.content, response.encoding
+                ))
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Return revalidation counters and the cache's size."""
+        return {
+            "conditional_requests": self.conditional_requests,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+    def _store(self, key: ResponseKey, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = entry
+            self._size += len(entry.body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+                self.evictions += 1
+
+    @staticmethod
+    def _replay(entry: CachedResponse, not_modified: requests.Response) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        # Rate-limit and date headers of the 304 are fresher than the stored ones
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.headers.update(not_modified.headers)
+        response._content = entry.body
+        response.encoding = entry.encoding
+        response.url = not_modified.url
+        response.request = not_modified.request
+        return response
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import requests
+from urllib3.util.retry import Retry
+from github.Requester import Requester, RequestsResponse
+from github_app.handlers.github_rate_limiter import GitHubRateLimiter, current_installation, request_resource
+from github_app.handlers.github_response_cache import ConditionalResponseCache
+from github_app.monitoring.metrics import GITHUB_REQUESTS_IN_FLIGHT, github_endpoint, observe_github_request
+from github_app.monitoring.tracing import tracer
+
+# Only connection failures are retried by urllib3: rate-limit responses (403/429) and their
+# Retry-After are left to the rate limiter, which knows the installation's budget
+TRANSPORT_RETRY = Retry(total=2, connect=2, read=0, status=0, redirect=0, backoff_factor=0.5, raise_on_status=False)
+
+
+class SharedSessionHTTPSConnection:
+    """
+    Thread-safe connection object handed to PyGithub's Requester.
+
+    PyGithub stores the pending request on the connection object between
+    ``request`` and ``getresponse``, so a Github client used from several
+    threads would mix up requests. Pending requests are kept thread-local
+    here, and one keep-alive ``requests.Session`` is shared per host so
+    connections are reused across clients, tokens and threads. Requests go
+    through ``rate_limiter``, when one is installed, under the installation
+    the calling context is working for, and GET responses are revalidated
+    against ``response_cache`` when one is installed.
+
+    The shared session's connection pool and retry policy are the
+    transport's own (``pool_size`` and ``TRANSPORT_RETRY``); the values each
+    Requester passes in are ignored, so whichever client connects first
+    cannot size the pool for everyone.
+    """
+
+    protocol = "https"
+    default_port = 443
+
+    _sessions: Dict[Tuple[str, str, int], requests.Session] = {}
+    _sessions_lock = threading.Lock()
+    rate_limiter: Optional[GitHubRateLimiter] = None
+    response_cache: Optional[ConditionalResponseCache] = None
+    pool_size: int = requests.adapters.DEFAULT_POOLSIZE
+
+    def __init__(
+        self,
+        host: str,
+        port: Optional[int] = None,
+        strict: bool = False,
+        timeout: Optional[int] = None,
+        retry: Any = None,
+        pool_size: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.session = self._shared_session()
+        self._pending = threading.local()
+
+    def _shared_session(self) -> requests.Session:
+        key = (self.protocol, self.host, self.port)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.auth = Requester.noopAuth
+                adapter = requests.adapters.HTTPAdapter(
+                    max_retries=TRANSPORT_RETRY,
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                )
+                session.mount(f"{self.protocol}://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def request(self, verb: str, url: str, input: Any, headers: Dict[str, str]) -> None:
+        self._pending.request = (verb, url, input, headers)
+
+    def getresponse(self) -> RequestsResponse:
+        verb, url, input, headers = self._pending.request
+        installation_id = current_installation.get()
+        response_cache = SharedSessionHTTPSConnection.response_cache
+        cache_key = None
+        conditional = False
+        if response_cache is not None and verb == "GET":
+            cache_key = response_cache.key(installation_id, f"{self.host}:{self.port}{url}", headers)
+            headers, conditional = response_cache.conditional_headers(cache_key, headers)
+
+        def send() -> requests.Response:
+            status: Any = "error"
+            started = time.perf_counter()
+            GITHUB_REQUESTS_IN_FLIGHT.inc()
+            # One client span per attempt, so rate-limit retries show up in the trace
+            with tracer.span(
+                f"{verb} {github_endpoint(url)}", "client", url=url.split("?", 1)[0], conditional=conditional
+            ) as span:
+                try:
+                    response = self.session.request(
+                        verb,
+                        f"{self.protocol}://{self.host}:{self.port}{url}",
+                        headers=headers,
+                        data=input,
+                        timeout=self.timeout,
+                        verify=self.verify,
+                        allow_redirects=False,
+                    )
+                    status = response.status_code
+                    span.set("status_code", status)
+                    # 304: served from the response cache
+                    span.set("cache_hit", status == 304)
+                    return response
+                finally:
+                    GITHUB_REQUESTS_IN_FLIGHT.dec()
+                    observe_github_request(verb, url, status, time.perf_counter() - started)
+
+        rate_limiter = SharedSessionHTTPSConnection.rate_limiter
+        if rate_limiter is None:
+            response = send()
+        else:
+            response = rate_limiter.call(installation_id, send, request_resource(url))
+        if cache_key is not None:
+            response = response_cache.resolve(cache_key, response)
+        return RequestsResponse(response)
+
+    def close(self) -> None:
+        # The session is shared and outlives the Requester's connection objects.
+        pass
+
+    @classmethod
+    def close_sessions(cls) -> None:
+        """Close every shared session."""
+        with cls._sessions_lock:
+            sessions = list(cls._sessions.values())
+            cls._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+class SharedSessionHTTPConnection(SharedSessionHTTPSConnection):
+    """Plain-HTTP variant, used for GitHub Enterprise proxies and local test servers."""
+
+    protocol = "http"
+    default_port = 80
+
+
+def install_transport(
+    rate_limiter: Optional[GitHubRateLimiter] = None, response_cache: Optional[ConditionalResponseCache] = None,
+    pool_size: Optional[int] = None
+) -> None:
+    """
+    Make every Github client created afterwards use the shared-session transport.
+
+    ``pool_size`` is the number of keep-alive connections kept per host; it
+    should cover every thread that may call GitHub at once.
+    """
+    if pool_size is not None:
+        SharedSessionHTTPSConnection.pool_size = pool_size
+    if rate_limiter is not None:
+        SharedSessionHTTPSConnection.rate_limiter = rate_limiter
+    if response_cache is not None:
+        SharedSessionHTTPSConnection.response_cache = response_cache
+    Requester.injectConnectionClasses(SharedSessionHTTPConnection, SharedSessionHTTPSConnection)
+
+
+def close_transport() -> None:
+    """Close shared sessions and restore PyGithub's default connection classes."""
+    SharedSessionHTTPSConnection.close_sessions()
+    SharedSessionHTTPSConnection.rate_limiter = None
+    SharedSessionHTTPSConnection.response_cache = None
+    SharedSessionHTTPSConnection.pool_size = requests.adapters.DEFAULT_POOLSIZE
+    Requester.resetConnectionClasses()
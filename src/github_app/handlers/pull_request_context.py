@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ChangedFile:
+    """Metadata of one file changed in a pull request, as listed by GitHub."""
+
+    filename: str
+    sha: Optional[str] = None  # blob SHA of the head revision
+    status: str = "modified"
+    patch: Optional[str] = None
+    additions: int = 0
+    deletions: int = 0
+    previous_filename: Optional[str] = None
+
+    @classmethod
+    def from_github_file(cls, file: Any) -> "ChangedFile":
+        """Build from a PyGithub ``File`` returned by ``pull_request.get_files()``."""
+        return cls(
+            filename=file.filename,
+            sha=file.sha,
+            status=file.status,
+            patch=file.patch,
+            additions=file.additions,
+            deletions=file.deletions,
+            previous_filename=file.previous_filename,
+        )
+
+
+@dataclass(slots=True)
+class PullRequestEvent:
+    """The fields of a ``pull_request`` webhook payload the service acts on; the rest is dropped."""
+
+    action: Optional[str] = None
+    installation_id: Optional[int] = None
+    owner: Optional[str] = None
+    repo: Optional[str] = None
+    pr_number: Optional[int] = None
+    head_sha: Optional[str] = None
+    base_sha: Optional[str] = None
+    before: Optional[str] = None  # previous head, on ``synchronize``
+    base_changed: bool = False  # an ``edited`` event that retargeted the base branch
+    changed_files: Optional[int] = None
+    repository: Optional[Dict[str, Any]] = None  # raw repository object, when complete enough to reuse
+
+    @classmethod
+    def from_payload(cls, event_data: Dict[str, Any]) -> "PullRequestEvent":
+        """Pick the used fields out of a decoded ``pull_request`` webhook payload."""
+        repository = event_data.get("repository") or {}
+        pull_request = event_data.get("pull_request") or {}
+        return cls(
+            action=event_data.get("action"),
+            installation_id=(event_data.get("installation") or {}).get("id"),
+            owner=(repository.get("owner") or {}).get("login"),
+            repo=repository.get("name"),
+            pr_number=pull_request.get("number"),
+            head_sha=(pull_request.get("head") or {}).get("sha"),
+            base_sha=(pull_request.get("base") or {}).get("sha"),
+            before=event_data.get("before"),
+            base_changed="base" in (event_data.get("changes") or {}),
+            changed_files=pull_request.get("changed_files"),
+            repository=repository if repository.get("url") else None,
+        )
+
+
+@dataclass
+class PullRequestContext:
+    """
+    Everything about one pull request event that would otherwise be re-resolved per call.
+
+    Built from the webhook payload; ``GitHubClient.resolve_context`` only asks
+    the API for what the payload did not carry.
+    """
+
+    installation_id: int
+    owner: str
+    repo: str
+    pr_number: int
+    head_sha: Optional[str] = None
+    base_sha: Optional[str] = None
+    repository_data: Optional[Dict[str, Any]] = None  # raw repository object from the payload
+    changed_files_count: Optional[int] = None  # all changed files, Python or not, per the payload
+    repository: Any = None  # resolved PyGithub Repository handle
+    files: List[ChangedFile] = field(default_factory=list)
+    incomplete: bool = False  # a listing or fetch failed, so results are partial and must not be reused
+    _file_index: Dict[str, ChangedFile] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _indexed_files: Optional[List[ChangedFile]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    @property
+    def repository_size_kb(self) -> Optional[int]:
+        """Repository size in KB as reported by the webhook payload."""
+        return (self.repository_data or {}).get("size")
+
+    def ref_sha(self, ref_type: str) -> Optional[str]:
+        """Return the commit SHA for ``"head"`` or ``"base"``. Default to head."""
+        return self.head_sha if ref_type == "head" else self.base_sha
+
+    def changed_file(self, path: str) -> Optional[ChangedFile]:
+        """Return the listed metadata for ``path``, if any."""
+        if self._indexed_files is not self.files or len(self._file_index) != len(self.files):
+            self._file_index = {file.filename: file for file in self.files}
+            self._indexed_files = self.files
+        return self._file_index.get(path)
+
+    @classmethod
+    def from_event(cls, event: PullRequestEvent) -> "PullRequestContext":
+        """Build a context from a parsed ``pull_request`` event."""
+        return cls(
+            installation_id=event.installation_id,
+            owner=event.owner,
+            repo=event.repo,
+            pr_number=event.pr_number,
+            head_sha=event.head_sha,
+            base_sha=event.base_sha,
+            repository_data=event.repository,
+            changed_files_count=event.changed_files,
+        )
+
+    @classmethod
+    def from_payload(cls, event_data: Dict[str, Any]) -> "PullRequestContext":
+        """Build a context from a ``pull_request`` webhook payload."""
+        return cls.from_event(PullRequestEvent.from_payload(event_data))
@@ -1,35 +1,127 @@
-from fastapi import Request, HTTPException
-from typing import Dict, Any
+import asyncio
+import time
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from typing import Awaitable, Callable, Dict, Any, Optional, Set, Tuple, Union
+from github_app.configure.config import config
+from github_app.handlers.pull_request_context import PullRequestEvent
+from github_app.handlers.webhook_payload import decode_json, read_body
+from github_app.monitoring.metrics import time_stage
+from github_app.monitoring.tracing import Span, tracer
+from github_app.security.delivery_store import DeliveryStore, create_delivery_store
 from github_app.security.webhook_security import WebhookSecurity
+from github_app.services.job_queue import JobQueue
+from github_app.services.pull_request_scheduler import PullRequestScheduler
 from github_app.services.pull_request_service import PullRequestService
 
 
 class PullRequestEventHandler:
-    """Entrypoint for handling opened pull request webhook events"""
+    """Entrypoint for handling pull request webhook events"""
 
-    def __init__(self, service: PullRequestService):
+    def __init__(
+        self,
+        service: PullRequestService,
+        job_queue: Optional[JobQueue] = None,
+        delivery_store: Optional[DeliveryStore] = None,
+        scheduler: Optional[PullRequestScheduler] = None
+    ):
         self.service = service
+        self.job_queue = job_queue or JobQueue(config.JOB_WORKERS, config.JOB_QUEUE_MAX_SIZE)
+        self.delivery_store = delivery_store or create_delivery_store()
+        self.scheduler = scheduler or PullRequestScheduler(self.job_queue, config.PR_DEBOUNCE_SECONDS)
+        # PRs whose ``opened`` processing (and comment) has not run yet; later events take it over
+        self._unopened: Set[Tuple[str, int]] = set()
 
     async def handle_pull_request_event(
         self,
         request: Request,
         x_github_event: str,
-        x_hub_signature_256: str
-    ) -> Dict[str, Any]:
+        x_hub_signature_256: str,
+        x_github_delivery: Optional[str] = None
+    ) -> Union[Dict[str, Any], JSONResponse]:
+
+        received_ns = time.time_ns()
+        # The signature is checked over the same buffer that is then decoded, once
+        body = await read_body(request, config.WEBHOOK_MAX_PAYLOAD_BYTES)
+        with time_stage("signature_verification"):
+            WebhookSecurity.verify_signature(body, x_hub_signature_256)
+
+        # Redeliveries (timeouts, manual retries) carry the same delivery ID
+        if x_github_delivery:
+            if not await self.delivery_store.add_if_absent(x_github_delivery, config.DELIVERY_TTL_SECONDS):
+                return {"message": f"Delivery {x_github_delivery} already received"}
+            try:
+                return await self._dispatch_event(body, x_github_event, x_github_delivery, received_ns)
+            except Exception:
+                # Not accepted; let GitHub's redelivery through
+                await self.delivery_store.discard(x_github_delivery)
+                raise
 
-        body = await request.body()
-        WebhookSecurity.verify_signature(body, x_hub_signature_256)
+        return await self._dispatch_event(body, x_github_event, x_github_delivery, received_ns)
 
+    async def _dispatch_event(
+        self, body: bytes, x_github_event: str, delivery_id: Optional[str], received_ns: int
+    ) -> Union[Dict[str, Any], JSONResponse]:
         if x_github_event != "pull_request":
             return {"message": f"Event {x_github_event} not handled by this endpoint"}
-        try:
-            event_data = await request.json()
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        event = PullRequestEvent.from_payload(decode_json(body))
 
-        action = event_data.get("action")
-        if action == "opened":
-            # delegate to service layer
-            return await self.service.process_opened(event_data)
+        action = event.action
+        if action == "edited" and not event.base_changed:
+            # Title or description edits do not change the code
+            return {"message": f"Pull request {action} event received but not processed"}
+
+        if action in ("opened", "synchronize", "reopened", "edited"):
+            context = self.service.build_context(event)
+            key = (context.full_name, context.pr_number)
+            if action == "opened":
+                self._unopened.add(key)
+            # A push superseding a pending ``opened`` must still post its comment
+            name = "process_opened" if key in self._unopened else "process_updated"
+            process = getattr(self.service, name)
+            trace = tracer.start_trace(
+                f"pull_request {action}", context.full_name, delivery_id, start_ns=received_ns,
+                pr_number=context.pr_number, head_sha=context.head_sha, payload_bytes=len(body),
+            )
+            try:
+                # Processing outlives GitHub's 10s delivery timeout; run it in the background.
+                # Newer pushes or base changes to the same PR supersede this one.
+                # The delivery's trace lasts until its job has run or was superseded.
+                self.scheduler.submit(
+                    key,
+                    (context.head_sha, context.base_sha, name),
+                    f"{context.full_name}#{context.pr_number} {action}",
+                    lambda: self._process(key, name, process, event, trace),
+                    on_done=lambda: tracer.end(trace),
+                )
+            except Exception as e:
+                if trace is not None:
+                    trace.error = f"{type(e).__name__}: {e}"
+                tracer.end(trace)
+                raise
+            return JSONResponse(
+                status_code=202,
+                content={"message": f"Pull request {action} event queued for processing"},
+            )
 
         return {"message": f"Pull request {action} event received but not processed"}
+
+    async def _process(
+        self, key: Tuple[str, int], name: str, process: Callable[[PullRequestEvent], Awaitable[Any]],
+        event: PullRequestEvent, trace: Optional[Span]
+    ) -> Any:
+        # Jobs run on queue workers, outside the request's context; attach them to the delivery's trace
+        with tracer.span(name, parent=trace):
+            try:
+                return await process(event)
+            finally:
+                # Cancelled (superseded) jobs leave the comment to the job that superseded them
+                if name == "process_opened" and not asyncio.current_task().cancelling():
+                    self._unopened.discard(key)
+
+    async def shutdown(self) -> None:
+        """Finish debounced and queued jobs before the process exits."""
+        self.scheduler.flush()
+        await self.job_queue.drain(config.JOB_DRAIN_TIMEOUT_SECONDS)
+        await self.delivery_store.close()
+        self.service.close()
@@ -0,0 +1,38 @@
+import json
+from fastapi import Request, HTTPException
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library parser is used without it
+    orjson = None
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Read the request body once, rejecting it with 413 as soon as it exceeds ``max_bytes``.
+
+    A declared Content-Length over the limit is refused before anything is read;
+    otherwise the stream is cut off at the first chunk that crosses it.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Payload too large")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="Payload too large")
+    return bytes(body)
+
+
+def decode_json(body: bytes) -> Dict[str, Any]:
+    """Decode a JSON object payload with orjson when installed, or json otherwise."""
+    try:
+        data = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError:  # orjson.JSONDecodeError and json.JSONDecodeError both subclass it
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    return data
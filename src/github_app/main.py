@@ -1,8 +1,30 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from fastapi import FastAPI
-from github_app.controllers.pull_request_controller import PullRequestController
+from github_app.routes.metrics_routes import MetricsRoutes
+from github_app.routes.pull_request_routes import PullRequestRoutes
 
 """ entrypoint for the GitHub App."""
-app = FastAPI()
-pr_controller = PullRequestController()
-app.include_router(pr_controller.router)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Built per worker process on startup rather than at import, and only once
+    from github_app.container import AppContainer
+
+    container = AppContainer()
+    app.state.container = container
+    try:
+        yield
+    finally:
+        await container.close()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(PullRequestRoutes().router)
+    app.include_router(MetricsRoutes().router)
+    return app
+
+
+app = create_app()
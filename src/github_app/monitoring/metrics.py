@@ -0,0 +1,321 @@
+import abc
+import bisect
+import functools
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# From fast GitHub calls (tens of ms) to whole-PR analyses (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """A metric family; each distinct label tuple gets its own child, created on first use."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        """Create the child holding one label tuple's value."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. of GitHub calls by endpoint and status."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. work in flight."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    # Unlabelled gauges are updated directly
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. stage durations in seconds."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(upper_bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, rendered in the Prometheus text format.
+
+    Besides its own metrics, the registry renders the ``stats()`` of
+    registered components at scrape time, so their counters cost nothing
+    extra on the hot path.
+    """
+
+    def __init__(self, namespace: str = "docs_sync"):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Mapping[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(f"{self.namespace}_{name}", documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(f"{self.namespace}_{name}", documentation, label_names))
+
+    def histogram(
+        self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(f"{self.namespace}_{name}", documentation, label_names, buckets))
+
+    def register_collector(self, component: str, stats: Callable[[], Mapping[str, Any]]) -> None:
+        """Export the numeric values of ``stats()`` as ``<namespace>_<component>_<key>``, replacing any previous one."""
+        with self._lock:
+            self._collectors[component] = stats
+
+    def unregister_collector(self, component: str) -> None:
+        with self._lock:
+            self._collectors.pop(component, None)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for component, stats in collectors:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Error collecting {component} metrics: {str(e)}")
+                continue
+            for key, value in values.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{component}_{key}"
+                lines.append(f"# TYPE {name} untyped")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "stage_duration_seconds", "Time spent in each pipeline stage.", ["stage"]
+)
+STAGE_IN_FLIGHT = registry.gauge("stage_in_flight", "Pipeline stage calls currently running.", ["stage"])
+STAGE_ERRORS = registry.counter("stage_errors_total", "Pipeline stage calls that raised.", ["stage"])
+GITHUB_REQUESTS = registry.counter(
+    "github_requests_total", "HTTP requests sent to GitHub, by endpoint and response status.",
+    ["method", "endpoint", "status"]
+)
+GITHUB_REQUEST_DURATION = registry.histogram(
+    "github_request_duration_seconds", "GitHub HTTP request latency, by endpoint.", ["method", "endpoint"]
+)
+GITHUB_REQUESTS_IN_FLIGHT = registry.gauge("github_requests_in_flight", "GitHub HTTP requests awaiting a response.")
+
+
+@functools.lru_cache(maxsize=None)
+def _stage_metrics(stage: str) -> Tuple[_HistogramChild, _GaugeChild, _CounterChild]:
+    # Stages are a small fixed set; resolving their children once keeps label lookups off the hot path
+    return STAGE_DURATION.labels(stage), STAGE_IN_FLIGHT.labels(stage), STAGE_ERRORS.labels(stage)
+
+
+class time_stage:
+    """
+    Time a pipeline stage: ``with time_stage("parse"): ...``.
+
+    Records the duration, keeps the stage's in-flight gauge up to date and
+    counts calls that raise. Works around ``await`` as well.
+    """
+
+    __slots__ = ("duration", "in_flight", "errors", "started")
+
+    def __init__(self, stage: str):
+        self.duration, self.in_flight, self.errors = _stage_metrics(stage)
+        self.started = 0.0
+
+    def __enter__(self) -> "time_stage":
+        self.in_flight.inc()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.duration.observe(time.perf_counter() - self.started)
+        self.in_flight.dec()
+        if exc_type is not None:
+            self.errors.inc()
+
+
+_REF_SEGMENTS = {"contents": "{path}", "tarball": "{ref}", "zipball": "{ref}", "compare": "{basehead}"}
+_VARIABLE_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{40})$")
+
+
+def github_endpoint(url: str) -> str:
+    """
+    Collapse a GitHub API path into a low-cardinality endpoint label.
+
+    ``/repos/octo/app/pulls/12/files?page=2`` becomes
+    ``/repos/{owner}/{repo}/pulls/{id}/files``; file paths and refs after
+    ``contents``, ``tarball`` and ``compare`` are dropped.
+    """
+    # Query strings (page numbers, refs) are dropped before the cache, so pages of a listing share an entry
+    return _github_endpoint(url.split("?", 1)[0])
+
+
+@functools.lru_cache(maxsize=4096)
+def _github_endpoint(path: str) -> str:
+    segments = path.split("/")
+    if len(segments) > 3 and segments[1] == "repos":
+        segments[2:4] = ["{owner}", "{repo}"]
+    for i, segment in enumerate(segments):
+        if segment in _REF_SEGMENTS and i + 1 < len(segments):
+            return "/".join(segments[:i + 1] + [_REF_SEGMENTS[segment]])
+        if _VARIABLE_SEGMENT.match(segment):
+            segments[i] = "{sha}" if len(segment) == 40 else "{id}"
+    return "/".join(segments)
+
+
+def observe_github_request(method: str, url: str, status: Any, seconds: float) -> None:
+    """Count one GitHub HTTP request; ``status`` is the response code, or ``"error"`` when none came back."""
+    endpoint = github_endpoint(url)
+    GITHUB_REQUESTS.labels(method, endpoint, status).inc()
+    GITHUB_REQUEST_DURATION.labels(method, endpoint).observe(seconds)
@@ -0,0 +1,371 @@
+import abc
+import contextvars
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+import requests
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_UUID = re.compile(r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$")
+
+
+def _random_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed operation of a trace; times are Unix epoch nanoseconds."""
+
+    trace_id: str
+    span_id: str
+    name: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"  # "internal", "server" or "client"
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat representation written to the JSONL export."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6 if self.end_ns is not None else None,
+            "status": "error" if self.error is not None else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span outside any sampled trace, so call sites need no checks."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Makes a span current for the ``with`` block and ends it on exit."""
+
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.end(self.span)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Record attributes on the current span, if this code runs inside a trace."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+class SpanExporter(abc.ABC):
+    """Destination of finished spans; called off the request path, from the tracer's export thread."""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Send one batch of finished spans."""
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Posts spans to an OpenTelemetry collector's OTLP/HTTP endpoint, JSON-encoded."""
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, service_name: str = "docs-sync", timeout: float = 10.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}  # int64 is a string in OTLP JSON
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build an ``ExportTraceServiceRequest`` in the OTLP JSON mapping."""
+        encoded = []
+        for span in spans:
+            item = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": self.KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error is not None else {"code": 1},
+            }
+            if span.parent_id is not None:
+                item["parentSpanId"] = span.parent_id
+            encoded.append(item)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "github_app"}, "spans": encoded}],
+        }]}
+
+    def export(self, spans: List[Span]) -> None:
+        response = self.session.post(self.endpoint, json=self.encode(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def create_span_exporter(kind: str, jsonl_path: str, otlp_endpoint: str) -> Optional[SpanExporter]:
+    """Build the configured exporter: ``"jsonl"``, ``"otlp"``, or None when tracing is off."""
+    if not kind:
+        return None
+    if kind == "jsonl":
+        return JsonlSpanExporter(jsonl_path)
+    if kind == "otlp":
+        return OtlpHttpSpanExporter(otlp_endpoint)
+    raise ValueError(f"Unknown TRACING_EXPORTER {kind!r}; expected 'jsonl' or 'otlp'")
+
+
+class Tracer:
+    """
+    Per-delivery traces of the repositories tracing is enabled for.
+
+    ``start_trace`` opens the root span of one webhook delivery; spans opened
+    with ``span`` under it (also in executor threads, which inherit context
+    variables) nest below it. Outside a trace ``span`` is a no-op, so
+    instrumented code costs a context variable lookup for untraced
+    repositories. Finished spans are exported in batches by a background
+    thread.
+
+    Tracing is switched per repository at runtime with ``enable``/``disable``
+    or through ``repositories_file``, which is re-read when it changes.
+    """
+
+    def __init__(
+        self, exporter: Optional[SpanExporter] = None, repositories: Iterable[str] = (),
+        repositories_file: Optional[str] = None, reload_seconds: float = 5.0, max_batch: int = 512
+    ):
+        self.exporter: Optional[SpanExporter] = None
+        self.repositories: Set[str] = set()
+        self.repositories_file: Optional[str] = None
+        self.reload_seconds = 5.0
+        self.max_batch = max_batch
+        self._file_mtime: Optional[float] = None
+        self._next_reload = 0.0
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.configure(exporter, repositories, repositories_file, reload_seconds)
+
+    def configure(
+        self, exporter: Optional[SpanExporter], repositories: Iterable[str] = (),
+        repositories_file: Optional[str] = None, reload_seconds: Optional[float] = None
+    ) -> None:
+        """Set the exporter and the traced repositories; existing traces keep running."""
+        self.exporter = exporter
+        if reload_seconds is not None:
+            self.reload_seconds = reload_seconds
+        self.repositories = {repository.strip() for repository in repositories if repository.strip()}
+        self.repositories_file = repositories_file
+        self._file_mtime = None
+        self._next_reload = 0.0
+
+    def enable(self, repository: str) -> None:
+        with self._lock:
+            self.repositories.add(repository)
+
+    def disable(self, repository: str) -> None:
+        with self._lock:
+            self.repositories.discard(repository)
+
+    def enabled_for(self, repository: str) -> bool:
+        if self.exporter is None:
+            return False
+        if self.repositories_file is not None and time.monotonic() >= self._next_reload:
+            self._reload_repositories()
+        repositories = self.repositories
+        return "*" in repositories or repository in repositories
+
+    def _reload_repositories(self) -> None:
+        with self._lock:
+            self._next_reload = time.monotonic() + self.reload_seconds
+            try:
+                mtime = os.stat(self.repositories_file).st_mtime
+            except OSError:
+                return
+            if mtime == self._file_mtime:
+                return
+            try:
+                with open(self.repositories_file, encoding="utf-8") as file:
+                    lines = [line.split("#", 1)[0].strip() for line in file]
+            except OSError as e:
+                print(f"Error reading {self.repositories_file}: {str(e)}")
+                return
+            self._file_mtime = mtime
+            self.repositories = {line for line in lines if line}
+
+    def start_trace(
+        self, name: str, repository: str, delivery_id: Optional[str] = None, start_ns: Optional[int] = None,
+        **attributes: Any
+    ) -> Optional[Span]:
+        """
+        Open the root span of a delivery, or return None when ``repository`` is not traced.
+
+        GitHub delivery IDs are UUIDs, so they double as the trace ID and a
+        delivery can be looked up in the exported spans by its ID.
+        """
+        if not self.enabled_for(repository):
+            return None
+        trace_id = delivery_id.replace("-", "").lower() if delivery_id and _UUID.match(delivery_id.lower()) else None
+        attributes.update(repository=repository, delivery_id=delivery_id)
+        return Span(
+            trace_id=trace_id or _random_id(16), span_id=_random_id(8), name=name, kind="server",
+            start_ns=start_ns or time.time_ns(), attributes=attributes,
+        )
+
+    def activate(self, span: Optional[Span]) -> Any:
+        """Context manager making a root span from ``start_trace`` current and ending it on exit."""
+        return NOOP_SPAN if span is None else _ActiveSpan(self, span)
+
+    def span(self, name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Any:
+        """Context manager timing a child of ``parent`` (default: the current span); a no-op outside a trace."""
+        parent = parent or _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        return _ActiveSpan(self, Span(
+            trace_id=parent.trace_id, span_id=_random_id(8), name=name, parent_id=parent.span_id, kind=kind,
+            start_ns=time.time_ns(), attributes=attributes,
+        ))
+
+    def end(self, span: Optional[Span]) -> None:
+        """Close ``span`` and queue it for export."""
+        if span is None or span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        if self.exporter is None:
+            return
+        with self._lock:
+            if self._thread is None:
+                # Each export thread drains its own queue, so a flush cannot stop a newer thread
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(
+                    target=self._export_loop, args=(self._queue,), name="span-exporter", daemon=True
+                )
+                self._thread.start()
+            self._queue.put(span)
+
+    def _export_loop(self, spans: "queue.SimpleQueue[Optional[Span]]") -> None:
+        while True:
+            span = spans.get()
+            if span is None:
+                return
+            batch = [span]
+            try:
+                while len(batch) < self.max_batch:
+                    span = spans.get(timeout=0.5)
+                    if span is None:
+                        self._export(batch)
+                        return
+                    batch.append(span)
+            except queue.Empty:
+                pass
+            self._export(batch)
+
+    def _export(self, batch: List[Span]) -> None:
+        exporter = self.exporter
+        if exporter is None:
+            self.dropped += len(batch)
+            return
+        try:
+            exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"Error exporting {len(batch)} spans: {str(e)}")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Export every queued span and stop the export thread; it restarts on the next span."""
+        with self._lock:
+            thread, spans = self._thread, self._queue
+            self._thread = None
+        if thread is None:
+            return
+        spans.put(None)
+        thread.join(timeout)
+
+    def shutdown(self) -> None:
+        """Flush queued spans, close the exporter and stop tracing."""
+        self.flush()
+        exporter, self.exporter = self.exporter, None
+        if exporter is not None:
+            exporter.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many spans were exported or dropped, and how many repositories are traced."""
+        return {"exported": self.exported, "dropped": self.dropped, "repositories": len(self.repositories)}
+
+
+tracer = Tracer()
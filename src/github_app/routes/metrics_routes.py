@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from github_app.monitoring.metrics import CONTENT_TYPE, registry
+
+
+class MetricsRoutes:
+
+    def __init__(self):
+        self.router = APIRouter(tags=["monitoring"])
+        self._setup_routes()
+
+    def _setup_routes(self):
+        @self.router.get("/metrics")
+        async def metrics():
+            # Per worker process; scrape each worker or run a single one behind the scraper
+            return Response(content=registry.render(), media_type=CONTENT_TYPE)
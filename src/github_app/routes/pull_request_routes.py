@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Request, Header
-from github_app.controllers.pull_request_controller import PullRequestController
+from typing import TYPE_CHECKING
+from fastapi import APIRouter, Depends, Request, Header
+
+if TYPE_CHECKING:
+    # Imported lazily by the app's lifespan, which keeps importing the routes cheap
+    from github_app.controllers.pull_request_controller import PullRequestController
+
+
+async def get_pull_request_controller(request: Request) -> "PullRequestController":
+    """The controller of the app's container, built when the app started; async so it skips the threadpool."""
+    return request.app.state.container.pull_request_controller
 
 
 class PullRequestRoutes:
 
     def __init__(self):
         self.router = APIRouter(prefix="/github/pr", tags=["pull-requests"])
-        self.controller = PullRequestController()
         self._setup_routes()
 
     def _setup_routes(self):
@@ -14,10 +22,13 @@ class PullRequestRoutes:
         async def handle_pull_request_webhook(
             request: Request,
             x_github_event: str = Header(None),
-            x_hub_signature_256: str = Header(None)
+            x_hub_signature_256: str = Header(None),
+            x_github_delivery: str = Header(None),
+            controller=Depends(get_pull_request_controller)
         ):
-            return await self.controller.handle_pull_request_webhook(
+            return await controller.handle_pull_request_webhook(
                 request,
                 x_github_event,
-                x_hub_signature_256
+                x_hub_signature_256,
+                x_github_delivery
             )
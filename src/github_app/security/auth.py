@@ -1,8 +1,12 @@
 from pathlib import Path
 from fastapi import HTTPException
-from github import GithubIntegration, Github # from PyGithub library for GitHub API interactions
+from github import Auth, GithubIntegration, Github # from PyGithub library for GitHub API interactions
 from github.GithubException import GithubException
 from github_app.configure.config import config
+from github_app.handlers.github_rate_limiter import RateLimitDeferred, current_installation
+from github_app.monitoring.metrics import time_stage
+from github_app.security.github_client_pool import GitHubClientPool
+from github_app.security.token_cache import InstallationTokenCache
 
 
 class GitHubAuth:
@@ -11,14 +15,25 @@ class GitHubAuth:
     def __init__(self):
         self._integration = None
         self._load_integration()
+        self.token_cache = InstallationTokenCache(
+            self._mint_installation_token,
+            refresh_margin_seconds=config.TOKEN_REFRESH_MARGIN_SECONDS,
+        )
+        self.client_pool = GitHubClientPool(
+            self._create_github_client,
+            max_size=config.GITHUB_CLIENT_POOL_SIZE,
+        )
 
     def _load_integration(self):
         """Load GitHub Integration with private key."""
         try:
             private_key = self.load_private_key()
+            # retry=None: rate-limited responses are left to the transport's rate limiter
             self._integration = GithubIntegration(
                 integration_id=config.GITHUB_APP_ID,
-                private_key=private_key
+                private_key=private_key,
+                base_url=config.GITHUB_API_BASE_URL,
+                retry=None,
             )
         except Exception as e:
             raise HTTPException(
@@ -45,10 +60,27 @@ class GitHubAuth:
             )
 
     def get_installation_access_token(self, installation_id: int) -> str:
-        """Get an installation access token for the GitHub App."""
+        """Get an installation access token for the GitHub App, reusing cached tokens."""
+        with time_stage("token_acquisition"):
+            return self.token_cache.get_token(installation_id)
+
+    def invalidate_installation_token(self, installation_id: int) -> None:
+        """Forget the cached token of an installation after GitHub rejected it; the next call mints a new one."""
+        self.token_cache.invalidate(installation_id)
+
+    def _mint_installation_token(self, installation_id: int):
+        """
+        Request a new installation access token from GitHub.
+
+        The request is made with the app's JWT, whose budget is not the
+        installation's, so it is rate-limited outside any installation.
+        """
+        app_request = current_installation.set(None)
         try:
-            access_token = self._integration.get_access_token(installation_id)
-            return access_token.token
+            return self._integration.get_access_token(installation_id)
+        except RateLimitDeferred:
+            # The caller waits for the request's slot and retries
+            raise
         except GithubException as e:
             raise HTTPException(
                 status_code=500,
@@ -59,14 +91,38 @@ class GitHubAuth:
                 status_code=500,
                 detail=f"Failed to get access token: {str(e)}"
             )
+        finally:
+            current_installation.reset(app_request)
+
+    @staticmethod
+    def _create_github_client(access_token: str) -> Github:
+        """
+        Build a Github client for a token; its HTTP session is reused across calls.
+
+        PyGithub's default retry policy would retry 403/429 responses itself,
+        so it is turned off and rate limits reach ``GitHubRateLimiter``.
+        """
+        return Github(
+            auth=Auth.Token(access_token),
+            base_url=config.GITHUB_API_BASE_URL,
+            per_page=config.GITHUB_PER_PAGE,
+            retry=None,
+            seconds_between_requests=config.GITHUB_SECONDS_BETWEEN_REQUESTS or None,
+        )
 
     def get_github_instance(self, installation_id: int) -> Github:
-        """Get a Github instance authenticated for the installation."""
+        """Get the pooled Github instance authenticated for the installation."""
         try:
             access_token = self.get_installation_access_token(installation_id)
-            return Github(access_token)
+            return self.client_pool.get(installation_id, access_token)
+        except RateLimitDeferred:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to create GitHub instance: {str(e)}"
             )
+
+    def close(self) -> None:
+        """Release pooled GitHub clients."""
+        self.client_pool.close()
@@ -0,0 +1,86 @@
+import abc
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from github_app.configure.config import config
+
+
+class DeliveryStore(abc.ABC):
+    """
+    Remembers webhook delivery IDs (X-GitHub-Delivery) so redeliveries are processed once.
+
+    Methods are coroutines because they run in the webhook handler, on the
+    event loop; network-backed stores must not block it.
+    """
+
+    @abc.abstractmethod
+    async def add_if_absent(self, delivery_id: str, ttl_seconds: float) -> bool:
+        """Record the delivery; return False if it was already recorded and has not expired."""
+
+    @abc.abstractmethod
+    async def discard(self, delivery_id: str) -> None:
+        """Forget a delivery, e.g. when it could not be queued and GitHub should retry it."""
+
+    async def close(self) -> None:
+        """Release the store's connections."""
+
+
+class InMemoryDeliveryStore(DeliveryStore):
+    """Bounded per-process TTL store; enough for a single worker process."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def add_if_absent(self, delivery_id: str, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            # Entries share one TTL, so insertion order is expiry order
+            while self._expiry and next(iter(self._expiry.values())) <= now:
+                self._expiry.popitem(last=False)
+
+            expires_at = self._expiry.get(delivery_id)
+            if expires_at is not None and expires_at > now:
+                return False
+
+            self._expiry[delivery_id] = now + ttl_seconds
+            self._expiry.move_to_end(delivery_id)
+            while len(self._expiry) > self.max_entries:
+                self._expiry.popitem(last=False)
+            return True
+
+    async def discard(self, delivery_id: str) -> None:
+        with self._lock:
+            self._expiry.pop(delivery_id, None)
+
+
+class RedisDeliveryStore(DeliveryStore):
+    """Store shared by every worker and replica, backed by a ``redis.asyncio`` compatible client."""
+
+    def __init__(self, client: Any, prefix: str = "docs-sync:delivery:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def add_if_absent(self, delivery_id: str, ttl_seconds: float) -> bool:
+        # SET NX EX is atomic, so concurrent redeliveries race safely
+        return bool(await self.client.set(self.prefix + delivery_id, 1, nx=True, ex=max(1, int(ttl_seconds))))
+
+    async def discard(self, delivery_id: str) -> None:
+        await self.client.delete(self.prefix + delivery_id)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_delivery_store(redis_url: Optional[str] = None) -> DeliveryStore:
+    """Build the configured store: Redis when a URL is set, in-memory otherwise."""
+    redis_url = redis_url or config.DELIVERY_STORE_REDIS_URL
+    if not redis_url:
+        return InMemoryDeliveryStore(config.DELIVERY_STORE_MAX_ENTRIES)
+    try:
+        import redis.asyncio
+    except ImportError:
+        raise RuntimeError("DELIVERY_STORE_REDIS_URL is set but the 'redis' package is not installed")
+    return RedisDeliveryStore(redis.asyncio.Redis.from_url(redis_url))
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+from github import Github
+
+
+class GitHubClientPool:
+    """Bounded LRU pool of authenticated Github clients, one per installation."""
+
+    def __init__(self, client_factory: Callable[[str], Github], max_size: int = 64):
+        self._client_factory = client_factory
+        self._max_size = max_size
+        self._clients: "OrderedDict[int, Tuple[str, Github]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, installation_id: int, token: str) -> Github:
+        """
+        Return the pooled client for the installation.
+
+        A new client is built when none exists or when the installation token
+        rotated; the retired client is closed so its HTTP session is released.
+        """
+        retired = []
+        with self._lock:
+            entry = self._clients.get(installation_id)
+            if entry is not None and entry[0] == token:
+                self._clients.move_to_end(installation_id)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            if entry is not None:
+                retired.append(entry[1])
+            client = self._client_factory(token)
+            self._clients[installation_id] = (token, client)
+            self._clients.move_to_end(installation_id)
+            while len(self._clients) > self._max_size:
+                _, (_, evicted) = self._clients.popitem(last=False)
+                retired.append(evicted)
+
+        for old_client in retired:
+            self._close(old_client)
+        return client
+
+    def close(self) -> None:
+        """Close every pooled client."""
+        with self._lock:
+            clients = [client for _, client in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            self._close(client)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of pooled clients."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._clients)}
+
+    @staticmethod
+    def _close(client: Github) -> None:
+        try:
+            client.close()
+        except Exception as e:
+            print(f"Error closing GitHub client: {str(e)}")
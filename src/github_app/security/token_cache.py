@@ -0,0 +1,68 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class InstallationTokenCache:
+    """Cache installation access tokens until shortly before they expire."""
+
+    def __init__(self, mint_token: Callable[[int], Any], refresh_margin_seconds: int = 300):
+        self._mint_token = mint_token
+        self._refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._tokens: Dict[int, Tuple[str, datetime]] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_token(self, installation_id: int) -> str:
+        """
+        Return a valid token for the installation, minting a new one when needed.
+
+        Only one refresh runs per installation; concurrent callers wait for it
+        and then reuse the freshly cached token.
+        """
+        token = self._lookup(installation_id)
+        if token is not None:
+            self.hits += 1
+            return token
+
+        with self._lock_for(installation_id):
+            # Another caller may have refreshed the token while we waited.
+            token = self._lookup(installation_id)
+            if token is not None:
+                self.hits += 1
+                return token
+
+            self.misses += 1
+            access_token = self._mint_token(installation_id)
+            expires_at = getattr(access_token, "expires_at", None)
+            if isinstance(expires_at, datetime):
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                self._tokens[installation_id] = (access_token.token, expires_at)
+            return access_token.token
+
+    def invalidate(self, installation_id: int) -> None:
+        """Drop the cached token, e.g. after GitHub rejected it."""
+        self._tokens.pop(installation_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of cached installations."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._tokens)}
+
+    def _lookup(self, installation_id: int) -> Optional[str]:
+        cached = self._tokens.get(installation_id)
+        if cached is None:
+            return None
+        token, expires_at = cached
+        if datetime.now(timezone.utc) + self._refresh_margin >= expires_at:
+            return None
+        return token
+
+    def _lock_for(self, installation_id: int) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(installation_id)
+            if lock is None:
+                lock = self._locks[installation_id] = threading.Lock()
+            return lock
@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Tuple
+from github_app.analysis.result_cache import AnalysisResult
+from github_app.analysis.symbol_diff import SymbolDiff
+from github_app.analysis.symbol_extractor import Symbol
+from github_app.handlers.pull_request_context import ChangedFile
+
+
+@dataclass
+class PullRequestAnalysis:
+    """Outcome of the last completed analysis of a pull request."""
+
+    head_sha: str
+    base_sha: str
+    files: List[ChangedFile] = field(default_factory=list)
+    # (head, base) blob SHA per path; the contents themselves live in the byte-capped blob cache
+    blobs: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    symbol_diffs: Dict[str, SymbolDiff] = field(default_factory=dict)  # keyed by path
+    reviews: Dict[str, List[Tuple[Symbol, AnalysisResult]]] = field(default_factory=dict)  # keyed by path
+
+
+class AnalysisStateStore:
+    """Bounded LRU of the last analysis per (repository, PR), used to re-analyse incrementally."""
+
+    def __init__(self, max_pull_requests: int = 1000):
+        self.max_pull_requests = max_pull_requests
+        self._analyses: "OrderedDict[Hashable, PullRequestAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[PullRequestAnalysis]:
+        with self._lock:
+            analysis = self._analyses.get(key)
+            if analysis is not None:
+                self._analyses.move_to_end(key)
+            return analysis
+
+    def save(self, key: Hashable, analysis: PullRequestAnalysis) -> None:
+        with self._lock:
+            self._analyses[key] = analysis
+            self._analyses.move_to_end(key)
+            while len(self._analyses) > self.max_pull_requests:
+                self._analyses.popitem(last=False)
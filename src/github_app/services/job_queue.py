@@ -0,0 +1,104 @@
+import asyncio
+import time
+from fastapi import HTTPException
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class JobQueue:
+    """In-process queue of webhook jobs, run by a fixed pool of worker tasks."""
+
+    def __init__(self, workers: int = 4, max_size: int = 1000):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._closing = False
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the worker tasks; called lazily on first enqueue."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)
+        ]
+
+    def enqueue(self, name: str, job: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Queue a job without waiting for it to run.
+
+        Raises 503 when the queue is full or shutting down, so GitHub
+        records a failed delivery that can be redelivered later.
+        """
+        self.ensure_capacity()
+        self.start()
+        try:
+            self._queue.put_nowait((name, job, time.monotonic()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Job queue is full")
+
+    def ensure_capacity(self, reserved: int = 0) -> None:
+        """Raise the 503 ``enqueue`` would raise if ``reserved`` jobs promised earlier were queued first."""
+        if self._closing:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Service is shutting down")
+        if self.max_size > 0 and self.depth + reserved >= self.max_size:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Job queue is full")
+
+    async def _worker(self) -> None:
+        while True:
+            name, job, enqueued_at = await self._queue.get()
+            wait_seconds = time.monotonic() - enqueued_at
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.in_flight += 1
+            try:
+                await job()
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Error processing job {name}: {str(e)}")
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting jobs, wait for queued and running ones, then stop the workers."""
+        self._closing = True
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Job queue drain timed out with {self._queue.qsize()} jobs queued and {self.in_flight} running")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throughput counters and wait-time metrics."""
+        started = self.processed + self.failed + self.in_flight
+        return {
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_seconds / started if started else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
@@ -0,0 +1,164 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from github_app.services.job_queue import JobQueue
+
+
+class PullRequestScheduler:
+    """
+    Schedules pull request analyses so only the latest revision of each PR is worked on.
+
+    A revision is whatever identifies the work to do, e.g. the head SHA,
+    base SHA and handler of an event. Events for one (repository, PR) key
+    are debounced; a different revision cancels in-flight work for the
+    previous one, and jobs still queued for a superseded revision are
+    dropped when they reach a worker.
+    """
+
+    def __init__(self, job_queue: JobQueue, debounce_seconds: float = 0.0):
+        self.job_queue = job_queue
+        self.debounce_seconds = debounce_seconds
+        self._latest: Dict[Hashable, Hashable] = {}
+        # Debounced jobs: timer, enqueue callback and the job's ``on_done``
+        self._timers: Dict[Hashable, Tuple[asyncio.Task, Callable[[], None], Callable[[], None]]] = {}
+        self._running: Dict[Hashable, Tuple[Hashable, asyncio.Task]] = {}
+        self.coalesced = 0
+        self.cancelled = 0
+        self.dropped = 0
+
+    def submit(
+        self, key: Hashable, revision: Hashable, name: str, work: Callable[[], Awaitable[Any]],
+        on_done: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Schedule ``work`` for ``key`` at ``revision``, superseding older revisions.
+
+        Raises the job queue's 503 when the job cannot be queued. Debounced
+        jobs are queued only after the webhook was answered, so their queue
+        slot is checked here, while GitHub can still redeliver the event.
+        Once ``submit`` returns, ``on_done`` is called exactly once, when the
+        job has run, been cancelled, or been coalesced or dropped without
+        running.
+        """
+        if self.debounce_seconds > 0 and key not in self._timers:
+            self.job_queue.ensure_capacity(reserved=len(self._timers))
+        done = on_done or _nothing
+
+        def enqueue() -> None:
+            self._enqueue(key, revision, name, work, done)
+
+        previous = self._latest.get(key)
+        self._latest[key] = revision
+        if self.debounce_seconds <= 0:
+            try:
+                enqueue()
+            except Exception:
+                # Nothing supersedes the previous revision after all
+                if previous is None:
+                    self._latest.pop(key, None)
+                else:
+                    self._latest[key] = previous
+                raise
+
+        running = self._running.get(key)
+        if running is not None and running[0] != revision and not running[1].done():
+            running[1].cancel()
+            self.cancelled += 1
+
+        pending = self._timers.pop(key, None)
+        if pending is not None:
+            pending[0].cancel()
+            self.coalesced += 1
+            pending[2]()
+
+        if self.debounce_seconds > 0:
+            timer = asyncio.create_task(self._enqueue_after_debounce(key, name, enqueue, done))
+            self._timers[key] = (timer, enqueue, done)
+
+    def _enqueue(
+        self, key: Hashable, revision: Hashable, name: str, work: Callable[[], Awaitable[Any]],
+        on_done: Callable[[], None]
+    ) -> None:
+        async def job() -> None:
+            try:
+                await self._run(key, revision, name, work)
+            finally:
+                on_done()
+
+        try:
+            self.job_queue.enqueue(name, job)
+        except Exception:
+            self._forget(key, revision)
+            raise
+
+    async def _enqueue_after_debounce(
+        self, key: Hashable, name: str, enqueue: Callable[[], None], on_done: Callable[[], None]
+    ) -> None:
+        await asyncio.sleep(self.debounce_seconds)
+        self._timers.pop(key, None)
+        try:
+            enqueue()
+        except Exception as e:
+            self.dropped += 1
+            print(f"Error queueing job {name}: {str(e)}")
+            on_done()
+
+    async def _run(self, key: Hashable, revision: Hashable, name: str, work: Callable[[], Awaitable[Any]]) -> None:
+        if self._latest.get(key) != revision:
+            # A newer revision arrived while this job waited in the queue
+            self.coalesced += 1
+            return
+        running = self._running.get(key)
+        if running is not None and running[0] == revision and not running[1].done():
+            # The same revision is already being analysed
+            self.coalesced += 1
+            return
+
+        task = asyncio.create_task(work())
+        self._running[key] = (revision, task)
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if self._running.get(key, (None, None))[1] is task:
+                del self._running[key]
+                self._forget(key, revision)
+
+        if task.cancelled():
+            print(f"Superseded job {name} cancelled")
+            return
+        # Re-raise failures so the job queue counts them
+        task.result()
+
+    def _forget(self, key: Hashable, revision: Hashable) -> None:
+        """Drop ``key``'s latest revision once nothing is waiting for or working on it."""
+        if self._latest.get(key) == revision and key not in self._timers and key not in self._running:
+            del self._latest[key]
+
+    def flush(self) -> None:
+        """Queue every debounced event right away, e.g. before shutdown."""
+        pending = list(self._timers.values())
+        self._timers.clear()
+        for timer, enqueue, on_done in pending:
+            timer.cancel()
+            try:
+                enqueue()
+            except Exception as e:
+                self.dropped += 1
+                print(f"Error queueing debounced job: {str(e)}")
+                on_done()
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing, cancellation and overflow counters."""
+        return {
+            "pending": len(self._timers),
+            "running": len(self._running),
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+        }
+
+
+def _nothing() -> None:
+    pass
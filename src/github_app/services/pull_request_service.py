@@ -1,54 +1,516 @@
+import asyncio
+from dataclasses import replace
 from fastapi import HTTPException
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from github_app.analysis.llm_dispatcher import DocstringRequest, LLMDispatcher, create_llm_backend
+from github_app.analysis.parser_pool import ParserPool
+from github_app.analysis.patch_parser import FileChanges, LineRange, base_path_of, head_path_of
+from github_app.analysis.result_cache import AnalysisResult, AnalysisResultCache, ResultKey
+from github_app.analysis.symbol_diff import SymbolDiff
+from github_app.analysis.symbol_extractor import Symbol
+from github_app.configure.config import config
+from github_app.handlers.blob_cache import git_blob_sha
 from github_app.handlers.git_hub_client import GitHubClient
+from github_app.handlers.pull_request_context import ChangedFile, PullRequestContext, PullRequestEvent
+from github_app.monitoring.metrics import time_stage
+from github_app.monitoring.tracing import tracer
+from github_app.services.analysis_state import AnalysisStateStore, PullRequestAnalysis
 
 
 
 class PullRequestService:
     """service layer for processing pull request events"""
 
-    def __init__(self, github_client: GitHubClient):
+    def __init__(
+        self, github_client: GitHubClient, fetch_concurrency: Optional[int] = None,
+        batch_threshold: Optional[int] = None, archive_threshold: Optional[int] = None,
+        analysis_state: Optional[AnalysisStateStore] = None, parser_pool: Optional[ParserPool] = None,
+        result_cache: Optional[AnalysisResultCache] = None, dispatcher: Optional[LLMDispatcher] = None
+    ):
         self.github = github_client
+        self.fetch_concurrency = fetch_concurrency or config.FETCH_CONCURRENCY
+        self.batch_threshold = config.BATCH_FETCH_THRESHOLD if batch_threshold is None else batch_threshold
+        self.archive_threshold = archive_threshold or config.ARCHIVE_FETCH_THRESHOLD
+        self.pages_in_flight = config.PAGES_IN_FLIGHT
+        self.analysis_state = analysis_state or AnalysisStateStore(config.ANALYSIS_STATE_MAX_PRS)
+        self.parser_pool = parser_pool or ParserPool(config.PARSER_WORKERS, config.PARSER_INLINE_MAX_BYTES)
+        self.result_cache = result_cache or AnalysisResultCache(
+            config.RESULT_CACHE_MAX_ENTRIES, config.RESULT_CACHE_PATH
+        )
+        self.dispatcher = dispatcher or LLMDispatcher(
+            create_llm_backend(config.ANALYSIS_MODEL_ID),
+            max_concurrency=config.LLM_MAX_CONCURRENCY,
+            max_batch_tokens=config.LLM_MAX_BATCH_TOKENS,
+            tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+            max_retries=config.LLM_MAX_RETRIES,
+            retry_base_seconds=config.LLM_RETRY_BASE_SECONDS,
+        )
+        self.prompt_version = config.ANALYSIS_PROMPT_VERSION
+        self.model_id = self.dispatcher.model_id
 
-    async def process_opened(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
-        installation_id = event_data.get("installation", {}).get("id")
-        repository = event_data.get("repository", {})
-        pull_request = event_data.get("pull_request", {})
-
-        owner = repository.get("owner", {}).get("login")
-        repo = repository.get("name")
-        pr_number = pull_request.get("number")
+    @staticmethod
+    def build_context(event: PullRequestEvent) -> PullRequestContext:
+        """Build the event's PullRequestContext, rejecting payloads without the required fields."""
+        context = PullRequestContext.from_event(event)
 
         # Validate required fields
-        if not all([installation_id, owner, repo, pr_number]):
+        if not all([context.installation_id, context.owner, context.repo, context.pr_number]):
             raise HTTPException(
                 status_code=400,
                 detail="Missing required data: installation_id, owner, repo, or pr_number"
             )
+        return context
+
+    async def process_opened(self, event: PullRequestEvent) -> Dict[str, Any]:
+        context = self.build_context(event)
+        await self.analyze_pull_request(context)
 
-        # Changed Python files
-        python_files = await self.github.get_changed_python_files(
-            installation_id, owner, repo, pr_number
+        # Post PR comment
+        comment_url = await self.github.post_pr_comment(
+            context.installation_id, context.owner, context.repo, context.pr_number,
+            "Hello from Docs-Sync", context=context
         )
 
+        return {"message": "Comment posted successfully", "comment_url": comment_url}
+
+    async def process_updated(self, event: PullRequestEvent) -> Dict[str, Any]:
+        """Re-analyse a pull request after a ``synchronize``, ``reopened`` or base-changing ``edited`` event."""
+        context = self.build_context(event)
+        # Pushes carry the previous head, which lets unchanged files be reused
+        before_sha = event.before if event.action == "synchronize" else None
+        file_revisions = await self.analyze_pull_request(context, before_sha=before_sha)
+        return {
+            "message": f"Pull request #{context.pr_number} analysed at {context.head_sha}",
+            "files": len(file_revisions),
+        }
+
+    async def analyze_pull_request(
+        self, context: PullRequestContext, before_sha: Optional[str] = None
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Fetch the head and base revisions of every changed Python file in the pull request.
+
+        Each file is parsed and diffed symbol by symbol as soon as both of its
+        revisions are in, while other fetches are still running; the docstrings
+        of added and modified symbols that touch the lines changed by the
+        file's patch are then reviewed. Diffs and reviews are kept with the
+        analysis state, unless a listing, fetch or review failed; file
+        contents are kept only in the blob cache, by blob SHA. When the
+        last analysis was of ``before_sha`` (or of the current head) against
+        the same base, only files changed since then (and files whose blobs
+        were evicted) are fetched again; results for the rest are reused.
+        """
+        # Resolve repository handle and head/base SHAs once for the whole event
+        await self.github.resolve_context(context)
+
+        key = (context.full_name, context.pr_number)
+        previous = self.analysis_state.get(key)
+        changed_files = await self._files_changed_since(context, previous, before_sha)
+
+        parse_tasks: Dict[str, asyncio.Task] = {}
+
+        def parse(revision: Tuple[str, str, str]) -> None:
+            # A push's patches are relative to the previous head rather than the base, so they cannot narrow the diff
+            head_ranges = self._changed_lines(context, revision[0]) if changed_files is None else None
+            parse_tasks[revision[0]] = asyncio.create_task(self.parser_pool.diff(*revision, head_ranges=head_ranges))
+
+        try:
+            if changed_files is None:
+                results: Dict[str, Any] = {}
+                symbol_diffs: Dict[str, SymbolDiff] = {}
+                reviews: Dict[str, List[Tuple[Symbol, AnalysisResult]]] = {}
+                if self.select_fetch_mode(context, context.changed_files_count or 0) == "archive":
+                    # Archives cover every file at once, so there is nothing to gain from streaming
+                    python_files = await self.github.get_changed_python_files(
+                        context.installation_id, context.owner, context.repo, context.pr_number, context=context
+                    )
+                    await self._fetch_into(context, python_files, results, parse)
+                else:
+                    # Changed Python files, fetched page by page as the listing streams in
+                    python_files = await self._stream_changed_files(context, results, parse)
+                all_files = python_files
+            else:
+                print(
+                    f"Incremental analysis of PR #{context.pr_number}: "
+                    f"{len(changed_files)} Python files changed since {previous.head_sha[:7]}"
+                )
+                context.files = self._merge_changed_files(previous.files, changed_files)
+                all_files = [file.filename for file in context.files]
+                touched = {file.filename for file in changed_files}
+                touched.update(file.previous_filename for file in changed_files if file.previous_filename)
+                listed = set(all_files)
+                results = await self._cache_io(self._read_revisions, {
+                    path: blobs for path, blobs in previous.blobs.items() if path in listed and path not in touched
+                })
+                python_files = [path for path in all_files if path in touched or path not in results]
+                recomputed = set(python_files)
+
+                def unchanged(per_file: Dict[str, Any]) -> Dict[str, Any]:
+                    return {
+                        path: value for path, value in per_file.items() if path in listed and path not in recomputed
+                    }
+
+                symbol_diffs = unchanged(previous.symbol_diffs)
+                reviews = unchanged(previous.reviews)
+                await self._fetch_into(context, python_files, results, parse)
+            diffs = await asyncio.gather(*parse_tasks.values())
+        except BaseException:
+            for task in parse_tasks.values():
+                task.cancel()
+            raise
+
         # Process changed Python files
+        if not all_files:
+            print(f"No Python files changed in PR #{context.pr_number}")
+
         if python_files:
-            for idx, file_path in enumerate(python_files):
-                # Fetch HEAD version (PR branch)
-                head_content = await self.github.get_file_content(
-                    installation_id, owner, repo, pr_number, file_path, ref_type="head"
-                )
+            new_diffs = {path: diff for path, diff in zip(parse_tasks, diffs) if diff is not None}
+            changed_symbols = sum(len(diff.changed_symbols) for diff in new_diffs.values())
+            print(f"PR #{context.pr_number}: {changed_symbols} changed symbols in {len(new_diffs)} Python files")
+            symbol_diffs.update(new_diffs)
+            reviews.update(await self.review_symbols(context, results, new_diffs))
 
-                # Fetch BASE version (target branch)
-                base_content = await self.github.get_file_content(
-                    installation_id, owner, repo, pr_number, file_path, ref_type="base"
-                )
+        if context.incomplete:
+            # Reusing partial results would keep their gaps on every later push; start over next time
+            print(f"Analysis of PR #{context.pr_number} is incomplete and will not be reused")
         else:
-            print(f"No Python files changed in PR #{pr_number}")
+            blobs = await self._cache_io(self._store_revisions, list(results.values()))
+            self.analysis_state.save(key, PullRequestAnalysis(
+                head_sha=context.head_sha, base_sha=context.base_sha, files=list(context.files), blobs=blobs,
+                symbol_diffs=symbol_diffs, reviews=reviews,
+            ))
+        return [results[path] for path in all_files if path in results]
 
-        # Post PR comment
-        comment_url = await self.github.post_pr_comment(
-            installation_id, owner, repo, pr_number, "Hello from Docs-Sync"
+    async def _fetch_into(
+        self, context: PullRequestContext, file_paths: List[str], results: Dict[str, Any],
+        on_file_fetched: Callable[[Tuple[str, str, str]], None], mode: Optional[str] = None
+    ) -> None:
+        """Fetch ``file_paths`` and record each (file_path, head_content, base_content) in ``results``."""
+        if not file_paths:
+            return
+        for revision in await self.fetch_file_revisions(context, file_paths, on_file_fetched, mode=mode):
+            results[revision[0]] = revision
+
+    async def _stream_changed_files(
+        self, context: PullRequestContext, results: Dict[str, Any],
+        on_file_fetched: Callable[[Tuple[str, str, str]], None]
+    ) -> List[str]:
+        """
+        Fetch the changed Python files page by page while the listing is still streaming.
+
+        At most ``pages_in_flight`` pages are fetched at once; the listing is
+        not read further until one of them is done. Returns every listed path
+        in listing order.
+        """
+        listed: List[str] = []
+        pages_in_flight = asyncio.Semaphore(self.pages_in_flight)
+        tasks: List[asyncio.Task] = []
+        # Fetch mode follows the size of the whole PR, not of one page
+        mode = "batched" if (context.changed_files_count or 0) > self.batch_threshold else None
+
+        async def fetch_page(paths: List[str]) -> None:
+            try:
+                await self._fetch_into(context, paths, results, on_file_fetched, mode=mode)
+            finally:
+                pages_in_flight.release()
+
+        try:
+            async for page in self.github.iter_changed_python_files(
+                context.installation_id, context.owner, context.repo, context.pr_number, context=context
+            ):
+                paths = [file.filename for file in page]
+                listed.extend(paths)
+                await pages_in_flight.acquire()
+                tasks.append(asyncio.create_task(fetch_page(paths)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return listed
+
+    async def _files_changed_since(
+        self, context: PullRequestContext, previous: Optional[PullRequestAnalysis], before_sha: Optional[str]
+    ) -> Optional[List[ChangedFile]]:
+        """Return the files to re-analyse relative to ``previous``, or None when a full scan is needed."""
+        if previous is None or previous.base_sha != context.base_sha:
+            return None
+        if previous.head_sha == context.head_sha:
+            return []
+        if before_sha is None or previous.head_sha != before_sha:
+            return None
+        return await self.github.get_compare_python_files(
+            context.installation_id, context.owner, context.repo, context.pr_number,
+            before_sha, context.head_sha, context=context
         )
 
-        return {"message": "Comment posted successfully", "comment_url": comment_url}
+    @staticmethod
+    def _merge_changed_files(previous: List[ChangedFile], changed: List[ChangedFile]) -> List[ChangedFile]:
+        """
+        Apply the files changed by a push to the previously listed PR files, keeping their order.
+
+        The listing's statuses are relative to the PR base, the push's to the
+        previous head, so they are combined rather than overwritten: a file the
+        PR added or renamed stays added or renamed when the push edits it (only
+        its blob SHA and patch are refreshed), a removed file the push adds
+        back is modified, and an added file the push removes drops out.
+        """
+        merged = {file.filename: file for file in previous}
+        for file in changed:
+            listed = merged.get(file.filename)
+            if file.status == "removed":
+                if listed is None or listed.status in ("modified", "changed"):
+                    merged[file.filename] = replace(listed or file, status="removed", sha=file.sha, patch=file.patch)
+                elif listed.status != "removed":
+                    del merged[file.filename]
+                    if listed.status == "renamed" and listed.previous_filename:
+                        merged[listed.previous_filename] = ChangedFile(listed.previous_filename, status="removed")
+            elif file.status == "renamed" and file.previous_filename:
+                renamed = merged.pop(file.previous_filename, None)
+                if listed is not None and listed.status == "removed":
+                    # Moved onto a path the PR had removed from the base
+                    merged[file.filename] = replace(file, status="modified", previous_filename=None)
+                elif renamed is not None and renamed.status == "added":
+                    merged[file.filename] = replace(file, status="added", previous_filename=None)
+                elif renamed is not None and renamed.status == "renamed":
+                    if renamed.previous_filename == file.filename:
+                        merged[file.filename] = replace(file, status="modified", previous_filename=None)
+                    else:
+                        merged[file.filename] = replace(file, previous_filename=renamed.previous_filename)
+                else:
+                    merged[file.filename] = file
+            elif listed is None:
+                merged[file.filename] = file
+            elif listed.status == "removed":
+                merged[file.filename] = replace(listed, status="modified", sha=file.sha, patch=file.patch)
+            else:
+                merged[file.filename] = replace(listed, sha=file.sha, patch=file.patch)
+        return [file for file in merged.values() if file.filename.endswith(".py")]
+
+    def select_fetch_mode(self, context: PullRequestContext, file_count: int) -> str:
+        """
+        Pick how to fetch file revisions: ``per-file``, ``batched`` or ``archive``.
+
+        Small PRs use one REST call per revision, larger ones batched GraphQL
+        queries. Very large PRs stream the head and base tarballs, unless the
+        repository is too big for downloading it twice to pay off.
+        """
+        if file_count <= self.batch_threshold:
+            return "per-file"
+        repository_size = context.repository_size_kb
+        if file_count >= self.archive_threshold and (
+            repository_size is None or repository_size <= config.ARCHIVE_MAX_REPO_KB
+        ):
+            return "archive"
+        return "batched"
+
+    async def fetch_file_revisions(
+        self, context: PullRequestContext, file_paths: List[str],
+        on_file_fetched: Optional[Callable[[Tuple[str, str, str]], None]] = None, mode: Optional[str] = None
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Fetch the head and base content of every file.
+
+        Results keep the order of ``file_paths``; unless ``mode`` is given, the
+        fetch mode is chosen by ``select_fetch_mode``. Removed files have no head revision and added
+        files no base revision, so those sides are not fetched and come back
+        as ``""``; renamed files are read from their old path on the base side.
+
+        ``on_file_fetched`` is called with each file's result as soon as both
+        of its revisions are in, so later stages can start on it early.
+        """
+        revision_paths = [self._revision_paths(context, file_path) for file_path in file_paths]
+        revisions = [
+            (ref_type, path) for paths in revision_paths
+            for ref_type, path in zip(("head", "base"), paths) if path is not None
+        ]
+        mode = mode or self.select_fetch_mode(context, len(file_paths))
+        print(
+            f"Fetching {len(file_paths)} Python files ({len(revisions)} revisions) "
+            f"for PR #{context.pr_number} in {mode} mode"
+        )
+
+        contents: Dict[Tuple[str, str], str] = {}
+        # Files still waiting for each revision, and the number of revisions each file waits for
+        waiting: Dict[Tuple[str, str], List[int]] = {}
+        remaining = [0] * len(file_paths)
+        for i, paths in enumerate(revision_paths):
+            for revision in zip(("head", "base"), paths):
+                if revision[1] is not None:
+                    waiting.setdefault(revision, []).append(i)
+                    remaining[i] += 1
+
+        def result(i: int) -> Tuple[str, str, str]:
+            head_path, base_path = revision_paths[i]
+            return file_paths[i], contents.get(("head", head_path), ""), contents.get(("base", base_path), "")
+
+        def revision_fetched(revision: Tuple[str, str], content: str) -> None:
+            contents[revision] = content
+            for i in waiting.pop(revision, ()):
+                remaining[i] -= 1
+                if remaining[i] == 0 and on_file_fetched is not None:
+                    on_file_fetched(result(i))
+
+        if mode == "archive":
+            try:
+                ref_paths = {
+                    ref_type: [path for revision_ref, path in revisions if revision_ref == ref_type]
+                    for ref_type in ("head", "base")
+                }
+                downloads = [
+                    asyncio.create_task(self.github.get_archive_contents(
+                        context.installation_id, context.owner, context.repo, context.pr_number,
+                        ref_type, paths, context=context
+                    ))
+                    for ref_type, paths in ref_paths.items()
+                ]
+                try:
+                    archive_contents = await asyncio.gather(*downloads)
+                except BaseException:
+                    # Stop the other download before falling back, so it does not compete with the fallback
+                    for download in downloads:
+                        download.cancel()
+                    await asyncio.gather(*downloads, return_exceptions=True)
+                    raise
+                for (ref_type, paths), ref_contents in zip(ref_paths.items(), archive_contents):
+                    for path, content in zip(paths, ref_contents):
+                        revision_fetched((ref_type, path), content)
+            except Exception as e:
+                print(f"Archive fetch failed for PR #{context.pr_number}, falling back to batched mode: {str(e)}")
+                mode = "batched"
+
+        if mode == "batched":
+            batch_contents = await self.github.get_file_contents_batch(
+                context.installation_id, context.owner, context.repo, context.pr_number,
+                revisions, context=context
+            )
+            for revision, content in zip(revisions, batch_contents):
+                revision_fetched(revision, content)
+        elif mode == "per-file":
+            await self._fetch_file_revisions_per_file(context, revisions, revision_fetched)
+
+        return [result(i) for i in range(len(file_paths))]
+
+    @staticmethod
+    def _revision_paths(context: PullRequestContext, file_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (head, base) paths of a listed file; None where that revision does not exist."""
+        file = context.changed_file(file_path)
+        if file is None:
+            return file_path, file_path
+        return head_path_of(file.status, file_path), base_path_of(file.status, file_path, file.previous_filename)
+
+    @staticmethod
+    def _changed_lines(context: PullRequestContext, file_path: str) -> Optional[List[LineRange]]:
+        """Return the head lines changed by a listed file's patch; None when there is no usable patch."""
+        file = context.changed_file(file_path)
+        if file is None:
+            return None
+        changes = FileChanges.from_changed_file(file)
+        return changes.head_ranges if changes.complete else None
+
+    async def _fetch_file_revisions_per_file(
+        self, context: PullRequestContext, revisions: List[Tuple[str, str]],
+        revision_fetched: Callable[[Tuple[str, str], str], None]
+    ) -> None:
+        """Fetch every (ref_type, path) revision concurrently, at most ``fetch_concurrency`` at once."""
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def fetch(ref_type: str, file_path: str) -> None:
+            async with semaphore:
+                content = await self.github.get_file_content(
+                    context.installation_id, context.owner, context.repo, context.pr_number,
+                    file_path, ref_type=ref_type, context=context
+                )
+            revision_fetched((ref_type, file_path), content)
+
+        await asyncio.gather(*(fetch(ref_type, file_path) for ref_type, file_path in revisions))
+
+    async def review_symbols(
+        self, context: PullRequestContext, revisions: Dict[str, Tuple[str, str, str]],
+        symbol_diffs: Dict[str, SymbolDiff]
+    ) -> Dict[str, List[Tuple[Symbol, AnalysisResult]]]:
+        """
+        Review the docstrings of the added and modified symbols of each file.
+
+        Cached results are looked up before any model call; the rest go to
+        the model in batches, each distinct (code, docstring) once, and are
+        cached together; a failed batch leaves its symbols unreviewed and the
+        analysis incomplete. Cache I/O runs in an executor, once each way.
+        Returns ``(symbol, result)`` pairs per file in source order.
+        """
+        reviews: Dict[str, List[Tuple[Symbol, AnalysisResult]]] = {path: [] for path in symbol_diffs}
+        changed = [(path, symbol) for path, diff in symbol_diffs.items() for symbol in diff.changed_symbols]
+        keys = [self.result_key(symbol) for _, symbol in changed]
+        found = await self._cache_io(self.result_cache.get_many, keys)
+        pending: Dict[ResultKey, List[Tuple[str, Symbol]]] = {}
+        for (path, symbol), key in zip(changed, keys):
+            result = found.get(key)
+            if result is None:
+                pending.setdefault(key, []).append((path, symbol))
+            else:
+                reviews[path].append((symbol, result))
+
+        if pending:
+            requests = [
+                self._docstring_request(revisions[path][1], symbol)
+                for path, symbol in (symbols[0] for symbols in pending.values())
+            ]
+            try:
+                with time_stage("analysis"), tracer.span("review_symbols", symbols=len(requests)):
+                    results = await self.dispatcher.dispatch(context.installation_id, requests)
+            except Exception as e:
+                print(f"Error reviewing docstrings for PR #{context.pr_number}: {str(e)}")
+                results = [None] * len(requests)
+            if None in results:
+                # Symbols whose batch failed have no review to reuse
+                context.incomplete = True
+            reviewed = [(item, result) for item, result in zip(pending.items(), results) if result is not None]
+            for (key, symbols), result in reviewed:
+                for path, symbol in symbols:
+                    reviews[path].append((symbol, result))
+            await self._cache_io(self.result_cache.put_many, [(key, result) for (key, _), result in reviewed])
+
+        for file_reviews in reviews.values():
+            file_reviews.sort(key=lambda review: review[0].start_line)
+        return reviews
+
+    @staticmethod
+    def _docstring_request(head_content: str, symbol: Symbol) -> DocstringRequest:
+        source = "\n".join(head_content.splitlines()[symbol.start_line - 1:symbol.end_line])
+        return DocstringRequest(symbol.qualified_name, symbol.kind, symbol.signature, symbol.docstring, source)
+
+    def result_key(self, symbol: Symbol) -> ResultKey:
+        """Cache key of the docstring analysis of ``symbol`` with the current prompt and model."""
+        return AnalysisResultCache.key(symbol.body_hash, symbol.docstring_hash, self.prompt_version, self.model_id)
+
+    def _store_revisions(self, revisions: List[Tuple[str, str, str]]) -> Dict[str, Tuple[str, str]]:
+        """Put each revision's head and base content in the blob cache; return their blob SHAs by path."""
+        blobs: Dict[str, Tuple[str, str]] = {}
+        for path, head_content, base_content in revisions:
+            shas = []
+            for content in (head_content, base_content):
+                data = content.encode("utf-8")
+                shas.append(git_blob_sha(data))
+                self.github.blob_cache.put(shas[-1], data)
+            blobs[path] = (shas[0], shas[1])
+        return blobs
+
+    def _read_revisions(self, blobs: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, str, str]]:
+        """Read revisions back from the blob cache, leaving out files with an evicted blob."""
+        revisions: Dict[str, Tuple[str, str, str]] = {}
+        for path, (head_blob, base_blob) in blobs.items():
+            head_content = self.github.blob_cache.get(head_blob)
+            base_content = self.github.blob_cache.get(base_blob)
+            if head_content is not None and base_content is not None:
+                revisions[path] = (path, head_content.decode("utf-8"), base_content.decode("utf-8"))
+        return revisions
+
+    @staticmethod
+    async def _cache_io(func: Callable[..., Any], *args: Any) -> Any:
+        # The result and blob caches block on SQLite and disk, keep them off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def close(self) -> None:
+        """Stop the parser worker processes and close the result cache."""
+        self.parser_pool.shutdown()
+        self.result_cache.close()
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark of webhook ingestion on ``POST /github/pr/events``.
+
+Drives the ASGI app in-process (no sockets), so the figure covers routing,
+body reading, signature check, JSON decoding and queueing only. Run with:
+
+    PYTHONPATH=src:. python tests/github_app_test/bench_pull_request_events.py [--stdlib-json]
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+
+from github_app.configure.config import Config
+from github_app.controllers.pull_request_controller import PullRequestController
+from github_app.handlers import webhook_payload
+from github_app.handlers.pull_request_handler import PullRequestEventHandler
+from github_app.main import create_app
+from github_app.security.delivery_store import InMemoryDeliveryStore
+from github_app.services.job_queue import JobQueue
+from github_app.services.pull_request_scheduler import PullRequestScheduler
+from github_app.services.pull_request_service import PullRequestService
+
+SECRET = "bench-secret"
+PATH = "/github/pr/events"
+
+
+def make_payload(padding_kb: int) -> bytes:
+    """A synchronize payload padded to roughly GitHub's usual size with fields the service ignores."""
+    event = {
+        "action": "synchronize",
+        "number": 1,
+        "before": "a" * 40,
+        "after": "b" * 40,
+        "installation": {"id": 12345, "node_id": "MDIzOkludGVncmF0aW9uSW5zdGFsbGF0aW9uMTIzNDU="},
+        "repository": {"id": 1, "name": "repo", "full_name": "owner/repo", "owner": {"login": "owner", "id": 2}},
+        "pull_request": {
+            "number": 1,
+            "changed_files": 12,
+            "head": {"sha": "b" * 40, "ref": "feature"},
+            "base": {"sha": "c" * 40, "ref": "main"},
+            "body": "Lorem ipsum dolor sit amet. " * (padding_kb * 1024 // 28),
+            "labels": [{"id": i, "name": f"label-{i}", "color": "ededed"} for i in range(20)],
+        },
+        "sender": {"login": "octocat", "id": 3, "type": "User", "site_admin": False},
+    }
+    return json.dumps(event).encode("utf-8")
+
+
+def build_app(handler: PullRequestEventHandler) -> FastAPI:
+    """The real app and routes, with a container holding only the handler (no lifespan, no credentials)."""
+    app = create_app()
+    app.state.container = SimpleNamespace(pull_request_controller=PullRequestController(handler))
+    return app
+
+
+async def post(app: FastAPI, body: bytes, headers: list, chunk_size: int = 64 * 1024) -> int:
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)] or [b""]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": PATH, "raw_path": PATH.encode(), "query_string": b"", "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    status = []
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def run(requests: int, concurrency: int, padding_kb: int) -> None:
+    service = mock.Mock()
+    service.build_context.side_effect = PullRequestService.build_context
+    service.process_updated = mock.AsyncMock()
+    job_queue = JobQueue(workers=4, max_size=requests)
+    handler = PullRequestEventHandler(
+        service,
+        job_queue=job_queue,
+        delivery_store=InMemoryDeliveryStore(),
+        scheduler=PullRequestScheduler(job_queue, debounce_seconds=0),
+    )
+    app = build_app(handler)
+
+    body = make_payload(padding_kb)
+    signature = "sha256=" + hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    base_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"x-github-event", b"pull_request"),
+        (b"x-hub-signature-256", signature.encode()),
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deliver(i: int) -> int:
+        async with semaphore:
+            return await post(app, body, base_headers + [(b"x-github-delivery", f"delivery-{i}".encode())])
+
+    await post(app, body, base_headers)  # warm-up
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(deliver(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await handler.job_queue.drain(30)
+
+    parser = "orjson" if webhook_payload.orjson is not None else "json"
+    print(f"{requests} requests of {len(body) / 1024:.1f}KB, concurrency {concurrency}, parser {parser}")
+    print(f"  {requests / elapsed:,.0f} requests/sec ({elapsed * 1e6 / requests:.0f}us per request)")
+    print(f"  statuses: { {code: statuses.count(code) for code in set(statuses)} }")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--padding-kb", type=int, default=24, help="approximate payload size")
+    parser.add_argument("--stdlib-json", action="store_true", help="decode with json even if orjson is installed")
+    args = parser.parse_args()
+
+    Config.GITHUB_WEBHOOK_SECRET = SECRET
+    if args.stdlib_json:
+        webhook_payload.orjson = None
+    asyncio.run(run(args.requests, args.concurrency, args.padding_kb))
+
+
+if __name__ == "__main__":
+    main()
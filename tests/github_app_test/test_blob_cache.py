@@ -0,0 +1,85 @@
+from src.github_app.handlers.blob_cache import BlobCache, git_blob_sha
+
+
+class TestBlobCache:
+    """Test suite for BlobCache class"""
+
+    def test_get_returns_cached_content(self):
+        """Test that a stored blob is served from memory"""
+        # Arrange
+        cache = BlobCache(max_bytes=1024)
+        content = b"def hello():\n    pass\n"
+        blob_sha = git_blob_sha(content)
+
+        # Act
+        cache.put(blob_sha, content)
+
+        # Assert
+        assert cache.get(blob_sha) == content
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_git_blob_sha_matches_git(self):
+        """Test that blob hashing matches `git hash-object`"""
+        # `printf 'hello\n' | git hash-object --stdin`
+        assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    def test_evicts_least_recently_used_over_byte_cap(self):
+        """Test that the memory layer stays under its byte cap"""
+        # Arrange
+        cache = BlobCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+
+        # Act
+        cache.put("c", b"12345")
+
+        # Assert
+        assert cache.get("b") is None
+        assert cache.get("a") == b"12345"
+        assert cache.get("c") == b"12345"
+        assert cache.stats()["bytes"] == 10
+
+    def test_disk_layer_survives_new_instance(self, tmp_path):
+        """Test that blobs written to disk are served by a fresh cache"""
+        # Arrange
+        content = b"print('persisted')\n"
+        blob_sha = git_blob_sha(content)
+        BlobCache(directory=str(tmp_path)).put(blob_sha, content)
+
+        # Act
+        cache = BlobCache(directory=str(tmp_path))
+
+        # Assert
+        assert cache.get(blob_sha) == content
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_disk_layer_rejects_corrupted_blob(self, tmp_path):
+        """Test that a disk entry whose content does not match its SHA is ignored"""
+        # Arrange
+        content = b"print('original')\n"
+        blob_sha = git_blob_sha(content)
+        cache = BlobCache(directory=str(tmp_path))
+        cache.put(blob_sha, content)
+        (tmp_path / blob_sha[:2] / blob_sha[2:]).write_bytes(b"truncated")
+
+        # Act
+        result = BlobCache(directory=str(tmp_path)).get(blob_sha)
+
+        # Assert
+        assert result is None
+
+    def test_remembers_blob_sha_per_commit_and_path(self):
+        """Test the (commit, path) -> blob SHA index"""
+        # Arrange
+        cache = BlobCache(max_refs=1)
+
+        # Act
+        cache.remember("base1", "src/main.py", "blob1")
+        cache.remember("base1", "src/other.py", "blob2")
+
+        # Assert
+        assert cache.blob_sha_for("base1", "src/other.py") == "blob2"
+        assert cache.blob_sha_for("base1", "src/main.py") is None
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import github_app.container
+from github_app.handlers.github_transport import SharedSessionHTTPSConnection
+from src.github_app.main import create_app, lifespan
+from src.github_app.routes.pull_request_routes import get_pull_request_controller
+
+
+class TestAppContainer:
+    """Test suite for AppContainer and the app lifespan"""
+
+    @pytest.fixture
+    def auth(self, mocker):
+        """GitHubAuth without a private key"""
+        return mocker.patch.object(github_app.container, "GitHubAuth").return_value
+
+    def test_create_app_builds_no_resources(self, mocker):
+        """Test that building the app does not build the container"""
+        # Arrange
+        container_class = mocker.patch.object(github_app.container, "AppContainer")
+
+        # Act
+        app = create_app()
+
+        # Assert
+        container_class.assert_not_called()
+        assert not hasattr(app.state, "container")
+        assert any(route.path == "/github/pr/events" for route in app.routes)
+
+    def test_main_import_does_not_load_github_stack(self):
+        """Test that importing the entrypoint leaves PyGithub, auth and the services for startup"""
+        # Arrange
+        src = str(Path(__file__).resolve().parents[2] / "src")
+        code = "import sys, github_app.main; print(sorted(m for m in sys.modules if m.split('.')[0] == 'github'))"
+
+        # Act
+        result = subprocess.run(
+            [sys.executable, "-c", code], env={**os.environ, "PYTHONPATH": src}, capture_output=True, text=True
+        )
+
+        # Assert
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    @pytest.mark.asyncio
+    async def test_lifespan_builds_once_and_closes(self, mocker):
+        """Test that the container is built on startup, shared via app.state and closed on shutdown"""
+        # Arrange
+        container_class = mocker.patch.object(github_app.container, "AppContainer")
+        container = container_class.return_value
+        container.close = mocker.AsyncMock()
+        app = create_app()
+
+        # Act
+        async with lifespan(app):
+            request = mocker.Mock(app=app)
+            controller = await get_pull_request_controller(request)
+            container.close.assert_not_awaited()
+
+        # Assert
+        container_class.assert_called_once_with()
+        assert controller is container.pull_request_controller
+        container.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_components_share_one_set_of_resources(self, auth):
+        """Test that the handler, service and client are wired to the same instances"""
+        # Act
+        container = github_app.container.AppContainer()
+
+        # Assert
+        try:
+            assert container.github_client.auth is auth
+            assert container.service.github is container.github_client
+            assert container.handler.service is container.service
+            assert container.handler.job_queue is container.job_queue
+            assert container.handler.scheduler.job_queue is container.job_queue
+            assert container.pull_request_controller.handler is container.handler
+        finally:
+            await container.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_jobs_and_releases_clients(self, mocker, auth):
+        """Test that teardown finishes queued work before closing GitHub resources"""
+        # Arrange
+        container = github_app.container.AppContainer()
+        finished = []
+
+        async def job():
+            finished.append(True)
+
+        container.job_queue.enqueue("job", job)
+        parser_shutdown = mocker.spy(container.service.parser_pool, "shutdown")
+
+        # Act
+        await container.close()
+
+        # Assert
+        assert finished == [True]
+        parser_shutdown.assert_called_once()
+        auth.close.assert_called_once()
+        assert SharedSessionHTTPSConnection.rate_limiter is None
+        with pytest.raises(RuntimeError):
+            container.github_client.executor._executor.submit(print)
@@ -0,0 +1,93 @@
+import pytest
+
+from src.github_app.security.delivery_store import DeliveryStore, InMemoryDeliveryStore, RedisDeliveryStore
+
+
+class TestInMemoryDeliveryStore:
+    """Test suite for InMemoryDeliveryStore class"""
+
+    @pytest.mark.asyncio
+    async def test_second_add_is_rejected(self):
+        """Test that a delivery ID is accepted only once"""
+        store = InMemoryDeliveryStore()
+        assert await store.add_if_absent("delivery-1", 60) is True
+        assert await store.add_if_absent("delivery-1", 60) is False
+        assert await store.add_if_absent("delivery-2", 60) is True
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_after_ttl(self, mocker):
+        """Test that expired delivery IDs are accepted again"""
+        # Arrange
+        clock = mocker.patch("time.monotonic", return_value=1000.0)
+        store = InMemoryDeliveryStore()
+        await store.add_if_absent("delivery-1", 60)
+
+        # Act
+        clock.return_value = 1061.0
+
+        # Assert
+        assert await store.add_if_absent("delivery-1", 60) is True
+
+    @pytest.mark.asyncio
+    async def test_store_is_bounded(self):
+        """Test that the oldest entries are evicted past max_entries"""
+        store = InMemoryDeliveryStore(max_entries=2)
+        for delivery_id in ("a", "b", "c"):
+            await store.add_if_absent(delivery_id, 60)
+        assert await store.add_if_absent("a", 60) is True
+        assert await store.add_if_absent("c", 60) is False
+
+    @pytest.mark.asyncio
+    async def test_discard_forgets_delivery(self):
+        """Test that a discarded delivery can be added again"""
+        store = InMemoryDeliveryStore()
+        await store.add_if_absent("delivery-1", 60)
+        await store.discard("delivery-1")
+        assert await store.add_if_absent("delivery-1", 60) is True
+
+
+class TestRedisDeliveryStore:
+    """Test suite for RedisDeliveryStore class"""
+
+    @pytest.mark.asyncio
+    async def test_uses_atomic_set_nx(self, mocker):
+        """Test that the shared backend relies on SET NX EX"""
+        # Arrange
+        client = mocker.AsyncMock()
+        client.set.side_effect = [True, None]
+        store = RedisDeliveryStore(client)
+
+        # Act / Assert
+        assert await store.add_if_absent("delivery-1", 60) is True
+        assert await store.add_if_absent("delivery-1", 60) is False
+        client.set.assert_called_with("docs-sync:delivery:delivery-1", 1, nx=True, ex=60)
+
+    @pytest.mark.asyncio
+    async def test_discard_and_close_are_awaited(self, mocker):
+        """Test that the Redis calls are awaited instead of blocking the event loop"""
+        # Arrange
+        client = mocker.AsyncMock()
+        store = RedisDeliveryStore(client)
+
+        # Act
+        await store.discard("delivery-1")
+        await store.close()
+
+        # Assert
+        client.delete.assert_awaited_once_with("docs-sync:delivery:delivery-1")
+        client.aclose.assert_awaited_once()
+
+
+class TestDeliveryStore:
+    """Test suite for the DeliveryStore interface"""
+
+    def test_backends_must_implement_every_method(self):
+        """Test that an incomplete backend cannot be instantiated"""
+        # Arrange
+        class AddOnlyStore(DeliveryStore):
+            async def add_if_absent(self, delivery_id, ttl_seconds):
+                return True
+
+        # Act / Assert
+        with pytest.raises(TypeError):
+            AddOnlyStore()
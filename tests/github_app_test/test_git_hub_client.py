@@ -1,6 +1,13 @@
+import io
+import tarfile
+import threading
+
 import pytest
+import requests
 from github.GithubException import GithubException
+from github_app.configure.config import config
 from src.github_app.handlers.git_hub_client import GitHubClient
+from src.github_app.handlers.pull_request_context import ChangedFile, PullRequestContext
 
 
 class TestGitHubClient:
@@ -209,6 +216,38 @@ class TestGitHubClient:
         assert result == ""
         captured = capsys.readouterr()
         assert "GitHub API error getting file content for src/main.py: File not found" in captured.out
+        client.auth.invalidate_installation_token.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_marks_context_incomplete(self, mocker, client):
+        """Test that the "" returned for a failed fetch is distinguishable from an empty file"""
+        # Arrange
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456",
+                                     repository=mocker.Mock())
+        context.repository.get_contents.side_effect = GithubException(status=502, data={'message': 'Bad gateway'})
+
+        # Act
+        result = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', context=context)
+
+        # Assert
+        assert result == ""
+        assert context.incomplete is True
+
+    @pytest.mark.asyncio
+    async def test_rejected_token_is_invalidated(self, mocker, mock_github_instance, client):
+        """Test that a 401 drops the cached installation token so the next call mints a new one"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        client.auth.get_github_instance.return_value = mock_github
+        mock_repo.get_contents.side_effect = GithubException(status=401, data={'message': 'Bad credentials'})
+        mock_pr.head.sha = "abc123"
+
+        # Act
+        result = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py')
+
+        # Assert
+        assert result == ""
+        client.auth.invalidate_installation_token.assert_called_once_with(12345)
 
     @pytest.mark.asyncio
     async def test_get_file_content_github_exception_no_data(self, mocker, mock_github_instance, capsys, client):
@@ -630,3 +669,306 @@ class TestGitHubClient:
         mock_repo.get_issue.assert_called_once_with(1)
         mock_issue.create_comment.assert_called_once_with("Test comment")
 
+
+    @pytest.mark.asyncio
+    async def test_resolve_context_uses_payload(self, mocker, client):
+        """Test that a context built from the payload needs no repository or pull lookups"""
+        # Arrange
+        mock_github = mocker.Mock()
+        client.auth.get_github_instance.return_value = mock_github
+        context = PullRequestContext.from_payload({
+            "installation": {"id": 12345},
+            "repository": {"name": "repo", "owner": {"login": "owner"}, "url": "https://api.github.com/repos/owner/repo"},
+            "pull_request": {"number": 1, "head": {"sha": "abc123"}, "base": {"sha": "def456"}},
+        })
+
+        # Act
+        result = await client.resolve_context(context)
+
+        # Assert
+        assert result.repository is mock_github.create_from_raw_data.return_value
+        assert (result.head_sha, result.base_sha) == ("abc123", "def456")
+        mock_github.get_repo.assert_not_called()
+        mock_github.create_from_raw_data.return_value.get_pull.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_resolve_context_falls_back_to_api(self, mock_github_instance, client):
+        """Test that missing repository data and SHAs are resolved through the API"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        client.auth.get_github_instance.return_value = mock_github
+        mock_pr.head.sha = "abc123"
+        mock_pr.base.sha = "def456"
+        context = PullRequestContext(12345, 'owner', 'repo', 1)
+
+        # Act
+        result = await client.resolve_context(context)
+
+        # Assert
+        assert result.repository is mock_repo
+        assert (result.head_sha, result.base_sha) == ("abc123", "def456")
+        mock_github.get_repo.assert_called_once_with('owner/repo')
+        mock_repo.get_pull.assert_called_once_with(1)
+
+    @pytest.mark.asyncio
+    async def test_get_file_content_with_context_skips_lookups(self, mocker, mock_github_instance, client):
+        """Test that a resolved context is reused for every file and ref"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        mock_contents = mocker.Mock()
+        mock_contents.decoded_content = b"# content"
+        mock_repo.get_contents.return_value = mock_contents
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456", repository=mock_repo)
+
+        # Act
+        head = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', context=context)
+        base = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', ref_type="base", context=context)
+
+        # Assert
+        assert head == base == "# content"
+        client.auth.get_github_instance.assert_not_called()
+        mock_repo.get_pull.assert_not_called()
+        assert mock_repo.get_contents.call_args_list == [
+            mocker.call('src/main.py', ref='abc123'),
+            mocker.call('src/main.py', ref='def456'),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_changed_python_files_records_file_metadata(self, mocker, mock_github_instance, client):
+        """Test that file metadata is kept on the context"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        mock_pr.get_files.return_value = [
+            mocker.Mock(filename='src/main.py', sha='blob1', status='modified', patch='@@ -1 +1 @@',
+                        additions=1, deletions=1, previous_filename=None),
+            mocker.Mock(filename='README.md'),
+        ]
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456", repository=mock_repo)
+
+        # Act
+        result = await client.get_changed_python_files(12345, 'owner', 'repo', 1, context=context)
+
+        # Assert
+        assert result == ['src/main.py']
+        assert [(f.filename, f.sha, f.status) for f in context.files] == [('src/main.py', 'blob1', 'modified')]
+
+    @pytest.mark.asyncio
+    async def test_get_file_content_served_from_blob_cache(self, mocker, mock_github_instance, client):
+        """Test that a head revision whose blob SHA is cached skips the API"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456", repository=mock_repo)
+        context.files = [ChangedFile('src/main.py', sha='blob1')]
+        client.blob_cache.put('blob1', b"# cached")
+
+        # Act
+        result = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', context=context)
+
+        # Assert
+        assert result == "# cached"
+        mock_repo.get_contents.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_file_content_base_revision_cached_by_commit(self, mocker, mock_github_instance, client):
+        """Test that a fetched base revision is served from cache on the next event"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        mock_contents = mocker.Mock(sha='blob2', decoded_content=b"# base")
+        mock_repo.get_contents.return_value = mock_contents
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456", repository=mock_repo)
+
+        # Act
+        first = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', ref_type="base", context=context)
+        second = await client.get_file_content(12345, 'owner', 'repo', 1, 'src/main.py', ref_type="base", context=context)
+
+        # Assert
+        assert first == second == "# base"
+        mock_repo.get_contents.assert_called_once_with('src/main.py', ref='def456')
+
+    @pytest.fixture
+    def batch_context(self, mocker):
+        """Resolved context whose repository answers GraphQL queries"""
+        mock_repo = mocker.Mock()
+        mock_repo._requester.base_url = "https://api.github.com"
+        return PullRequestContext(12345, 'owner', 'repo', 1, head_sha="abc123", base_sha="def456", repository=mock_repo)
+
+    @staticmethod
+    def graphql_response(query_input):
+        """Answer every aliased object with a blob whose text names its expression"""
+        variables = query_input["variables"]
+        return {}, {"data": {"repository": {
+            f"f{key[1:]}": {"oid": f"oid-{value}", "text": f"text {value}", "isBinary": False, "isTruncated": False}
+            for key, value in variables.items() if key.startswith("e")
+        }}}
+
+    @pytest.mark.asyncio
+    async def test_get_file_contents_batch_single_query(self, mocker, batch_context, client):
+        """Test that many revisions are resolved with one GraphQL query, in order"""
+        # Arrange
+        requester = batch_context.repository._requester
+        requester.requestJsonAndCheck.side_effect = lambda verb, url, input: self.graphql_response(input)
+        revisions = [("head", "a.py"), ("base", "a.py"), ("head", "b.py")]
+
+        # Act
+        result = await client.get_file_contents_batch(12345, 'owner', 'repo', 1, revisions, context=batch_context)
+
+        # Assert
+        assert result == ["text abc123:a.py", "text def456:a.py", "text abc123:b.py"]
+        requester.requestJsonAndCheck.assert_called_once()
+        verb, url = requester.requestJsonAndCheck.call_args.args
+        assert (verb, url) == ("POST", "https://api.github.com/graphql")
+        assert client.blob_cache.get("oid-abc123:a.py") == b"text abc123:a.py"
+
+    @pytest.mark.asyncio
+    async def test_get_file_contents_batch_chunks_queries(self, mocker, batch_context, client):
+        """Test that large batches are split into several queries"""
+        # Arrange
+        mocker.patch.object(config, "GRAPHQL_BATCH_SIZE", 2)
+        requester = batch_context.repository._requester
+        requester.requestJsonAndCheck.side_effect = lambda verb, url, input: self.graphql_response(input)
+        revisions = [("head", f"f{i}.py") for i in range(5)]
+
+        # Act
+        result = await client.get_file_contents_batch(12345, 'owner', 'repo', 1, revisions, context=batch_context)
+
+        # Assert
+        assert result == [f"text abc123:f{i}.py" for i in range(5)]
+        assert requester.requestJsonAndCheck.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_get_file_contents_batch_falls_back_for_truncated_blobs(self, mocker, batch_context, client):
+        """Test that missing, binary and truncated blobs are handled per file"""
+        # Arrange
+        requester = batch_context.repository._requester
+        requester.requestJsonAndCheck.return_value = ({}, {"data": {"repository": {
+            "f0": None,
+            "f1": {"oid": "x", "text": None, "isBinary": True, "isTruncated": False},
+            "f2": {"oid": "y", "text": None, "isBinary": False, "isTruncated": True},
+        }}})
+        batch_context.repository.get_contents.return_value = mocker.Mock(sha="y", decoded_content=b"# large")
+        revisions = [("base", "added.py"), ("head", "logo.py"), ("head", "large.py")]
+
+        # Act
+        result = await client.get_file_contents_batch(12345, 'owner', 'repo', 1, revisions, context=batch_context)
+
+        # Assert
+        assert result == ["", "", "# large"]
+        batch_context.repository.get_contents.assert_called_once_with("large.py", ref="abc123")
+
+    @pytest.mark.asyncio
+    async def test_get_archive_contents_extracts_requested_files(self, mocker, batch_context, client):
+        """Test that only the requested files are extracted from a streamed tarball"""
+        # Arrange
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for name, data in [("src/main.py", b"# main"), ("README.md", b"# readme"), ("src/util.py", b"# util")]:
+                info = tarfile.TarInfo(f"owner-repo-abc123/{name}")
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        buffer.seek(0)
+
+        response = mocker.MagicMock()
+        response.__enter__.return_value = response
+        response.raw = buffer
+        mock_get = mocker.patch.object(requests, "get", return_value=response)
+        batch_context.repository.get_archive_link.return_value = "https://codeload.github.com/owner/repo/tar.gz/abc123"
+
+        # Act
+        result = await client.get_archive_contents(
+            12345, 'owner', 'repo', 1, "head", ["src/util.py", "src/main.py", "src/missing.py"], context=batch_context
+        )
+
+        # Assert
+        assert result == ["# util", "# main", ""]
+        batch_context.repository.get_archive_link.assert_called_once_with("tarball", ref="abc123")
+        mock_get.assert_called_once()
+        assert mock_get.call_args.kwargs["stream"] is True
+
+    def test_cancelled_archive_download_stops_reading(self, mocker, batch_context, client):
+        """Test that a cancelled download leaves the rest of the archive unread"""
+        # Arrange
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            info = tarfile.TarInfo("owner-repo-abc123/src/main.py")
+            info.size = len(b"# main")
+            archive.addfile(info, io.BytesIO(b"# main"))
+        buffer.seek(0)
+        response = mocker.MagicMock()
+        response.__enter__.return_value = response
+        response.raw = buffer
+        mocker.patch.object(requests, "get", return_value=response)
+        cancelled = threading.Event()
+        cancelled.set()
+
+        # Act
+        result = client._extract_archive_files(batch_context, "head", ["src/main.py"], cancelled)
+
+        # Assert
+        assert result == [""]
+        assert client.blob_cache.blob_sha_for("abc123", "src/main.py") is None
+
+    @pytest.mark.asyncio
+    async def test_iter_changed_python_files_yields_pages(self, mocker, mock_github_instance, client):
+        """Test that the listing is streamed one page of Python files at a time"""
+        # Arrange
+        mocker.patch.object(config, "GITHUB_PER_PAGE", 2)
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        client.auth.get_github_instance.return_value = mock_github
+        names = ["a.py", "README.md", "b.py", "c.py", "setup.cfg"]
+        mock_pr.get_files.return_value = [
+            mocker.Mock(filename=name, sha=f"blob-{name}", status="modified", patch=None,
+                        additions=1, deletions=0, previous_filename=None)
+            for name in names
+        ]
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="h", base_sha="b")
+
+        # Act
+        pages = [
+            [file.filename for file in page]
+            async for page in client.iter_changed_python_files(12345, 'owner', 'repo', 1, context=context)
+        ]
+
+        # Assert
+        assert pages == [["a.py"], ["b.py", "c.py"]]
+        assert [file.filename for file in context.files] == ["a.py", "b.py", "c.py"]
+        assert context.changed_file("c.py").sha == "blob-c.py"
+        mock_repo.get_pull.assert_called_once_with(1)
+
+    @pytest.mark.asyncio
+    async def test_iter_changed_python_files_github_exception(self, mocker, mock_github_instance, capsys, client):
+        """Test that listing errors end the stream and are reported"""
+        # Arrange
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        client.auth.get_github_instance.return_value = mock_github
+        mock_repo.get_pull.side_effect = GithubException(status=404, data={'message': 'Pull request not found'})
+
+        # Act
+        pages = [page async for page in client.iter_changed_python_files(12345, 'owner', 'repo', 1)]
+
+        # Assert
+        assert pages == []
+        assert "GitHub API error getting changed files: Pull request not found" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_iter_changed_python_files_flags_partial_listing(self, mocker, mock_github_instance, capsys, client):
+        """Test that an error after the first page marks the listing incomplete"""
+        # Arrange
+        mocker.patch.object(config, "GITHUB_PER_PAGE", 1)
+        mock_github, mock_repo, mock_pr = mock_github_instance
+        client.auth.get_github_instance.return_value = mock_github
+
+        def files():
+            yield mocker.Mock(filename="a.py", sha="blob-a", status="modified", patch=None,
+                              additions=1, deletions=0, previous_filename=None)
+            raise GithubException(status=502, data={'message': 'Bad gateway'})
+
+        mock_pr.get_files.return_value = files()
+        context = PullRequestContext(12345, 'owner', 'repo', 1, head_sha="h", base_sha="b")
+
+        # Act
+        pages = [page async for page in client.iter_changed_python_files(12345, 'owner', 'repo', 1, context=context)]
+
+        # Assert
+        assert [[file.filename for file in page] for page in pages] == [["a.py"]]
+        assert context.incomplete is True
+        assert "GitHub API error getting changed files: Bad gateway" in capsys.readouterr().out
@@ -0,0 +1,53 @@
+from src.github_app.security.github_client_pool import GitHubClientPool
+
+
+class TestGitHubClientPool:
+    """Test suite for GitHubClientPool class"""
+
+    def test_reuses_client_for_same_token(self, mocker):
+        """Test that repeated lookups with the same token share one client"""
+        # Arrange
+        factory = mocker.Mock(side_effect=lambda token: mocker.Mock(name=token))
+        pool = GitHubClientPool(factory, max_size=4)
+
+        # Act
+        first = pool.get(12345, "tok-1")
+        second = pool.get(12345, "tok-1")
+
+        # Assert
+        assert first is second
+        factory.assert_called_once_with("tok-1")
+        assert pool.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_swaps_client_when_token_rotates(self, mocker):
+        """Test that a rotated token replaces and closes the old client"""
+        # Arrange
+        factory = mocker.Mock(side_effect=lambda token: mocker.Mock(name=token))
+        pool = GitHubClientPool(factory, max_size=4)
+        old_client = pool.get(12345, "tok-1")
+
+        # Act
+        new_client = pool.get(12345, "tok-2")
+
+        # Assert
+        assert new_client is not old_client
+        old_client.close.assert_called_once()
+        new_client.close.assert_not_called()
+
+    def test_evicts_least_recently_used_installation(self, mocker):
+        """Test that the pool stays bounded by evicting the LRU client"""
+        # Arrange
+        factory = mocker.Mock(side_effect=lambda token: mocker.Mock(name=token))
+        pool = GitHubClientPool(factory, max_size=2)
+        client_1 = pool.get(1, "tok-1")
+        client_2 = pool.get(2, "tok-2")
+        pool.get(1, "tok-1")
+
+        # Act
+        pool.get(3, "tok-3")
+
+        # Assert
+        client_2.close.assert_called_once()
+        client_1.close.assert_not_called()
+        assert pool.get(1, "tok-1") is client_1
+        assert pool.stats()["size"] == 2
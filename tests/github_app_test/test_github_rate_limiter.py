@@ -0,0 +1,208 @@
+import pytest
+
+from github_app.handlers.github_rate_limiter import (
+    DeferredWaits, GitHubRateLimiter, RateLimitDeferred, current_deferred_waits,
+)
+
+
+class FakeClock:
+    """Clock whose sleep advances time instantly"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, content=b""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+
+def budget_headers(remaining, limit=5000, reset_in=600, now=1_000_000.0):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(now + reset_in)),
+    }
+
+
+class TestGitHubRateLimiter:
+    """Test suite for GitHubRateLimiter"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def limiter(self, clock):
+        return GitHubRateLimiter(pace_fraction=0.2, max_wait_seconds=120, clock=clock, sleep=clock.sleep)
+
+    def test_no_pacing_with_plenty_of_budget(self, limiter, clock):
+        """Test that requests are not delayed while the budget is healthy"""
+        # Arrange
+        limiter.after_response(1, 200, budget_headers(remaining=4000))
+
+        # Act
+        limiter.before_request(1)
+
+        # Assert
+        assert clock.sleeps == []
+
+    def test_low_budget_is_spread_until_reset(self, limiter, clock):
+        """Test that a low budget paces requests evenly over the time left"""
+        # Arrange - 100 requests left, 600 seconds to the reset
+        limiter.after_response(1, 200, budget_headers(remaining=100))
+
+        # Act
+        limiter.before_request(1)
+
+        # Assert
+        assert clock.sleeps == [pytest.approx(6.0)]
+        assert limiter.state(1).remaining == 99
+
+    def test_concurrent_requests_take_successive_slots(self, limiter, clock):
+        """Test that requests reserved together are spaced out instead of sent as a burst"""
+        # Arrange
+        limiter.after_response(1, 200, budget_headers(remaining=100))
+
+        # Act
+        delays = [limiter.delay_for(1) for _ in range(3)]
+
+        # Assert - 6s apart, recomputed from the shrinking budget
+        assert delays == [pytest.approx(6.0), pytest.approx(6.0 + 600 / 99), pytest.approx(6.0 + 600 / 99 + 600 / 98)]
+
+    def test_budgets_are_per_resource(self, limiter, clock):
+        """Test that a GraphQL response does not overwrite the REST budget"""
+        # Arrange
+        limiter.after_response(1, 200, budget_headers(remaining=4000))
+        limiter.after_response(1, 200, {**budget_headers(remaining=10), "X-RateLimit-Resource": "graphql"})
+
+        # Act
+        limiter.before_request(1)
+
+        # Assert
+        assert clock.sleeps == []
+        assert limiter.state(1).remaining == 3999
+        assert limiter.state(1, "graphql").remaining == 10
+
+    def test_only_the_first_wait_of_a_call_is_deferred(self, limiter, clock):
+        """Test that the caller waits for the first request's slot, and later requests of the call sleep"""
+        # Arrange
+        limiter.after_response(1, 200, budget_headers(remaining=100))
+        deferred = DeferredWaits()
+        token = current_deferred_waits.set(deferred)
+
+        # Act
+        try:
+            with pytest.raises(RateLimitDeferred) as exc_info:
+                limiter.before_request(1)
+            deferred.reserved = exc_info.value.resource
+            limiter.before_request(1)
+            limiter.before_request(1)
+        finally:
+            current_deferred_waits.reset(token)
+
+        # Assert - the rerun used its reserved slot, the second request slept in the thread until the next one
+        assert exc_info.value.delay == pytest.approx(6.0)
+        assert clock.sleeps == [pytest.approx(6.0 + 600 / 99)]
+        assert limiter.state(1).remaining == 98
+
+    def test_budgets_are_per_installation(self, limiter, clock):
+        """Test that one installation's low budget does not slow down another"""
+        # Arrange
+        limiter.after_response(1, 200, budget_headers(remaining=10))
+
+        # Act
+        limiter.before_request(2)
+
+        # Assert
+        assert clock.sleeps == []
+
+    def test_secondary_limit_blocks_installation_and_retries(self, limiter, clock):
+        """Test that Retry-After blocks the installation and the request is retried"""
+        # Arrange
+        responses = [
+            FakeResponse(403, {"Retry-After": "30"}, b'{"message": "You have exceeded a secondary rate limit"}'),
+            FakeResponse(200, budget_headers(remaining=4000)),
+        ]
+
+        # Act
+        response = limiter.call(1, lambda: responses.pop(0))
+
+        # Assert
+        assert response.status_code == 200
+        assert clock.sleeps == [30.0]
+        assert limiter.stats()["retries"] == 1
+        assert limiter.stats()["rate_limited"] == 1
+
+    def test_secondary_limit_without_retry_after_backs_off(self, clock):
+        """Test the default backoff for secondary limits without Retry-After"""
+        # Arrange
+        limiter = GitHubRateLimiter(secondary_backoff_seconds=60, clock=clock, sleep=clock.sleep)
+        responses = [
+            FakeResponse(403, {}, b'{"message": "You have exceeded a secondary rate limit"}'),
+            FakeResponse(200),
+        ]
+
+        # Act
+        limiter.call(1, lambda: responses.pop(0))
+
+        # Assert
+        assert clock.sleeps == [60.0]
+
+    def test_exhausted_budget_waits_for_reset(self, limiter, clock):
+        """Test that a primary limit with a near reset waits for it and retries"""
+        # Arrange
+        responses = [FakeResponse(403, budget_headers(remaining=0, reset_in=45)), FakeResponse(200)]
+
+        # Act
+        response = limiter.call(1, lambda: responses.pop(0))
+
+        # Assert
+        assert response.status_code == 200
+        assert clock.sleeps == [45.0]
+
+    def test_long_waits_are_not_retried(self, limiter, clock):
+        """Test that a reset too far away returns the error instead of holding the thread"""
+        # Arrange
+        responses = [FakeResponse(403, budget_headers(remaining=0, reset_in=1800)), FakeResponse(200)]
+
+        # Act
+        response = limiter.call(1, lambda: responses.pop(0))
+
+        # Assert
+        assert response.status_code == 403
+        assert clock.sleeps == []
+
+    def test_plain_forbidden_is_not_retried(self, limiter, clock):
+        """Test that permission errors are returned immediately"""
+        # Arrange
+        responses = [FakeResponse(403, budget_headers(remaining=4000), b'{"message": "Resource not accessible"}')]
+
+        # Act
+        response = limiter.call(1, lambda: responses.pop(0))
+
+        # Assert
+        assert response.status_code == 403
+        assert limiter.stats()["retries"] == 0
+
+    def test_gives_up_after_max_retries(self, clock):
+        """Test that persistent secondary limits are returned after max_retries"""
+        # Arrange
+        limiter = GitHubRateLimiter(max_retries=2, clock=clock, sleep=clock.sleep)
+
+        # Act
+        response = limiter.call(1, lambda: FakeResponse(429, {"Retry-After": "1"}))
+
+        # Assert
+        assert response.status_code == 429
+        assert limiter.stats()["retries"] == 2
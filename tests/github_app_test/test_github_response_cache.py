@@ -0,0 +1,94 @@
+import requests
+
+from src.github_app.handlers.github_response_cache import ConditionalResponseCache
+
+
+def make_response(status_code, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {})
+    response.encoding = "utf-8"
+    return response
+
+
+class TestConditionalResponseCache:
+    """Test suite for ConditionalResponseCache"""
+
+    def test_stores_and_replays_on_304(self):
+        """Test that a 304 is answered with the stored body and fresh headers"""
+        # Arrange
+        cache = ConditionalResponseCache()
+        key = cache.key(1, "api.github.com:443/repos/o/r", {"Accept": "application/json"})
+        cache.resolve(key, make_response(200, b'{"id": 1}', {"ETag": '"v1"', "X-RateLimit-Remaining": "10"}))
+
+        # Act
+        headers, cached = cache.conditional_headers(key, {"Accept": "application/json"})
+        response = cache.resolve(key, make_response(304, headers={"X-RateLimit-Remaining": "9"}))
+
+        # Assert
+        assert cached
+        assert headers["If-None-Match"] == '"v1"'
+        assert response.status_code == 200
+        assert response.json() == {"id": 1}
+        assert response.headers["X-RateLimit-Remaining"] == "9"
+        assert cache.stats()["not_modified"] == 1
+
+    def test_last_modified_validator(self):
+        """Test that Last-Modified is sent back as If-Modified-Since"""
+        # Arrange
+        cache = ConditionalResponseCache()
+        key = cache.key(1, "host:443/x", {})
+        cache.resolve(key, make_response(200, b"{}", {"Last-Modified": "Tue, 01 Oct 2024 00:00:00 GMT"}))
+
+        # Act
+        headers, _ = cache.conditional_headers(key, {})
+
+        # Assert
+        assert headers == {"If-Modified-Since": "Tue, 01 Oct 2024 00:00:00 GMT"}
+
+    def test_entries_are_per_installation_and_accept_header(self):
+        """Test that other installations and media types do not share entries"""
+        # Arrange
+        cache = ConditionalResponseCache()
+        cache.resolve(cache.key(1, "host:443/x", {"Accept": "json"}), make_response(200, b"{}", {"ETag": '"a"'}))
+
+        # Act
+        _, other_installation = cache.conditional_headers(cache.key(2, "host:443/x", {"Accept": "json"}), {})
+        _, other_media_type = cache.conditional_headers(cache.key(1, "host:443/x", {"Accept": "raw"}), {})
+
+        # Assert
+        assert not other_installation
+        assert not other_media_type
+        assert cache.stats()["misses"] == 2
+
+    def test_responses_without_validators_are_not_stored(self):
+        """Test that responses without ETag or Last-Modified are passed through"""
+        # Arrange
+        cache = ConditionalResponseCache()
+        key = cache.key(1, "host:443/x", {})
+
+        # Act
+        cache.resolve(key, make_response(200, b"{}"))
+        cache.resolve(cache.key(1, "host:443/y", {}), make_response(404, b"{}", {"ETag": '"a"'}))
+
+        # Assert
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used_by_size(self):
+        """Test byte-bounded LRU eviction"""
+        # Arrange
+        cache = ConditionalResponseCache(max_bytes=10)
+        keys = [cache.key(1, f"host:443/{i}", {}) for i in range(3)]
+        cache.resolve(keys[0], make_response(200, b"aaaa", {"ETag": '"0"'}))
+        cache.resolve(keys[1], make_response(200, b"bbbb", {"ETag": '"1"'}))
+        cache.conditional_headers(keys[0], {})
+
+        # Act
+        cache.resolve(keys[2], make_response(200, b"cccc", {"ETag": '"2"'}))
+
+        # Assert
+        assert cache.conditional_headers(keys[1], {})[1] is False
+        assert cache.conditional_headers(keys[0], {})[1] is True
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] == 8
@@ -0,0 +1,395 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from github import Auth, Github
+
+from src.github_app.handlers.git_hub_client import GitHubClient
+from src.github_app.handlers.github_executor import GitHubExecutor
+from src.github_app.handlers.pull_request_context import PullRequestContext
+from src.github_app.security.auth import GitHubAuth
+from github_app.configure.config import config
+from github_app.handlers.github_transport import TRANSPORT_RETRY, SharedSessionHTTPSConnection, close_transport
+from github_app.monitoring.metrics import GITHUB_REQUESTS, GITHUB_REQUESTS_IN_FLIGHT
+from github_app.monitoring.tracing import tracer
+
+RESPONSE_DELAY = 0.1
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Minimal GitHub REST API serving one repository with one pull request"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(RESPONSE_DELAY)
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        path = self.path.split("?")[0]
+        if path == "/repos/owner/repo/pulls/2" and self.server.secondary_limits > 0:
+            self.server.secondary_limits -= 1
+            body = b'{"message": "You have exceeded a secondary rate limit."}'
+            self.send_response(403)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if path == "/repos/owner/repo":
+            payload = {"url": f"{base}/repos/owner/repo", "name": "repo", "full_name": "owner/repo"}
+        elif path in ("/repos/owner/repo/pulls/1", "/repos/owner/repo/pulls/2"):
+            payload = {
+                "url": f"{base}{path}",
+                "number": int(path[-1]),
+                "head": {"sha": "headsha"},
+                "base": {"sha": "basesha"},
+            }
+        elif path in ("/repos/owner/repo/pulls/1/files", "/repos/owner/repo/pulls/2/files"):
+            payload = [
+                {"filename": "src/main.py", "sha": "blob1", "status": "modified"},
+                {"filename": "README.md", "sha": "blob2", "status": "modified"},
+            ]
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag and not self.server.low_budget:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.server.remaining -= 1
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_json(body, self.server.remaining)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.startswith("/app/installations/"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.server.minted += 1
+        self.send_response(201)
+        body = json.dumps({"token": "installation-token", "expires_at": "2099-01-01T00:00:00Z"}).encode("utf-8")
+        # The app's JWT budget, not the installation's
+        self.send_json(body, 4321)
+
+    def send_json(self, body, remaining):
+        # A low budget keeps every response paced: 20 requests left, reset within two seconds
+        if self.server.low_budget:
+            remaining = 20
+        reset = int(time.time()) + (2 if self.server.low_budget else 3600)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(reset))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestGitHubTransport:
+    """Test suite for the non-blocking GitHub transport against a local fake GitHub server"""
+
+    @pytest.fixture
+    def fake_github(self):
+        """Run the fake GitHub server on a free local port"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHubHandler)
+        server.connections = 0
+        server.remaining = 5000
+        server.secondary_limits = 0
+        server.not_modified = 0
+        server.low_budget = False
+        server.minted = 0
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture
+    def client(self, mocker, fake_github):
+        """Create a GitHubClient whose auth returns a Github bound to the fake server"""
+        mock_auth = mocker.Mock()
+        # The client installs the transport (with its rate limiter) before the Github is built
+        client = GitHubClient(mock_auth, executor=GitHubExecutor(max_workers=4))
+        github = Github(
+            auth=Auth.Token("test-token"),
+            base_url=f"http://127.0.0.1:{fake_github.server_port}",
+            retry=None,
+            seconds_between_requests=None,
+        )
+        mock_auth.get_github_instance.return_value = github
+        yield client
+        client.executor.shutdown()
+        close_transport()
+
+    @pytest.mark.asyncio
+    async def test_get_changed_python_files_over_http(self, client):
+        """Test that the shared-session transport talks to a real HTTP server"""
+        # Act
+        result = await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert
+        assert result == ['src/main.py']
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self, client):
+        """Test that concurrent events overlap their I/O instead of running back to back"""
+        # Each call makes three sequential requests (repo, pull, files)
+        sequential_time = 4 * 3 * RESPONSE_DELAY
+
+        # Act
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            client.get_changed_python_files(12345, 'owner', 'repo', 1) for _ in range(4)
+        ])
+        elapsed = time.perf_counter() - started
+
+        # Assert
+        assert results == [['src/main.py']] * 4
+        assert elapsed < sequential_time / 2
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self, client):
+        """Test that a slow GitHub call does not block other coroutines"""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        # Act
+        ticker_task = asyncio.create_task(ticker())
+        await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+        ticker_task.cancel()
+
+        # Assert - the loop kept ticking for most of the ~0.3s spent waiting on GitHub
+        assert ticks > 10
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, client, fake_github):
+        """Test that keep-alive connections are reused across calls"""
+        # Act
+        for _ in range(3):
+            await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert - nine requests were served over a single connection
+        assert fake_github.connections == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_pool_is_sized_from_config(self, client, fake_github):
+        """Test that the first client to connect does not choose the shared pool size and retry policy"""
+        # Arrange - a client built with PyGithub's defaults (10 connections, GithubRetry)
+        client.auth.get_github_instance.return_value = Github(
+            auth=Auth.Token("test-token"), base_url=f"http://127.0.0.1:{fake_github.server_port}", pool_size=2
+        )
+
+        # Act
+        await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert
+        session, = SharedSessionHTTPSConnection._sessions.values()
+        adapter = session.get_adapter(f"http://127.0.0.1:{fake_github.server_port}")
+        assert adapter._pool_maxsize == max(config.GITHUB_HTTP_POOL_SIZE, config.GITHUB_IO_WORKERS)
+        assert adapter.max_retries is TRANSPORT_RETRY
+        assert adapter.max_retries.status == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_headers_are_tracked_per_installation(self, client):
+        """Test that each response's remaining budget is recorded for the installation that made it"""
+        # Act
+        await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert
+        assert client.rate_limiter.state(12345).remaining == 4997
+        assert client.rate_limiter.state(12345).limit == 5000
+        assert client.rate_limiter.state(67890).remaining is None
+
+    @pytest.mark.asyncio
+    async def test_secondary_rate_limit_is_retried(self, client, fake_github, capsys):
+        """Test that a secondary rate limit response is retried after Retry-After instead of failing"""
+        # Arrange
+        fake_github.secondary_limits = 1
+
+        # Act
+        result = await client.get_changed_python_files(12345, 'owner', 'repo', 2)
+
+        # Assert
+        assert result == ['src/main.py']
+        assert client.rate_limiter.stats()["retries"] == 1
+        assert "GitHub rate limit hit for installation 12345" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_paced_installation_does_not_hold_io_threads(self, client):
+        """Test that a paced request waits off the executor while other installations use its thread"""
+        # Arrange - a single I/O thread, and one request left for 12345 until a reset in 0.5s
+        client.executor.shutdown()
+        client.executor = GitHubExecutor(max_workers=1)
+        state = client.rate_limiter.state(12345)
+        state.remaining, state.limit, state.reset_at = 1, 5000, time.time() + 0.5
+        finished = []
+
+        async def fetch(installation_id):
+            await client.get_changed_python_files(installation_id, 'owner', 'repo', 1)
+            finished.append(installation_id)
+
+        # Act
+        await asyncio.gather(fetch(12345), fetch(67890))
+
+        # Assert
+        assert finished == [67890, 12345]
+        assert client.rate_limiter.stats()["paced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_calls_with_several_requests_finish_under_a_low_budget(self, client, fake_github):
+        """Test that a paced call sends each request once, and paged listings are not cut short"""
+        # Arrange
+        fake_github.low_budget = True
+        await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+        served = fake_github.remaining
+        context = PullRequestContext(12345, 'owner', 'repo', 1)
+
+        # Act - both calls make three requests, all of them paced
+        listed = await asyncio.wait_for(client.get_changed_python_files(12345, 'owner', 'repo', 1), timeout=10)
+        pages = await asyncio.wait_for(self.collect(client.iter_changed_python_files(
+            12345, 'owner', 'repo', 1, context=context
+        )), timeout=10)
+
+        # Assert
+        assert listed == ['src/main.py']
+        assert [[file.filename for file in page] for page in pages] == [['src/main.py']]
+        assert not context.incomplete
+        assert served - fake_github.remaining == 6
+        assert client.rate_limiter.stats()["paced"] >= 6
+
+    @staticmethod
+    async def collect(pages):
+        return [page async for page in pages]
+
+    @pytest.mark.asyncio
+    async def test_token_mint_is_paced_outside_the_installation(self, mocker, client, fake_github, tmp_path):
+        """Test that a paced token mint is waited for and its budget is not taken for the installation's"""
+        # Arrange
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        key_path = tmp_path / "app.pem"
+        key_path.write_bytes(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+        mocker.patch.object(config, "GITHUB_APP_ID", "1")
+        mocker.patch.object(config, "GITHUB_PRIVATE_KEY_PATH", str(key_path))
+        mocker.patch.object(config, "GITHUB_API_BASE_URL", f"http://127.0.0.1:{fake_github.server_port}")
+        client.auth = GitHubAuth()
+        # The app's own budget is nearly spent
+        app_state = client.rate_limiter.state(None)
+        app_state.remaining, app_state.limit, app_state.reset_at = 1, 5000, time.time() + 0.2
+
+        # Act
+        result = await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert
+        assert result == ['src/main.py']
+        assert fake_github.minted == 1
+        assert client.rate_limiter.state(None).remaining == 4321
+        assert client.rate_limiter.state(12345).remaining == 4997
+        assert client.rate_limiter.stats()["paced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_production_clients_leave_rate_limits_to_the_limiter(self, mocker, client, fake_github):
+        """Test that clients built by GitHubAuth do not retry 403s themselves"""
+        # Arrange
+        mocker.patch.object(config, "GITHUB_API_BASE_URL", f"http://127.0.0.1:{fake_github.server_port}")
+        github = GitHubAuth._create_github_client("test-token")
+        client.auth.get_github_instance.return_value = github
+        fake_github.secondary_limits = 1
+
+        # Act
+        result = await client.get_changed_python_files(12345, 'owner', 'repo', 2)
+
+        # Assert - the 403 was retried once, by the rate limiter
+        assert github._Github__requester._Requester__retry is None
+        assert result == ['src/main.py']
+        assert client.rate_limiter.stats()["rate_limited"] == 1
+        assert client.rate_limiter.stats()["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_responses_are_revalidated_with_etags(self, client, fake_github):
+        """Test that repeated GETs send If-None-Match and are served from the cache on 304"""
+        # Arrange
+        first = await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Act
+        second = await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+
+        # Assert
+        assert first == second == ['src/main.py']
+        assert fake_github.not_modified == 3
+        assert fake_github.remaining == 4997
+        assert client.response_cache.stats()["not_modified"] == 3
+
+    @pytest.mark.asyncio
+    async def test_requests_are_counted_by_endpoint_and_status(self, client, fake_github):
+        """Test that every HTTP attempt, retries included, is counted under its normalised endpoint"""
+        # Arrange
+        fake_github.secondary_limits = 1
+        pulls = GITHUB_REQUESTS.labels("GET", "/repos/{owner}/{repo}/pulls/{id}", 403)
+        files = GITHUB_REQUESTS.labels("GET", "/repos/{owner}/{repo}/pulls/{id}/files", 200)
+        limited_before, files_before = pulls.value, files.value
+
+        # Act
+        await client.get_changed_python_files(12345, 'owner', 'repo', 2)
+
+        # Assert
+        assert pulls.value == limited_before + 1
+        assert files.value == files_before + 1
+        assert GITHUB_REQUESTS_IN_FLIGHT.labels().value == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_are_traced_per_attempt(self, mocker, client, fake_github):
+        """Test that each HTTP attempt is a client span of the calling span, with status and cache hits"""
+        # Arrange
+        exporter = mocker.Mock()
+        tracer.configure(exporter, ["owner/repo"])
+        await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+        root = tracer.start_trace("pull_request synchronize", "owner/repo")
+
+        # Act
+        try:
+            with tracer.activate(root):
+                await client.get_changed_python_files(12345, 'owner', 'repo', 1)
+            tracer.flush()
+        finally:
+            tracer.configure(None)
+
+        # Assert
+        spans = [span for call in exporter.export.call_args_list for span in call.args[0]]
+        listing = next(span for span in spans if span.name == "get_changed_python_files")
+        http = [span for span in spans if span.kind == "client"]
+        assert [span.name for span in http] == [
+            "GET /repos/{owner}/{repo}", "GET /repos/{owner}/{repo}/pulls/{id}",
+            "GET /repos/{owner}/{repo}/pulls/{id}/files",
+        ]
+        assert all(span.parent_id == listing.span_id for span in http)
+        assert all(span.attributes["status_code"] == 304 and span.attributes["cache_hit"] for span in http)
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.github_app.services.job_queue import JobQueue
+
+
+class TestJobQueue:
+    """Test suite for JobQueue class"""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_before_job_runs(self):
+        """Test that enqueue does not wait for the job"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        finished = asyncio.Event()
+
+        async def job():
+            await asyncio.sleep(0.01)
+            finished.set()
+
+        # Act
+        queue.enqueue("job", job)
+
+        # Assert
+        assert not finished.is_set()
+        await asyncio.wait_for(finished.wait(), 1)
+        await queue.drain()
+        assert queue.stats()["processed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_bounds_concurrency(self):
+        """Test that no more than `workers` jobs run at once"""
+        # Arrange
+        queue = JobQueue(workers=2)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        # Act
+        for i in range(6):
+            queue.enqueue(f"job-{i}", job)
+        await queue.drain()
+
+        # Assert
+        assert peak == 2
+        stats = queue.stats()
+        assert stats["processed"] == 6
+        assert stats["depth"] == 0
+        assert stats["max_wait_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_failing_job_does_not_stop_worker(self, capsys):
+        """Test that job errors are counted and logged"""
+        # Arrange
+        queue = JobQueue(workers=1)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def succeeding():
+            pass
+
+        # Act
+        queue.enqueue("failing", failing)
+        queue.enqueue("succeeding", succeeding)
+        await queue.drain()
+
+        # Assert
+        assert (queue.failed, queue.processed) == (1, 1)
+        assert "Error processing job failing: boom" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_with_503(self):
+        """Test backpressure when the queue is full"""
+        # Arrange
+        queue = JobQueue(workers=1, max_size=1)
+        blocker = asyncio.Event()
+        queue.enqueue("first", blocker.wait)
+        await asyncio.sleep(0)  # let the worker pick up the first job
+        queue.enqueue("second", blocker.wait)
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            queue.enqueue("third", blocker.wait)
+        assert exc_info.value.status_code == 503
+        blocker.set()
+        await queue.drain()
+
+    @pytest.mark.asyncio
+    async def test_drain_finishes_queued_jobs_and_rejects_new_ones(self):
+        """Test graceful drain on shutdown"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        done = []
+
+        async def job():
+            await asyncio.sleep(0.01)
+            done.append(True)
+
+        for i in range(3):
+            queue.enqueue(f"job-{i}", job)
+
+        # Act
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert len(done) == 3
+        with pytest.raises(HTTPException) as exc_info:
+            queue.enqueue("late", job)
+        assert exc_info.value.status_code == 503
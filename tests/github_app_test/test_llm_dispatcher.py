@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+
+from src.github_app.analysis.llm_dispatcher import (
+    DocstringRequest, LLMBackend, LLMDispatcher, RetryableBackendError, StubBackend, TokenBucket, estimate_tokens,
+)
+from src.github_app.analysis.result_cache import AnalysisResult
+
+
+def make_request(i, docstring="Return x.", size=0):
+    return DocstringRequest(f"f{i}", "function", "def f(x)", docstring, "x" * size)
+
+
+class FlakyBackend(LLMBackend):
+    """Fails with a retryable error a given number of times"""
+
+    model_id = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def review(self, requests):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RetryableBackendError("overloaded")
+        return [AnalysisResult("", "ok") for _ in requests]
+
+
+class TestLLMDispatcher:
+    """Test suite for LLMDispatcher and the stub backend"""
+
+    def test_pack_respects_token_budget(self):
+        """Test that batches stay within the budget and oversized requests go alone"""
+        # Arrange
+        dispatcher = LLMDispatcher(StubBackend(), max_batch_tokens=100)
+        requests = [make_request(0, size=160), make_request(1, size=160), make_request(2, size=800), make_request(3)]
+
+        # Act
+        batches = dispatcher.pack(requests)
+
+        # Assert
+        assert batches == [[0, 1], [2], [3]]
+        assert sum(estimate_tokens(requests[i]) for i in batches[0]) <= 100
+
+    @pytest.mark.asyncio
+    async def test_dispatch_batches_and_limits_concurrency(self):
+        """Test that many symbols become few concurrent-limited requests, with results in order"""
+        # Arrange
+        in_flight = 0
+        peak = 0
+
+        class TrackingBackend(StubBackend):
+            async def review(self, requests):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                try:
+                    return await super().review(requests)
+                finally:
+                    in_flight -= 1
+
+        backend = TrackingBackend(latency_seconds=0.01)
+        dispatcher = LLMDispatcher(backend, max_concurrency=2, max_batch_tokens=200)
+        requests = [make_request(i, docstring=None if i % 2 else "Return x.", size=100) for i in range(100)]
+
+        # Act
+        results = await dispatcher.dispatch(1, requests)
+
+        # Assert
+        assert [r.suggestion.startswith("Add a docstring to f") for r in results] == [i % 2 == 1 for i in range(100)]
+        assert backend.calls == len(dispatcher.pack(requests)) < 100
+        assert peak == 2
+        assert dispatcher.stats()["requests"] == 100
+
+    @pytest.mark.asyncio
+    async def test_retryable_errors_are_retried(self):
+        """Test jittered retries of transient failures"""
+        # Arrange
+        backend = FlakyBackend(failures=2)
+        dispatcher = LLMDispatcher(backend, retry_base_seconds=0.001)
+
+        # Act
+        results = await dispatcher.dispatch(1, [make_request(0)])
+
+        # Assert
+        assert results == [AnalysisResult("", "ok")]
+        assert backend.calls == 3
+        assert dispatcher.stats()["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        """Test that persistent failures surface after max_retries"""
+        # Arrange
+        dispatcher = LLMDispatcher(FlakyBackend(failures=10), max_retries=1, retry_base_seconds=0.001)
+
+        # Act / Assert
+        with pytest.raises(RetryableBackendError):
+            await dispatcher.dispatch(1, [make_request(0)])
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_does_not_discard_others(self):
+        """Test that results of the batches that succeeded are returned when another batch fails"""
+        # Arrange
+        class PartialBackend(StubBackend):
+            async def review(self, requests):
+                if any(request.qualified_name == "f1" for request in requests):
+                    raise ValueError("malformed response")
+                return await super().review(requests)
+
+        dispatcher = LLMDispatcher(PartialBackend(), max_batch_tokens=30)
+        requests = [make_request(i, size=80) for i in range(3)]
+
+        # Act
+        results = await dispatcher.dispatch(1, requests)
+
+        # Assert
+        assert [result is None for result in results] == [False, True, False]
+        assert dispatcher.stats()["failed_batches"] == 1
+        assert dispatcher.stats()["requests"] == 2
+
+    def test_backend_must_implement_review(self):
+        """Test that the backend interface cannot be used without a review method"""
+        # Arrange
+        class Incomplete(LLMBackend):
+            model_id = "incomplete"
+
+        # Act / Assert
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_throttles_per_minute(self):
+        """Test that a drained budget waits for its refill"""
+        # Arrange
+        bucket = TokenBucket(tokens_per_minute=6000)  # 100 tokens per second
+
+        # Act
+        first_wait = await bucket.acquire(6000)
+        second_wait = await bucket.acquire(10)
+
+        # Assert
+        assert first_wait == 0
+        assert 0.05 <= second_wait <= 0.2
+
+    @pytest.mark.asyncio
+    async def test_budgets_are_per_installation(self):
+        """Test that one installation's spending does not throttle another"""
+        # Arrange
+        dispatcher = LLMDispatcher(StubBackend(), tokens_per_minute=60)
+        request = make_request(0, size=200)
+
+        # Act
+        await dispatcher.dispatch(1, [request])
+        await asyncio.wait_for(dispatcher.dispatch(2, [request]), timeout=0.5)
+
+        # Assert
+        assert dispatcher.stats()["throttled_seconds"] == 0
+
+    def test_stub_backend_is_deterministic(self):
+        """Test the stub's offline review rules"""
+        # Arrange
+        undocumented = DocstringRequest("f", "function", "def f(a)", None, "")
+        missing = DocstringRequest("C.m", "method", "def m(self, a, *, b=1)", "Use a.", "")
+        consistent = DocstringRequest("g", "function", "async def g(a) -> int", "Return a.", "")
+
+        # Act
+        results = [StubBackend._review(request) for request in (undocumented, missing, consistent)]
+
+        # Assert
+        assert results == [
+            AnalysisResult("Add a docstring to f.", "The function has no docstring."),
+            AnalysisResult(
+                "Document b in the docstring of C.m.", "The signature has parameters the docstring does not mention."
+            ),
+            AnalysisResult("", "The docstring is consistent with the signature."),
+        ]
@@ -0,0 +1,173 @@
+import pytest
+
+from github_app.monitoring import metrics as app_metrics
+from src.github_app.main import create_app
+from src.github_app.monitoring.metrics import MetricsRegistry, _Metric, _github_endpoint, github_endpoint, time_stage
+from src.github_app.monitoring.metrics import STAGE_DURATION, STAGE_ERRORS, STAGE_IN_FLIGHT
+
+
+class TestMetricsRegistry:
+    """Test suite for the Prometheus metrics registry"""
+
+    def test_counter_renders_one_line_per_label_set(self):
+        """Test that labelled counters are rendered with escaped label values"""
+        # Arrange
+        metrics = MetricsRegistry()
+        counter = metrics.counter("calls_total", "Calls.", ["endpoint", "status"])
+
+        # Act
+        counter.labels("/repos", 200).inc()
+        counter.labels("/repos", 200).inc(2)
+        counter.labels('say "hi"', 404).inc()
+        text = metrics.render()
+
+        # Assert
+        assert "# TYPE docs_sync_calls_total counter" in text
+        assert 'docs_sync_calls_total{endpoint="/repos",status="200"} 3.0' in text
+        assert 'docs_sync_calls_total{endpoint="say \\"hi\\"",status="404"} 1.0' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that bucket counts include every smaller bucket, ending with +Inf"""
+        # Arrange
+        metrics = MetricsRegistry()
+        histogram = metrics.histogram("seconds", "Durations.", ["stage"], buckets=(0.1, 1.0))
+
+        # Act
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.labels("parse").observe(value)
+        lines = metrics.render().splitlines()
+
+        # Assert
+        assert 'docs_sync_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+        assert 'docs_sync_seconds_bucket{stage="parse",le="1.0"} 3' in lines
+        assert 'docs_sync_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+        assert 'docs_sync_seconds_sum{stage="parse"} 6.05' in lines
+        assert 'docs_sync_seconds_count{stage="parse"} 4' in lines
+
+    def test_wrong_label_count_is_rejected(self):
+        """Test that a label set of the wrong arity fails instead of producing a malformed series"""
+        # Arrange
+        counter = MetricsRegistry().counter("calls_total", "Calls.", ["endpoint"])
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            counter.labels("/repos", 200)
+
+    def test_collectors_export_numeric_stats(self, capsys):
+        """Test that component stats are rendered at scrape time and a failing one is skipped"""
+        # Arrange
+        metrics = MetricsRegistry()
+        hits = {"hits": 1}
+        metrics.register_collector("blob_cache", lambda: {**hits, "min_remaining": None})
+        metrics.register_collector("broken", lambda: 1 / 0)
+
+        # Act
+        hits["hits"] = 7
+        text = metrics.render()
+
+        # Assert
+        assert "docs_sync_blob_cache_hits 7" in text
+        assert "min_remaining" not in text
+        assert "Error collecting broken metrics" in capsys.readouterr().out
+
+        # Unregistered collectors are no longer rendered
+        metrics.unregister_collector("blob_cache")
+        assert "blob_cache" not in metrics.render()
+
+
+class TestTimeStage:
+    """Test suite for time_stage"""
+
+    def test_records_duration_and_in_flight(self):
+        """Test that the stage is in flight while it runs and observed once it ends"""
+        # Arrange
+        duration = STAGE_DURATION.labels("test_stage")
+        in_flight = STAGE_IN_FLIGHT.labels("test_stage")
+        count_before = sum(duration.counts)
+
+        # Act
+        with time_stage("test_stage"):
+            running = in_flight.value
+
+        # Assert
+        assert running == 1
+        assert in_flight.value == 0
+        assert sum(duration.counts) == count_before + 1
+
+    def test_counts_errors(self):
+        """Test that a stage that raises is still timed and counted as an error"""
+        # Arrange
+        errors = STAGE_ERRORS.labels("failing_stage")
+        errors_before = errors.value
+
+        # Act
+        with pytest.raises(RuntimeError):
+            with time_stage("failing_stage"):
+                raise RuntimeError("boom")
+
+        # Assert
+        assert errors.value == errors_before + 1
+        assert STAGE_IN_FLIGHT.labels("failing_stage").value == 0
+
+
+class TestMetricFamilies:
+    """Test suite for the metric family base class"""
+
+    def test_family_must_create_children(self):
+        """Test that a metric family without a child type cannot be instantiated"""
+        # Arrange
+        class Untyped(_Metric):
+            pass
+
+        # Act / Assert
+        with pytest.raises(TypeError):
+            Untyped("untyped", "No children.")
+
+
+class TestGitHubEndpoint:
+    """Test suite for github_endpoint"""
+
+    @pytest.mark.parametrize("url, endpoint", [
+        ("/repos/octo/app/pulls/12/files?per_page=100&page=2", "/repos/{owner}/{repo}/pulls/{id}/files"),
+        ("/repos/octo/app/contents/src/app/main.py?ref=abc", "/repos/{owner}/{repo}/contents/{path}"),
+        ("/repos/octo/app/tarball/" + "a" * 40, "/repos/{owner}/{repo}/tarball/{ref}"),
+        ("/repos/octo/app/compare/abc...def", "/repos/{owner}/{repo}/compare/{basehead}"),
+        ("/repos/octo/app/git/blobs/" + "b" * 40, "/repos/{owner}/{repo}/git/blobs/{sha}"),
+        ("/app/installations/123/access_tokens", "/app/installations/{id}/access_tokens"),
+        ("/graphql", "/graphql"),
+    ])
+    def test_paths_are_normalised(self, url, endpoint):
+        """Test that owners, numbers, SHAs and file paths do not become label values"""
+        assert github_endpoint(url) == endpoint
+
+    def test_query_strings_share_a_cache_entry(self):
+        """Test that every page of a listing is normalised from one cached path"""
+        # Arrange
+        urls = [f"/repos/octo/app/pulls/7/files?per_page=100&page={page}" for page in range(1, 50)]
+        _github_endpoint.cache_clear()
+
+        # Act
+        endpoints = {github_endpoint(url) for url in urls}
+
+        # Assert
+        assert endpoints == {"/repos/{owner}/{repo}/pulls/{id}/files"}
+        assert _github_endpoint.cache_info().currsize == 1
+
+
+class TestMetricsRoute:
+    """Test suite for the /metrics route"""
+
+    @pytest.mark.asyncio
+    async def test_metrics_route_serves_text_format(self):
+        """Test that /metrics renders the registry the app instruments as Prometheus text"""
+        # Arrange
+        app = create_app()
+        route = next(route for route in app.routes if getattr(route, "path", None) == "/metrics")
+
+        # Act
+        response = await route.endpoint()
+
+        # Assert
+        assert response.media_type.startswith("text/plain; version=0.0.4")
+        assert response.body.decode("utf-8") == app_metrics.registry.render()
+        assert b"docs_sync_stage_duration_seconds" in response.body
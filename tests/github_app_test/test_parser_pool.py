@@ -0,0 +1,76 @@
+import pytest
+
+from src.github_app.analysis.parser_pool import ParserPool
+
+BASE = "def f(x):\n    return x\n\n\ndef g():\n    return 1\n"
+HEAD = "def f(x):\n    return x + 1\n\n\ndef h():\n    return 2\n"
+
+
+class TestParserPool:
+    """Test suite for ParserPool"""
+
+    @pytest.mark.asyncio
+    async def test_small_sources_are_parsed_inline(self):
+        """Test that sources under the threshold never start worker processes"""
+        # Arrange
+        pool = ParserPool(max_workers=2, inline_max_bytes=1024)
+
+        # Act
+        diff = await pool.diff("m.py", HEAD, BASE)
+
+        # Assert
+        assert [head.qualified_name for _, head in diff.modified] == ["f"]
+        assert pool.stats() == {"inline": 2, "offloaded": 0, "failed": 0}
+        assert pool._executor is None
+
+    @pytest.mark.asyncio
+    async def test_large_sources_are_parsed_in_workers(self):
+        """Test that sources over the threshold are parsed in the process pool"""
+        # Arrange
+        pool = ParserPool(max_workers=2, inline_max_bytes=0)
+
+        try:
+            # Act
+            diff = await pool.diff("m.py", HEAD, BASE)
+            table = await pool.extract(HEAD, "m.py")
+        finally:
+            pool.shutdown()
+
+        # Assert
+        assert [s.qualified_name for s in diff.added] == ["h"]
+        assert [s.qualified_name for s in diff.removed] == ["g"]
+        assert [s.qualified_name for s in table.overlapping(2, 2)] == ["f"]
+        assert pool.stats()["offloaded"] == 3
+
+    @pytest.mark.asyncio
+    async def test_threshold_counts_encoded_bytes(self):
+        """Test that non-ASCII sources are measured in UTF-8 bytes and offloaded to fork server workers"""
+        # Arrange - 13 characters, 19 bytes
+        source = 'S = "' + "\u00e9" * 6 + '"\n'
+        pool = ParserPool(max_workers=1, inline_max_bytes=16)
+
+        try:
+            # Act
+            table = await pool.extract(source, "m.py")
+            start_method = pool._executor._mp_context.get_start_method()
+        finally:
+            pool.shutdown()
+
+        # Assert
+        assert len(table) == 0
+        assert pool.stats()["offloaded"] == 1
+        assert start_method == "forkserver"
+
+    @pytest.mark.asyncio
+    async def test_unparsable_source_returns_none(self, capsys):
+        """Test that syntax errors are logged and yield no diff"""
+        # Arrange
+        pool = ParserPool(inline_max_bytes=1024)
+
+        # Act
+        diff = await pool.diff("bad.py", "def broken(:\n", BASE)
+
+        # Assert
+        assert diff is None
+        assert pool.stats()["failed"] == 1
+        assert "Error parsing bad.py" in capsys.readouterr().out
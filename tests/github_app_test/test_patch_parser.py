@@ -0,0 +1,102 @@
+import pytest
+
+from src.github_app.analysis.patch_parser import FileChanges, Hunk, merge_lines, parse_patch
+from src.github_app.handlers.pull_request_context import ChangedFile
+
+PATCH = """@@ -1,5 +1,6 @@
+ import os
+-import sys
++import re
++import json
+ 
+ 
+ def main():
+@@ -20,4 +21,3 @@ def helper():
+     a = 1
+-    b = 2
+-    c = 3
++    c = 4
+\\ No newline at end of file"""
+
+
+class TestPatchParser:
+    """Test suite for the unified diff parser"""
+
+    def test_parse_patch_hunks_and_ranges(self):
+        """Test that hunks and changed head/base lines are extracted"""
+        # Act
+        hunks, head_ranges, base_ranges = parse_patch(PATCH)
+
+        # Assert
+        assert hunks == [Hunk(1, 5, 1, 6), Hunk(20, 4, 21, 3)]
+        assert head_ranges == [(1, 3), (21, 22)]
+        assert base_ranges == [(2, 2), (21, 22)]
+
+    def test_parse_patch_single_line_hunks(self):
+        """Test hunk headers that omit the line count"""
+        # Act
+        hunks, head_ranges, base_ranges = parse_patch("@@ -3 +3 @@\n-old\n+new")
+
+        # Assert
+        assert hunks == [Hunk(3, 1, 3, 1)]
+        assert head_ranges == [(2, 3)]
+        assert base_ranges == [(3, 3)]
+
+    def test_parse_patch_new_file(self):
+        """Test that an added file's patch only has head lines"""
+        # Act
+        hunks, head_ranges, base_ranges = parse_patch("@@ -0,0 +1,3 @@\n+a\n+b\n+c")
+
+        # Assert
+        assert hunks == [Hunk(0, 0, 1, 3)]
+        assert head_ranges == [(1, 3)]
+        assert base_ranges == [(1, 1)]
+
+    def test_parse_patch_rejects_malformed_header(self):
+        """Test that a corrupt hunk header raises"""
+        with pytest.raises(ValueError):
+            parse_patch("@@ broken @@\n+x")
+
+    def test_merge_lines(self):
+        """Test collapsing line numbers into ranges"""
+        assert merge_lines([5, 1, 2, 3, 7, 6, 2]) == [(1, 3), (5, 7)]
+
+    def test_file_changes_touches(self):
+        """Test overlap checks against changed head lines"""
+        # Arrange
+        changes = FileChanges.from_changed_file(ChangedFile("a.py", patch=PATCH))
+
+        # Act / Assert
+        assert changes.touches(3, 10)
+        assert changes.touches(22, 30)
+        assert not changes.touches(4, 20)
+        assert changes.touches(21, 21, ref_type="base")
+        assert not changes.touches(3, 20, ref_type="base")
+
+    @pytest.mark.parametrize("status, previous_filename, head_path, base_path", [
+        ("modified", None, "new.py", "new.py"),
+        ("added", None, "new.py", None),
+        ("removed", None, None, "new.py"),
+        ("renamed", "old.py", "new.py", "old.py"),
+    ])
+    def test_file_changes_revision_paths(self, status, previous_filename, head_path, base_path):
+        """Test which revisions exist for each file status"""
+        # Act
+        changes = FileChanges.from_changed_file(
+            ChangedFile("new.py", status=status, patch="", previous_filename=previous_filename)
+        )
+
+        # Assert
+        assert (changes.head_path, changes.base_path) == (head_path, base_path)
+
+    def test_file_changes_without_patch(self):
+        """Test that files GitHub sent no patch for count as entirely changed"""
+        # Act
+        changes = FileChanges.from_changed_file(ChangedFile("big.py", additions=5000))
+        rename = FileChanges.from_changed_file(ChangedFile("b.py", status="renamed", previous_filename="a.py"))
+
+        # Assert
+        assert not changes.complete
+        assert changes.touches(1, 1)
+        assert rename.complete
+        assert not rename.touches(1, 1000)
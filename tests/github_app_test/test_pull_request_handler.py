@@ -0,0 +1,349 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from github_app.configure.config import Config
+from github_app.monitoring.tracing import tracer
+from src.github_app.handlers.pull_request_handler import PullRequestEventHandler
+from src.github_app.security.delivery_store import InMemoryDeliveryStore
+from src.github_app.services.pull_request_scheduler import PullRequestScheduler
+from src.github_app.services.pull_request_service import PullRequestService
+
+SECRET = "test-secret"
+
+
+def sign(body: bytes) -> str:
+    return "sha256=" + hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def make_event(action="opened"):
+    return {
+        "action": action,
+        "installation": {"id": 12345},
+        "repository": {"name": "repo", "owner": {"login": "owner"}},
+        "pull_request": {"number": 1, "head": {"sha": "headsha"}, "base": {"sha": "basesha"}},
+    }
+
+
+class TestPullRequestEventHandler:
+    """Test suite for PullRequestEventHandler class"""
+
+    @pytest.fixture(autouse=True)
+    def webhook_secret(self, mocker):
+        """Sign test deliveries with a known secret"""
+        mocker.patch.object(Config, "GITHUB_WEBHOOK_SECRET", SECRET)
+
+    @pytest.fixture
+    def service(self, mocker):
+        """Mock PullRequestService"""
+        service = mocker.Mock()
+        service.build_context.side_effect = PullRequestService.build_context
+        service.process_opened = mocker.AsyncMock(return_value={"message": "Comment posted successfully"})
+        service.process_updated = mocker.AsyncMock(return_value={"message": "Pull request #1 analysed"})
+        return service
+
+    @pytest.fixture
+    def handler(self, service, mocker):
+        """Handler with a mocked job queue"""
+        job_queue = mocker.Mock()
+        return PullRequestEventHandler(
+            service,
+            job_queue=job_queue,
+            delivery_store=InMemoryDeliveryStore(),
+            scheduler=PullRequestScheduler(job_queue, debounce_seconds=0),
+        )
+
+    @staticmethod
+    def make_request(mocker, event, chunk_size=1024, content_length=True):
+        body = event if isinstance(event, bytes) else json.dumps(event).encode("utf-8")
+
+        async def stream():
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+
+        request = mocker.Mock()
+        request.headers = {"content-length": str(len(body))} if content_length else {}
+        request.stream = stream
+        return request, sign(body)
+
+    @pytest.mark.asyncio
+    async def test_opened_event_is_queued_with_202(self, mocker, handler, service):
+        """Test that an opened PR is enqueued and acknowledged right away"""
+        # Arrange
+        request, signature = self.make_request(mocker, make_event())
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature)
+
+        # Assert
+        assert response.status_code == 202
+        handler.job_queue.enqueue.assert_called_once()
+        service.process_opened.assert_not_awaited()
+
+        # The queued job runs the service
+        name, job = handler.job_queue.enqueue.call_args.args
+        assert name == "owner/repo#1 opened"
+        await job()
+        service.process_opened.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalid_signature_is_rejected(self, mocker, handler):
+        """Test that unsigned deliveries are never queued"""
+        # Arrange
+        request, _ = self.make_request(mocker, make_event())
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await handler.handle_pull_request_event(request, "pull_request", "sha256=bad")
+        assert exc_info.value.status_code == 401
+        handler.job_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_incomplete_payload_is_rejected_before_queueing(self, mocker, handler):
+        """Test that payloads missing required fields fail fast with 400"""
+        # Arrange
+        event = make_event()
+        del event["installation"]
+        request, signature = self.make_request(mocker, event)
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await handler.handle_pull_request_event(request, "pull_request", signature)
+        assert exc_info.value.status_code == 400
+        handler.job_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_other_events_are_not_processed(self, mocker, handler):
+        """Test that non pull_request events are acknowledged and ignored"""
+        # Arrange
+        request, signature = self.make_request(mocker, {"zen": "Keep it simple"})
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "ping", signature)
+
+        # Assert
+        assert response == {"message": "Event ping not handled by this endpoint"}
+        handler.job_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_redelivery_is_ignored(self, mocker, handler):
+        """Test that a delivery ID seen before is not processed again"""
+        # Arrange
+        request, signature = self.make_request(mocker, make_event())
+        await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+
+        # Assert
+        assert response == {"message": "Delivery delivery-1 already received"}
+        handler.job_queue.enqueue.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_redelivery_of_unsigned_request_is_not_recorded(self, mocker, handler):
+        """Test that deduplication runs only after the signature is verified"""
+        # Arrange
+        request, signature = self.make_request(mocker, make_event())
+        with pytest.raises(HTTPException):
+            await handler.handle_pull_request_event(request, "pull_request", "sha256=bad", "delivery-1")
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+
+        # Assert
+        assert response.status_code == 202
+
+    @pytest.mark.asyncio
+    async def test_rejected_delivery_can_be_redelivered(self, mocker, handler):
+        """Test that a delivery that could not be queued is processed on redelivery"""
+        # Arrange
+        request, signature = self.make_request(mocker, make_event())
+        handler.job_queue.enqueue.side_effect = [HTTPException(status_code=503, detail="Job queue is full"), None]
+        with pytest.raises(HTTPException):
+            await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+
+        # Assert
+        assert response.status_code == 202
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("action", ["synchronize", "reopened"])
+    async def test_update_events_are_queued(self, mocker, handler, service, action):
+        """Test that pushes and reopens are analysed again"""
+        # Arrange
+        request, signature = self.make_request(mocker, make_event(action))
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature)
+
+        # Assert
+        assert response.status_code == 202
+        _, job = handler.job_queue.enqueue.call_args.args
+        await job()
+        service.process_updated.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_push_superseding_opened_still_posts_comment(self, mocker, handler, service):
+        """Test that a push arriving before the opened job ran takes over the opened processing"""
+        # Arrange
+        pushed = make_event("synchronize")
+        pushed["pull_request"]["head"]["sha"] = "newsha"
+        for event in (make_event(), pushed):
+            request, signature = self.make_request(mocker, event)
+            await handler.handle_pull_request_event(request, "pull_request", signature)
+        (_, opened_job), (_, push_job) = (call.args for call in handler.job_queue.enqueue.call_args_list)
+
+        # Act
+        await opened_job()
+        await push_job()
+
+        # Assert - the superseded opened job was dropped, the push posted the comment
+        service.process_opened.assert_awaited_once()
+        assert service.process_opened.await_args.args[0].head_sha == "newsha"
+        service.process_updated.assert_not_awaited()
+
+        # Later pushes are plain updates again
+        request, signature = self.make_request(mocker, make_event("synchronize"))
+        await handler.handle_pull_request_event(request, "pull_request", signature)
+        _, job = handler.job_queue.enqueue.call_args.args
+        await job()
+        service.process_updated.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_edited_without_base_change_is_ignored(self, mocker, handler):
+        """Test that title/body edits do not trigger an analysis"""
+        # Arrange
+        event = make_event("edited")
+        event["changes"] = {"title": {"from": "Old title"}}
+        request, signature = self.make_request(mocker, event)
+
+        # Act
+        response = await handler.handle_pull_request_event(request, "pull_request", signature)
+
+        # Assert
+        assert response == {"message": "Pull request edited event received but not processed"}
+        handler.job_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_oversized_payload_is_rejected_from_content_length(self, mocker, handler):
+        """Test that a declared body over the limit is refused before it is read"""
+        # Arrange
+        mocker.patch.object(Config, "WEBHOOK_MAX_PAYLOAD_BYTES", 64)
+        request, signature = self.make_request(mocker, make_event())
+        request.stream = mocker.Mock(side_effect=AssertionError("body should not be read"))
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await handler.handle_pull_request_event(request, "pull_request", signature)
+        assert exc_info.value.status_code == 413
+        handler.job_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_oversized_stream_is_cut_off(self, mocker, handler):
+        """Test that a body without Content-Length stops being read once over the limit"""
+        # Arrange
+        mocker.patch.object(Config, "WEBHOOK_MAX_PAYLOAD_BYTES", 64)
+        request, signature = self.make_request(mocker, make_event(), chunk_size=16, content_length=False)
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await handler.handle_pull_request_event(request, "pull_request", signature, "delivery-1")
+        assert exc_info.value.status_code == 413
+        # Rejected before deduplication, so a redelivery is not ignored
+        assert await handler.delivery_store.add_if_absent("delivery-1", 60)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b"\xff"])
+    async def test_invalid_json_is_rejected(self, mocker, handler, body):
+        """Test that signed bodies that are not a JSON object fail with 400"""
+        # Arrange
+        request, signature = self.make_request(mocker, body)
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await handler.handle_pull_request_event(request, "pull_request", signature)
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_payload_is_reduced_to_used_fields(self, mocker, handler, service):
+        """Test that the queued job receives the parsed event rather than the raw payload"""
+        # Arrange
+        event = make_event("synchronize")
+        event["before"] = "oldsha"
+        event["sender"] = {"login": "octocat"}
+        request, signature = self.make_request(mocker, event)
+
+        # Act
+        await handler.handle_pull_request_event(request, "pull_request", signature)
+        _, job = handler.job_queue.enqueue.call_args.args
+        await job()
+
+        # Assert
+        parsed = service.process_updated.await_args.args[0]
+        assert (parsed.installation_id, parsed.owner, parsed.repo, parsed.pr_number) == (12345, "owner", "repo", 1)
+        assert (parsed.head_sha, parsed.before) == ("headsha", "oldsha")
+        assert not hasattr(parsed, "__dict__")
+
+    @pytest.mark.asyncio
+    async def test_traced_delivery_nests_processing_under_delivery(self, mocker, handler):
+        """Test that a traced repository gets a trace per delivery, with the queued job as a child span"""
+        # Arrange
+        exporter = mocker.Mock()
+        tracer.configure(exporter, ["owner/repo"])
+        delivery_id = "72d3162e-cc78-11e3-81ab-4c9367dc0958"
+        request, signature = self.make_request(mocker, make_event())
+
+        # Act
+        try:
+            await handler.handle_pull_request_event(request, "pull_request", signature, delivery_id)
+            tracer.flush()
+            exported_before_job = exporter.export.call_count
+            _, job = handler.job_queue.enqueue.call_args.args
+            await job()
+            tracer.flush()
+        finally:
+            tracer.configure(None)
+
+        # Assert
+        spans = {span.name: span for call in exporter.export.call_args_list for span in call.args[0]}
+        root, process = spans["pull_request opened"], spans["process_opened"]
+        assert exported_before_job == 0
+        assert root.trace_id == process.trace_id == delivery_id.replace("-", "")
+        assert process.parent_id == root.span_id
+        assert root.end_ns >= process.end_ns
+        assert root.attributes["pr_number"] == 1
+        assert root.attributes["payload_bytes"] > 0
+
+    @pytest.mark.asyncio
+    async def test_superseded_delivery_ends_its_trace(self, mocker, handler, service):
+        """Test that a delivery whose job is coalesced by a newer push still ends its root span"""
+        # Arrange
+        exporter = mocker.Mock()
+        tracer.configure(exporter, ["owner/repo"])
+        push = make_event("synchronize")
+        push["pull_request"]["head"]["sha"] = "newsha"
+
+        # Act
+        try:
+            for event in (make_event("synchronize"), push):
+                request, signature = self.make_request(mocker, event)
+                await handler.handle_pull_request_event(request, "pull_request", signature)
+            for call in handler.job_queue.enqueue.call_args_list:
+                await call.args[1]()
+            tracer.flush()
+        finally:
+            tracer.configure(None)
+
+        # Assert
+        spans = [span for call in exporter.export.call_args_list for span in call.args[0]]
+        assert sorted(span.name for span in spans) == [
+            "process_updated", "pull_request synchronize", "pull_request synchronize",
+        ]
+        assert all(span.end_ns is not None for span in spans)
+        assert handler.scheduler.coalesced == 1
+        service.process_updated.assert_awaited_once()
@@ -0,0 +1,218 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.github_app.services.job_queue import JobQueue
+from src.github_app.services.pull_request_scheduler import PullRequestScheduler
+
+KEY = ("owner/repo", 1)
+
+
+class TestPullRequestScheduler:
+    """Test suite for PullRequestScheduler class"""
+
+    @staticmethod
+    def recording_work(runs, head_sha, duration=0.0):
+        async def work():
+            runs.append(("start", head_sha))
+            await asyncio.sleep(duration)
+            runs.append(("done", head_sha))
+        return work
+
+    @pytest.mark.asyncio
+    async def test_newer_head_cancels_in_flight_work(self):
+        """Test that a push cancels the analysis of the previous head"""
+        # Arrange
+        queue = JobQueue(workers=2)
+        scheduler = PullRequestScheduler(queue)
+        runs = []
+        scheduler.submit(KEY, "sha1", "pr sha1", self.recording_work(runs, "sha1", duration=1))
+        await asyncio.sleep(0.01)
+
+        # Act
+        scheduler.submit(KEY, "sha2", "pr sha2", self.recording_work(runs, "sha2"))
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha1"), ("start", "sha2"), ("done", "sha2")]
+        assert scheduler.cancelled == 1
+
+    @pytest.mark.asyncio
+    async def test_superseded_queued_jobs_are_skipped(self):
+        """Test that jobs still queued for an older head never run"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        scheduler = PullRequestScheduler(queue)
+        blocker = asyncio.Event()
+        queue.enqueue("blocker", blocker.wait)
+        runs = []
+
+        # Act
+        for head_sha in ("sha1", "sha2", "sha3"):
+            scheduler.submit(KEY, head_sha, f"pr {head_sha}", self.recording_work(runs, head_sha))
+        blocker.set()
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha3"), ("done", "sha3")]
+        assert scheduler.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_debounce_coalesces_bursts(self):
+        """Test that a burst of pushes inside the window triggers one analysis"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        scheduler = PullRequestScheduler(queue, debounce_seconds=0.05)
+        runs = []
+
+        # Act
+        for head_sha in ("sha1", "sha2", "sha3"):
+            scheduler.submit(KEY, head_sha, f"pr {head_sha}", self.recording_work(runs, head_sha))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha3"), ("done", "sha3")]
+        assert queue.processed == 1
+
+    @pytest.mark.asyncio
+    async def test_same_head_is_not_analysed_twice_concurrently(self):
+        """Test that a duplicate event for a head already in flight is dropped"""
+        # Arrange
+        queue = JobQueue(workers=2)
+        scheduler = PullRequestScheduler(queue)
+        runs = []
+
+        # Act
+        scheduler.submit(KEY, "sha1", "pr opened", self.recording_work(runs, "sha1", duration=0.05))
+        await asyncio.sleep(0.01)
+        scheduler.submit(KEY, "sha1", "pr reopened", self.recording_work(runs, "sha1"))
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha1"), ("done", "sha1")]
+        assert scheduler.cancelled == 0
+
+    @pytest.mark.asyncio
+    async def test_pull_requests_are_independent(self):
+        """Test that events for different PRs do not supersede each other"""
+        # Arrange
+        queue = JobQueue(workers=2)
+        scheduler = PullRequestScheduler(queue)
+        runs = []
+
+        # Act
+        scheduler.submit(("owner/repo", 1), "sha1", "pr 1", self.recording_work(runs, "sha1", duration=0.02))
+        scheduler.submit(("owner/repo", 2), "sha2", "pr 2", self.recording_work(runs, "sha2", duration=0.02))
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert sorted(runs) == [("done", "sha1"), ("done", "sha2"), ("start", "sha1"), ("start", "sha2")]
+
+    @pytest.mark.asyncio
+    async def test_every_submitted_job_is_reported_done(self):
+        """Test that on_done follows coalesced, cancelled and completed jobs alike"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        scheduler = PullRequestScheduler(queue, debounce_seconds=0.02)
+        runs, done = [], []
+
+        def submit(head_sha, duration=0.0):
+            scheduler.submit(
+                KEY, head_sha, f"pr {head_sha}", self.recording_work(runs, head_sha, duration),
+                on_done=lambda: done.append(head_sha),
+            )
+
+        # Act
+        submit("sha1")
+        submit("sha2", duration=1)
+        coalesced_done = list(done)
+        await asyncio.sleep(0.05)
+        submit("sha3")
+        await asyncio.sleep(0.05)
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert coalesced_done == ["sha1"]
+        assert done == ["sha1", "sha2", "sha3"]
+        assert runs == [("start", "sha2"), ("start", "sha3"), ("done", "sha3")]
+
+    @pytest.mark.asyncio
+    async def test_flush_queues_debounced_events(self):
+        """Test that shutdown does not lose events waiting in the debounce window"""
+        # Arrange
+        queue = JobQueue(workers=1)
+        scheduler = PullRequestScheduler(queue, debounce_seconds=60)
+        runs = []
+        scheduler.submit(KEY, "sha1", "pr sha1", self.recording_work(runs, "sha1"))
+
+        # Act
+        scheduler.flush()
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha1"), ("done", "sha1")]
+
+    @pytest.mark.asyncio
+    async def test_base_change_for_same_head_is_analysed(self):
+        """Test that a retargeted base supersedes the analysis of the same head against the old base"""
+        # Arrange
+        queue = JobQueue(workers=2)
+        scheduler = PullRequestScheduler(queue)
+        runs = []
+        scheduler.submit(KEY, ("sha1", "base1"), "pr opened", self.recording_work(runs, "base1", duration=1))
+        await asyncio.sleep(0.01)
+
+        # Act
+        scheduler.submit(KEY, ("sha1", "base2"), "pr edited", self.recording_work(runs, "base2"))
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "base1"), ("start", "base2"), ("done", "base2")]
+        assert scheduler.cancelled == 1
+
+    @pytest.mark.asyncio
+    async def test_debounced_overflow_is_rejected_on_submit(self):
+        """Test that a job that could not be queued after the debounce is refused while the webhook can still fail"""
+        # Arrange
+        queue = JobQueue(workers=1, max_size=1)
+        scheduler = PullRequestScheduler(queue, debounce_seconds=60)
+        runs = []
+        scheduler.submit(("owner/repo", 1), "sha1", "pr 1", self.recording_work(runs, "sha1"))
+
+        # Act / Assert - the pending job holds the only slot
+        with pytest.raises(HTTPException) as exc_info:
+            scheduler.submit(("owner/repo", 2), "sha2", "pr 2", self.recording_work(runs, "sha2"))
+        assert exc_info.value.status_code == 503
+        # Further events for the pending PR reuse its slot
+        scheduler.submit(("owner/repo", 1), "sha3", "pr 1", self.recording_work(runs, "sha3"))
+
+        scheduler.flush()
+        await queue.drain(timeout=1)
+        assert runs == [("start", "sha3"), ("done", "sha3")]
+        assert scheduler._latest == {}
+
+    @pytest.mark.asyncio
+    async def test_rejected_job_keeps_the_previous_revision(self):
+        """Test that a job the full queue refused neither supersedes queued work nor stays tracked"""
+        # Arrange
+        queue = JobQueue(workers=1, max_size=2)
+        scheduler = PullRequestScheduler(queue)
+        blocker = asyncio.Event()
+        queue.enqueue("blocker", blocker.wait)
+        await asyncio.sleep(0)
+        runs = []
+        scheduler.submit(KEY, "sha1", "pr sha1", self.recording_work(runs, "sha1"))
+        queue.enqueue("filler", blocker.wait)
+
+        # Act
+        with pytest.raises(HTTPException):
+            scheduler.submit(KEY, "sha2", "pr sha2", self.recording_work(runs, "sha2"))
+        blocker.set()
+        await queue.drain(timeout=1)
+
+        # Assert
+        assert runs == [("start", "sha1"), ("done", "sha1")]
+        assert scheduler._latest == {}
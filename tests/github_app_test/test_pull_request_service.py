@@ -0,0 +1,675 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.github_app.analysis.result_cache import AnalysisResult
+from src.github_app.analysis.symbol_diff import SymbolDiff
+from src.github_app.analysis.symbol_extractor import extract_symbols
+from src.github_app.handlers.blob_cache import BlobCache, git_blob_sha
+from src.github_app.handlers.pull_request_context import ChangedFile, PullRequestContext, PullRequestEvent
+from src.github_app.services.pull_request_service import PullRequestService
+
+
+def make_event(action="opened", head_sha="headsha", before=None):
+    event = {
+        "action": action,
+        "installation": {"id": 12345},
+        "repository": {"name": "repo", "owner": {"login": "owner"}},
+        "pull_request": {"number": 1, "head": {"sha": head_sha}, "base": {"sha": "basesha"}},
+    }
+    if before is not None:
+        event["before"] = before
+        event["after"] = head_sha
+    return event
+
+
+def make_pr_event(*args, **kwargs):
+    return PullRequestEvent.from_payload(make_event(*args, **kwargs))
+
+
+class TestPullRequestService:
+    """Test suite for PullRequestService class"""
+
+    @pytest.fixture
+    def github(self, mocker):
+        """Mock GitHubClient with async methods"""
+        github = mocker.Mock()
+        github.resolve_context = mocker.AsyncMock(side_effect=lambda context: context)
+        github.get_changed_python_files = mocker.AsyncMock(return_value=[])
+
+        async def iter_changed_python_files(installation_id, owner, repo, pr_number, context=None):
+            # Stream whatever get_changed_python_files lists as a single page
+            paths = await github.get_changed_python_files(installation_id, owner, repo, pr_number, context=context)
+            if paths:
+                if not context.files:
+                    context.files = [ChangedFile(path) for path in paths]
+                yield [context.changed_file(path) for path in paths]
+
+        github.iter_changed_python_files = iter_changed_python_files
+        github.get_file_content = mocker.AsyncMock(return_value="")
+        github.blob_cache = BlobCache()
+        github.post_pr_comment = mocker.AsyncMock(
+            return_value="https://github.com/owner/repo/pull/1#issuecomment-1"
+        )
+        return github
+
+    @pytest.mark.asyncio
+    async def test_process_opened_posts_comment(self, mocker, github):
+        """Test that an opened PR posts the Docs-Sync comment"""
+        # Arrange
+        service = PullRequestService(github)
+
+        # Act
+        result = await service.process_opened(make_pr_event())
+
+        # Assert
+        assert result == {
+            "message": "Comment posted successfully",
+            "comment_url": "https://github.com/owner/repo/pull/1#issuecomment-1",
+        }
+        github.resolve_context.assert_awaited_once()
+        github.post_pr_comment.assert_awaited_once_with(
+            12345, 'owner', 'repo', 1, "Hello from Docs-Sync", context=mocker.ANY
+        )
+
+    @pytest.mark.asyncio
+    async def test_process_opened_missing_fields(self, github):
+        """Test that incomplete payloads are rejected"""
+        # Arrange
+        service = PullRequestService(github)
+        event = make_event()
+        del event["installation"]
+
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await service.process_opened(PullRequestEvent.from_payload(event))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_fetch_file_revisions_keeps_order(self, github):
+        """Test that concurrently fetched revisions come back in file order"""
+        # Arrange
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            # Later files finish first
+            await asyncio.sleep(0.01 * (5 - int(file_path[1])))
+            return f"{ref_type}:{file_path}"
+
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, fetch_concurrency=10, batch_threshold=100)
+        files = [f"f{i}.py" for i in range(5)]
+
+        # Act
+        result = await service.fetch_file_revisions(PullRequestContext.from_payload(make_event()), files)
+
+        # Assert
+        assert result == [(f, f"head:{f}", f"base:{f}") for f in files]
+
+    @pytest.mark.asyncio
+    async def test_fetch_file_revisions_respects_concurrency_limit(self, github):
+        """Test that no more than fetch_concurrency requests are in flight"""
+        # Arrange
+        in_flight = 0
+        peak = 0
+
+        async def get_file_content(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return ""
+
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, fetch_concurrency=3, batch_threshold=100)
+
+        # Act
+        await service.fetch_file_revisions(
+            PullRequestContext.from_payload(make_event()), [f"f{i}.py" for i in range(10)]
+        )
+
+        # Assert
+        assert peak == 3
+        assert github.get_file_content.await_count == 20
+
+    @pytest.mark.asyncio
+    async def test_fetch_file_revisions_batches_large_prs(self, mocker, github):
+        """Test that PRs above the batch threshold use one batched fetch"""
+        # Arrange
+        async def get_file_contents_batch(installation_id, owner, repo, pr_number, revisions, context=None):
+            return [f"{ref_type}:{path}" for ref_type, path in revisions]
+
+        github.get_file_contents_batch = mocker.AsyncMock(side_effect=get_file_contents_batch)
+        service = PullRequestService(github, batch_threshold=2)
+        files = ["a.py", "b.py", "c.py"]
+
+        # Act
+        result = await service.fetch_file_revisions(PullRequestContext.from_payload(make_event()), files)
+
+        # Assert
+        assert result == [(f, f"head:{f}", f"base:{f}") for f in files]
+        github.get_file_contents_batch.assert_awaited_once()
+        github.get_file_content.assert_not_awaited()
+
+    @pytest.mark.parametrize("file_count, repository_size, expected_mode", [
+        (3, None, "per-file"),
+        (50, None, "batched"),
+        (500, None, "archive"),
+        (500, 10_000, "archive"),
+        (500, 10_000_000, "batched"),
+    ])
+    def test_select_fetch_mode(self, github, file_count, repository_size, expected_mode):
+        """Test fetch mode selection by file count and repository size"""
+        # Arrange
+        event = make_event()
+        event["repository"].update({"url": "https://api.github.com/repos/owner/repo", "size": repository_size})
+        service = PullRequestService(github, batch_threshold=5, archive_threshold=200)
+
+        # Act / Assert
+        assert service.select_fetch_mode(PullRequestContext.from_payload(event), file_count) == expected_mode
+
+    @pytest.mark.asyncio
+    async def test_fetch_file_revisions_archive_mode(self, mocker, capsys, github):
+        """Test that very large PRs stream head and base archives and log the mode"""
+        # Arrange
+        async def get_archive_contents(installation_id, owner, repo, pr_number, ref_type, file_paths, context=None):
+            return [f"{ref_type}:{path}" for path in file_paths]
+
+        github.get_archive_contents = mocker.AsyncMock(side_effect=get_archive_contents)
+        service = PullRequestService(github, batch_threshold=1, archive_threshold=2)
+        files = ["a.py", "b.py"]
+
+        # Act
+        result = await service.fetch_file_revisions(PullRequestContext.from_payload(make_event()), files)
+
+        # Assert
+        assert result == [(f, f"head:{f}", f"base:{f}") for f in files]
+        assert github.get_archive_contents.await_count == 2
+        assert "in archive mode" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_failed_archive_download_stops_the_other(self, mocker, capsys, github):
+        """Test that the sibling download is cancelled and awaited before falling back to batched mode"""
+        # Arrange
+        events = []
+
+        async def get_archive_contents(installation_id, owner, repo, pr_number, ref_type, file_paths, context=None):
+            if ref_type == "base":
+                raise Exception("archive unavailable")
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                events.append("head download cancelled")
+                raise
+
+        async def get_file_contents_batch(installation_id, owner, repo, pr_number, revisions, context=None):
+            events.append("batched fetch")
+            return [f"{ref_type}:{path}" for ref_type, path in revisions]
+
+        github.get_archive_contents = mocker.AsyncMock(side_effect=get_archive_contents)
+        github.get_file_contents_batch = mocker.AsyncMock(side_effect=get_file_contents_batch)
+        service = PullRequestService(github, batch_threshold=1, archive_threshold=2)
+
+        # Act
+        result = await service.fetch_file_revisions(PullRequestContext.from_payload(make_event()), ["a.py", "b.py"])
+
+        # Assert
+        assert result == [(f, f"head:{f}", f"base:{f}") for f in ["a.py", "b.py"]]
+        assert events == ["head download cancelled", "batched fetch"]
+        assert "falling back to batched mode: archive unavailable" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("batch_threshold, archive_threshold", [(100, 200), (1, 200), (1, 2)])
+    async def test_fetch_file_revisions_skips_missing_sides(self, mocker, github, batch_threshold, archive_threshold):
+        """Test that added files skip the base fetch, removed files the head fetch, and renames read the old path"""
+        # Arrange
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            return f"{ref_type}:{file_path}"
+
+        async def get_file_contents_batch(installation_id, owner, repo, pr_number, revisions, context=None):
+            return [f"{ref_type}:{path}" for ref_type, path in revisions]
+
+        async def get_archive_contents(installation_id, owner, repo, pr_number, ref_type, file_paths, context=None):
+            return [f"{ref_type}:{path}" for path in file_paths]
+
+        github.get_file_content.side_effect = get_file_content
+        github.get_file_contents_batch = mocker.AsyncMock(side_effect=get_file_contents_batch)
+        github.get_archive_contents = mocker.AsyncMock(side_effect=get_archive_contents)
+        context = PullRequestContext.from_payload(make_event())
+        context.files = [
+            ChangedFile("added.py", status="added"),
+            ChangedFile("removed.py", status="removed"),
+            ChangedFile("new.py", status="renamed", previous_filename="old.py"),
+            ChangedFile("same.py"),
+        ]
+        service = PullRequestService(github, batch_threshold=batch_threshold, archive_threshold=archive_threshold)
+
+        # Act
+        result = await service.fetch_file_revisions(context, [file.filename for file in context.files])
+
+        # Assert
+        assert result == [
+            ("added.py", "head:added.py", ""),
+            ("removed.py", "", "base:removed.py"),
+            ("new.py", "head:new.py", "base:old.py"),
+            ("same.py", "head:same.py", "base:same.py"),
+        ]
+        fetched = (
+            github.get_file_content.await_count
+            + sum(len(call.args[4]) for call in github.get_file_contents_batch.await_args_list)
+            + sum(len(call.args[5]) for call in github.get_archive_contents.await_args_list)
+        )
+        assert fetched == 6
+
+    @pytest.mark.asyncio
+    async def test_files_are_parsed_while_other_fetches_run(self, github):
+        """Test that a file is diffed as soon as both its revisions are in, before slower fetches finish"""
+        # Arrange
+        slow_fetch = asyncio.Event()
+        events = []
+
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            if file_path == "slow.py":
+                await slow_fetch.wait()
+                events.append("slow fetched")
+            return f"def {file_path[:-3]}_{ref_type}():\n    pass\n"
+
+        github.get_changed_python_files.return_value = ["fast.py", "slow.py"]
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, batch_threshold=100)
+        original_diff = service.parser_pool.diff
+
+        async def diff(filename, head_source, base_source, head_ranges=None):
+            events.append(f"parsed {filename}")
+            if filename == "fast.py":
+                slow_fetch.set()
+            return await original_diff(filename, head_source, base_source, head_ranges)
+
+        service.parser_pool.diff = diff
+        context = service.build_context(make_pr_event())
+
+        # Act
+        await service.analyze_pull_request(context)
+
+        # Assert
+        assert events == ["parsed fast.py", "slow fetched", "slow fetched", "parsed slow.py"]
+        analysis = service.analysis_state.get((context.full_name, context.pr_number))
+        assert [(b.qualified_name, h.qualified_name) for b, h in analysis.symbol_diffs["fast.py"].renamed] == [
+            ("fast_base", "fast_head")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_process_updated_does_not_comment(self, github):
+        """Test that re-analysis after a push does not post another greeting"""
+        # Arrange
+        service = PullRequestService(github)
+
+        # Act
+        result = await service.process_updated(make_pr_event("synchronize"))
+
+        # Assert
+        assert result == {"message": "Pull request #1 analysed at headsha", "files": 0}
+        github.post_pr_comment.assert_not_awaited()
+
+    @pytest.fixture
+    def listing_github(self, mocker, github):
+        """GitHubClient mock that lists a.py/b.py/c.py and echoes fetched revisions"""
+        async def get_changed_python_files(installation_id, owner, repo, pr_number, context=None):
+            context.files = [ChangedFile(name, sha=f"blob-{name}") for name in ("a.py", "b.py", "c.py")]
+            return [file.filename for file in context.files]
+
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            return f"{ref_type}@{context.ref_sha(ref_type)}:{file_path}"
+
+        github.get_changed_python_files.side_effect = get_changed_python_files
+        github.get_file_content.side_effect = get_file_content
+        github.get_compare_python_files = mocker.AsyncMock(return_value=[ChangedFile("b.py", sha="blob-b2")])
+        return github
+
+    @pytest.mark.asyncio
+    async def test_synchronize_reanalyses_only_files_changed_by_push(self, listing_github):
+        """Test that a push re-fetches only the files it touched"""
+        # Arrange
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+        listing_github.get_file_content.reset_mock()
+
+        # Act
+        revisions = await service.analyze_pull_request(
+            service.build_context(make_pr_event("synchronize", head_sha="sha2", before="sha1")), before_sha="sha1"
+        )
+
+        # Assert
+        listing_github.get_compare_python_files.assert_awaited_once()
+        assert listing_github.get_compare_python_files.await_args.args[4:6] == ("sha1", "sha2")
+        assert listing_github.get_changed_python_files.await_count == 1
+        assert listing_github.get_file_content.await_count == 2
+        assert revisions == [
+            ("a.py", "head@sha1:a.py", "base@basesha:a.py"),
+            ("b.py", "head@sha2:b.py", "base@basesha:b.py"),
+            ("c.py", "head@sha1:c.py", "base@basesha:c.py"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_saved_state_keeps_blob_shas_and_refetches_evicted_files(self, listing_github):
+        """Test that file contents are kept only in the blob cache, and files whose blobs were evicted are fetched"""
+        # Arrange
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+        analysis = service.analysis_state.get(("owner/repo", 1))
+        c_head_blob, _ = analysis.blobs["c.py"]
+        listing_github.blob_cache._blobs.pop(c_head_blob)
+        listing_github.get_file_content.reset_mock()
+
+        # Act
+        revisions = await service.analyze_pull_request(
+            service.build_context(make_pr_event("synchronize", head_sha="sha2", before="sha1")), before_sha="sha1"
+        )
+
+        # Assert
+        assert analysis.blobs["a.py"] == (git_blob_sha(b"head@sha1:a.py"), git_blob_sha(b"base@basesha:a.py"))
+        assert not hasattr(analysis, "results")
+        fetched = {call.args[4] for call in listing_github.get_file_content.await_args_list}
+        assert fetched == {"b.py", "c.py"}
+        assert revisions[0] == ("a.py", "head@sha1:a.py", "base@basesha:a.py")
+        assert revisions[2] == ("c.py", "head@sha2:c.py", "base@basesha:c.py")
+
+    @pytest.mark.asyncio
+    async def test_synchronize_with_unknown_before_does_full_scan(self, listing_github):
+        """Test that a push not based on the analysed head falls back to a full listing"""
+        # Arrange
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+
+        # Act
+        await service.process_updated(make_pr_event("synchronize", head_sha="sha3", before="sha2"))
+
+        # Assert
+        listing_github.get_compare_python_files.assert_not_awaited()
+        assert listing_github.get_changed_python_files.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_synchronize_falls_back_when_compare_unusable(self, listing_github):
+        """Test that force pushes (no usable comparison) trigger a full listing"""
+        # Arrange
+        listing_github.get_compare_python_files.return_value = None
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+
+        # Act
+        result = await service.process_updated(make_pr_event("synchronize", head_sha="sha2", before="sha1"))
+
+        # Assert
+        assert result["files"] == 3
+        assert listing_github.get_changed_python_files.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_incomplete_analysis_is_not_reused(self, listing_github):
+        """Test that an analysis with a failed fetch is redone in full on the next push"""
+        # Arrange
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            if file_path == "c.py":
+                # GitHubClient reports the failure on the context and returns ""
+                context.incomplete = True
+                return ""
+            return f"{ref_type}@{context.ref_sha(ref_type)}:{file_path}"
+
+        listing_github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+
+        # Act
+        await service.process_updated(make_pr_event("synchronize", head_sha="sha2", before="sha1"))
+
+        # Assert
+        listing_github.get_compare_python_files.assert_not_awaited()
+        assert listing_github.get_changed_python_files.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reopened_with_same_head_reuses_everything(self, listing_github):
+        """Test that an event for an already analysed head makes no file requests"""
+        # Arrange
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+        listing_github.get_file_content.reset_mock()
+
+        # Act
+        result = await service.process_updated(make_pr_event("reopened", head_sha="sha1"))
+
+        # Assert
+        assert result["files"] == 3
+        listing_github.get_file_content.assert_not_awaited()
+        assert listing_github.get_changed_python_files.await_count == 1
+
+    def test_merge_changed_files_applies_renames_and_additions(self):
+        """Test merging a push's file changes into the previous PR listing"""
+        # Arrange
+        previous = [ChangedFile("a.py"), ChangedFile("b.py"), ChangedFile("c.py")]
+        changed = [
+            ChangedFile("b.py", sha="new-b"),
+            ChangedFile("d.py", status="renamed", previous_filename="c.py"),
+            ChangedFile("e.py", status="added"),
+        ]
+
+        # Act
+        merged = PullRequestService._merge_changed_files(previous, changed)
+
+        # Assert
+        assert [file.filename for file in merged] == ["a.py", "b.py", "d.py", "e.py"]
+        assert merged[1].sha == "new-b"
+
+    @pytest.mark.parametrize("listed, pushed, expected", [
+        # Renamed by the PR, edited by the push: still read from the old path on the base side
+        (ChangedFile("pkg/new.py", status="renamed", previous_filename="pkg/old.py"),
+         ChangedFile("pkg/new.py", sha="blob2", patch="@@ push @@"),
+         [("pkg/new.py", "renamed", "pkg/old.py", "blob2")]),
+        # Added by the PR, edited by the push: still has no base revision
+        (ChangedFile("a.py", status="added"), ChangedFile("a.py", sha="blob2"), [("a.py", "added", None, "blob2")]),
+        # Removed by the PR, added back by the push: exists on both sides
+        (ChangedFile("a.py", status="removed"), ChangedFile("a.py", sha="blob2", status="added"),
+         [("a.py", "modified", None, "blob2")]),
+        # Added by the PR, removed by the push: no longer part of the PR
+        (ChangedFile("a.py", status="added"), ChangedFile("a.py", status="removed"), []),
+        # Renamed by the PR, removed by the push: the base file is removed
+        (ChangedFile("new.py", status="renamed", previous_filename="old.py"), ChangedFile("new.py", status="removed"),
+         [("old.py", "removed", None, None)]),
+        # Renamed by the PR and renamed again by the push: still read from the original base path
+        (ChangedFile("b.py", status="renamed", previous_filename="a.py"),
+         ChangedFile("c.py", sha="blob2", status="renamed", previous_filename="b.py"),
+         [("c.py", "renamed", "a.py", "blob2")]),
+    ])
+    def test_merge_keeps_statuses_relative_to_the_base(self, listed, pushed, expected):
+        """Test that push-relative compare statuses do not overwrite the PR-relative listing"""
+        # Act
+        merged = PullRequestService._merge_changed_files([listed], [pushed])
+
+        # Assert
+        assert [(file.filename, file.status, file.previous_filename, file.sha) for file in merged] == expected
+
+    @pytest.mark.asyncio
+    async def test_synchronize_after_rename_reads_base_from_old_path(self, listing_github):
+        """Test that a push editing a renamed file still diffs it against its base path"""
+        # Arrange
+        async def get_changed_python_files(installation_id, owner, repo, pr_number, context=None):
+            context.files = [ChangedFile("pkg/new_name.py", status="renamed", previous_filename="pkg/old_name.py")]
+            return ["pkg/new_name.py"]
+
+        listing_github.get_changed_python_files.side_effect = get_changed_python_files
+        listing_github.get_compare_python_files.return_value = [ChangedFile("pkg/new_name.py", sha="blob2")]
+        service = PullRequestService(listing_github, batch_threshold=100)
+        await service.process_opened(make_pr_event(head_sha="sha1"))
+
+        # Act
+        revisions = await service.analyze_pull_request(
+            service.build_context(make_pr_event("synchronize", head_sha="sha2", before="sha1")), before_sha="sha1"
+        )
+
+        # Assert
+        assert revisions == [("pkg/new_name.py", "head@sha2:pkg/new_name.py", "base@basesha:pkg/old_name.py")]
+
+    @pytest.mark.asyncio
+    async def test_cache_is_checked_before_model(self, mocker, github):
+        """Test that symbols with a cached result for the same code, docstring, prompt and model are not re-sent"""
+        # Arrange
+        service = PullRequestService(github)
+        source = 'def a():\n    """Doc."""\n    return 1\n\n\ndef b():\n    return 2\n'
+        first, second = extract_symbols(source)
+        service.result_cache.put(service.result_key(first), AnalysisResult("ok", "matches"))
+        service.dispatcher.dispatch = mocker.AsyncMock(side_effect=lambda _, requests: [
+            AnalysisResult(f"Document {request.qualified_name}.", "") for request in requests
+        ])
+        put_many = mocker.spy(service.result_cache, "put_many")
+        context = service.build_context(make_pr_event())
+        revisions = {"m.py": ("m.py", source, "")}
+        symbol_diffs = {"m.py": SymbolDiff(added=[first, second])}
+
+        # Act
+        reviews = await service.review_symbols(context, revisions, symbol_diffs)
+        service.model_id = "other-model"
+        await service.review_symbols(context, revisions, symbol_diffs)
+
+        # Assert
+        assert reviews["m.py"] == [
+            (first, AnalysisResult("ok", "matches")), (second, AnalysisResult("Document b.", "")),
+        ]
+        first_requests, other_model_requests = (call.args[1] for call in service.dispatcher.dispatch.await_args_list)
+        assert [request.qualified_name for request in first_requests] == ["b"]
+        assert [request.qualified_name for request in other_model_requests] == ["a", "b"]
+        # One write per review, covering every new result
+        assert [len(call.args[0]) for call in put_many.call_args_list] == [1, 2]
+        assert service.result_cache.stats()["saved_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reviews_of_failed_batches_are_not_reused(self, mocker, github):
+        """Test that a partly failed review caches what succeeded and leaves the analysis incomplete"""
+        # Arrange
+        service = PullRequestService(github)
+        source = 'def a():\n    return 1\n\n\ndef b():\n    return 2\n'
+        first, second = extract_symbols(source)
+        service.dispatcher.dispatch = mocker.AsyncMock(return_value=[AnalysisResult("Document a.", ""), None])
+        context = service.build_context(make_pr_event())
+
+        # Act
+        reviews = await service.review_symbols(
+            context, {"m.py": ("m.py", source, "")}, {"m.py": SymbolDiff(added=[first, second])}
+        )
+
+        # Assert
+        assert reviews["m.py"] == [(first, AnalysisResult("Document a.", ""))]
+        assert service.result_cache.get(service.result_key(first)) == AnalysisResult("Document a.", "")
+        assert service.result_cache.get(service.result_key(second)) is None
+        assert context.incomplete
+
+    @pytest.mark.asyncio
+    async def test_changed_symbols_are_reviewed_once_per_code_and_docstring(self, github):
+        """Test that changed symbols go to the model in one batch and repeats are served from the cache"""
+        # Arrange
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            if ref_type == "base":
+                return ""
+            return 'def shared(a):\n    """Use a."""\n    return a\n\n\ndef undocumented():\n    return 1\n'
+
+        github.get_changed_python_files.return_value = ["a.py", "b.py"]
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, batch_threshold=100)
+        context = service.build_context(make_pr_event())
+
+        # Act
+        await service.analyze_pull_request(context)
+        first_batches = service.dispatcher.stats()["batches"]
+        await service.analyze_pull_request(service.build_context(make_pr_event(head_sha="othersha")))
+
+        # Assert
+        reviews = service.analysis_state.get((context.full_name, context.pr_number)).reviews
+        assert [(symbol.qualified_name, result.suggestion) for symbol, result in reviews["a.py"]] == [
+            ("shared", ""), ("undocumented", "Add a docstring to undocumented."),
+        ]
+        assert first_batches == 1
+        assert service.dispatcher.stats()["requests"] == 2
+        assert service.result_cache.stats()["saved_calls"] == 4
+
+    @pytest.mark.asyncio
+    async def test_only_symbols_touched_by_the_patch_are_reviewed(self, github):
+        """Test that changed symbols outside the lines changed by the file's patch are not reviewed"""
+        # Arrange
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            if ref_type == "base":
+                return "def f():\n    return 1\n"
+            return "def f(x):\n    return x\n\n\ndef f():\n    return 1\n"
+
+        github.get_changed_python_files.return_value = ["m.py"]
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, batch_threshold=100)
+        context = service.build_context(make_pr_event())
+        context.files = [ChangedFile("m.py", patch="@@ -1,2 +1,6 @@\n+def f(x):\n+    return x\n+\n+\n def f():")]
+
+        # Act
+        await service.analyze_pull_request(context)
+
+        # Assert
+        reviews = service.analysis_state.get((context.full_name, context.pr_number)).reviews
+        assert [(symbol.signature, symbol.start_line) for symbol, _ in reviews["m.py"]] == [("def f(x)", 1)]
+
+    @pytest.mark.asyncio
+    async def test_fetches_start_before_listing_finishes(self, github):
+        """Test that files of the first listing page are fetched while later pages are still being listed"""
+        # Arrange
+        first_page_fetched = asyncio.Event()
+
+        async def iter_changed_python_files(installation_id, owner, repo, pr_number, context=None):
+            context.files = [ChangedFile("a.py")]
+            yield [context.files[0]]
+            # The listing only continues once the first page's files have been fetched
+            await first_page_fetched.wait()
+            context.files.append(ChangedFile("b.py"))
+            yield [context.files[1]]
+
+        async def get_file_content(installation_id, owner, repo, pr_number, file_path, ref_type="head", context=None):
+            if file_path == "a.py":
+                first_page_fetched.set()
+            return f"{ref_type}:{file_path}"
+
+        github.iter_changed_python_files = iter_changed_python_files
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, batch_threshold=100)
+
+        # Act
+        revisions = await asyncio.wait_for(service.analyze_pull_request(service.build_context(make_pr_event())), 1)
+
+        # Assert
+        assert revisions == [("a.py", "head:a.py", "base:a.py"), ("b.py", "head:b.py", "base:b.py")]
+
+    @pytest.mark.asyncio
+    async def test_listing_waits_while_pages_are_in_flight(self, github):
+        """Test backpressure: no more listing pages are read than pages_in_flight allows"""
+        # Arrange
+        release_fetches = asyncio.Event()
+        pages_listed = 0
+
+        async def iter_changed_python_files(installation_id, owner, repo, pr_number, context=None):
+            nonlocal pages_listed
+            for i in range(5):
+                pages_listed += 1
+                file = ChangedFile(f"f{i}.py")
+                context.files.append(file)
+                yield [file]
+
+        async def get_file_content(*args, **kwargs):
+            await release_fetches.wait()
+            return ""
+
+        github.iter_changed_python_files = iter_changed_python_files
+        github.get_file_content.side_effect = get_file_content
+        service = PullRequestService(github, batch_threshold=100)
+        service.pages_in_flight = 2
+
+        # Act
+        analysis = asyncio.create_task(service.analyze_pull_request(service.build_context(make_pr_event())))
+        await asyncio.sleep(0.05)
+        listed_while_blocked = pages_listed
+        release_fetches.set()
+        revisions = await analysis
+
+        # Assert
+        assert listed_while_blocked == 3
+        assert len(revisions) == 5
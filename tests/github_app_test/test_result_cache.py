@@ -0,0 +1,92 @@
+from src.github_app.analysis.result_cache import AnalysisResult, AnalysisResultCache
+
+KEY = AnalysisResultCache.key("body", "doc", "1", "model-a")
+RESULT = AnalysisResult("Mention the return value.", "The function returns a count.")
+
+
+class TestAnalysisResultCache:
+    """Test suite for AnalysisResultCache"""
+
+    def test_memory_hit_and_miss(self):
+        """Test lookups against the in-memory layer"""
+        # Arrange
+        cache = AnalysisResultCache()
+
+        # Act
+        missed = cache.get(KEY)
+        cache.put(KEY, RESULT)
+        hit = cache.get(KEY)
+
+        # Assert
+        assert missed is None
+        assert hit == RESULT
+        assert cache.stats() == {
+            "hits": 1, "disk_hits": 0, "misses": 1, "saved_calls": 1, "hit_rate": 0.5, "entries": 1,
+        }
+
+    def test_key_includes_prompt_and_model(self):
+        """Test that another prompt version or model does not reuse results"""
+        # Arrange
+        cache = AnalysisResultCache()
+        cache.put(KEY, RESULT)
+
+        # Act / Assert
+        assert cache.get(AnalysisResultCache.key("body", "doc", "2", "model-a")) is None
+        assert cache.get(AnalysisResultCache.key("body", "doc", "1", "model-b")) is None
+        assert cache.get(AnalysisResultCache.key("body", None, "1", "model-a")) is None
+
+    def test_lru_eviction(self):
+        """Test that the memory layer keeps only the most recently used entries"""
+        # Arrange
+        cache = AnalysisResultCache(max_entries=2)
+        keys = [AnalysisResultCache.key(f"body{i}", None, "1", "m") for i in range(3)]
+        cache.put(keys[0], RESULT)
+        cache.put(keys[1], RESULT)
+        cache.get(keys[0])
+
+        # Act
+        cache.put(keys[2], RESULT)
+
+        # Assert
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == RESULT
+        assert cache.get(keys[2]) == RESULT
+
+    def test_sqlite_layer_survives_restart(self, tmp_path):
+        """Test that results are served from SQLite by a new cache instance"""
+        # Arrange
+        path = str(tmp_path / "results.sqlite3")
+        first = AnalysisResultCache(path=path)
+        first.put(KEY, RESULT)
+        first.close()
+        second = AnalysisResultCache(path=path)
+
+        # Act
+        result = second.get(KEY)
+        again = second.get(KEY)
+
+        # Assert
+        assert result == RESULT
+        assert again == RESULT
+        assert second.stats()["disk_hits"] == 1
+        assert second.stats()["hits"] == 1
+        second.close()
+
+    def test_batch_is_written_and_read_together(self, tmp_path):
+        """Test that a batch of results written in one transaction is read back in one lookup"""
+        # Arrange
+        path = str(tmp_path / "results.sqlite3")
+        keys = [AnalysisResultCache.key(f"body{i}", None, "1", "m") for i in range(3)]
+        first = AnalysisResultCache(path=path)
+
+        # Act
+        first.put_many([(key, RESULT) for key in keys])
+        first.close()
+        second = AnalysisResultCache(path=path)
+        found = second.get_many(keys + [KEY])
+
+        # Assert
+        assert found == {key: RESULT for key in keys}
+        assert second.stats()["disk_hits"] == 3
+        assert second.stats()["misses"] == 1
+        second.close()
@@ -0,0 +1,156 @@
+from src.github_app.analysis.symbol_diff import diff_symbols
+from src.github_app.analysis.symbol_extractor import extract_symbols
+
+BASE = '''
+def unchanged(a):
+    """Docs."""
+    return a
+
+
+def modified(a):
+    return a + 1
+
+
+def removed():
+    return 0
+
+
+def old_name(x):
+    return x * 2
+
+
+def old_helper(x):
+    """Compute the helper value."""
+    return x
+
+
+class Shape:
+    sides = 0
+
+    def area(self):
+        return 0
+'''
+
+HEAD = '''
+def unchanged(a):
+    """Docs, reworded."""
+    return (
+        a
+    )
+
+
+def modified(a):
+    return a + 2
+
+
+def new_name(x):
+    return x * 2
+
+
+def new_helper(x):
+    """Compute the helper value."""
+    return x + 1
+
+
+def added():
+    return 1
+
+
+class Shape:
+    sides = 0
+
+    def area(self):
+        return 1
+'''
+
+
+class TestSymbolDiff:
+    """Test suite for the structural symbol differ"""
+
+    def test_diff_symbols(self):
+        """Test added, removed, modified and renamed classification"""
+        # Act
+        diff = diff_symbols(extract_symbols(BASE), extract_symbols(HEAD))
+
+        # Assert
+        assert [s.qualified_name for s in diff.added] == ["added"]
+        assert [s.qualified_name for s in diff.removed] == ["removed"]
+        assert [(b.qualified_name, h.qualified_name) for b, h in diff.modified] == [
+            ("modified", "modified"), ("Shape.area", "Shape.area"), ("old_helper", "new_helper"),
+        ]
+        assert [(b.qualified_name, h.qualified_name) for b, h in diff.renamed] == [
+            ("old_name", "new_name"), ("old_helper", "new_helper"),
+        ]
+        assert [s.qualified_name for s in diff.changed_symbols] == ["added", "modified", "Shape.area", "new_helper"]
+
+    def test_formatting_moves_and_docstrings_are_not_changes(self):
+        """Test that reformatting, reordering and docstring-only edits produce an empty diff"""
+        # Arrange
+        base = 'def a():\n    """One."""\n    return [1, 2]\n\n\ndef b(x):\n    return x\n'
+        head = 'def b(x):\n    return x  # comment\n\n\ndef a():\n    """Two."""\n    return [1,\n            2]\n'
+
+        # Act
+        diff = diff_symbols(extract_symbols(base), extract_symbols(head))
+
+        # Assert
+        assert not diff
+
+    def test_moving_method_between_classes_is_a_rename(self):
+        """Test that a method moved to another class is matched by body hash"""
+        # Arrange
+        base = "class A:\n    x = 1\n\n    def run(self):\n        return 42\n\n\nclass B:\n    y = 2\n"
+        head = "class A:\n    x = 1\n\n\nclass B:\n    y = 2\n\n    def run(self):\n        return 42\n"
+
+        # Act
+        diff = diff_symbols(extract_symbols(base), extract_symbols(head))
+
+        # Assert
+        assert [(b.qualified_name, h.qualified_name) for b, h in diff.renamed] == [("A.run", "B.run")]
+        assert diff.added == [] and diff.removed == [] and diff.modified == []
+
+    def test_signature_change_is_a_modification(self):
+        """Test that changing arguments or decorators changes the body hash"""
+        # Arrange
+        base = "def f(a):\n    return a\n\n\ndef g():\n    pass\n"
+        head = "def f(a, b=None):\n    return a\n\n\n@cached\ndef g():\n    pass\n"
+
+        # Act
+        diff = diff_symbols(extract_symbols(base), extract_symbols(head))
+
+        # Assert
+        assert [h.qualified_name for _, h in diff.modified] == ["f", "g"]
+
+    def test_repeated_names_are_matched_in_order(self):
+        """Test that a property getter and setter sharing a name are compared with their own counterparts"""
+        # Arrange
+        source = (
+            "class C:\n    @property\n    def x(self):\n        return self._x\n\n"
+            "    @x.setter\n    def x(self, value):\n        self._x = value\n"
+        )
+        head = source.replace("self._x = value", "self._x = int(value)")
+
+        # Act
+        unchanged = diff_symbols(extract_symbols(source), extract_symbols(source))
+        changed = diff_symbols(extract_symbols(source), extract_symbols(head))
+
+        # Assert
+        assert not unchanged
+        (previous, current), = changed.modified
+        assert previous.qualified_name == current.qualified_name == "C.x"
+        assert "int(value)" in head.splitlines()[current.end_line - 1]
+        assert changed.added == [] and changed.removed == []
+
+    def test_symbols_outside_changed_lines_are_not_changes(self):
+        """Test that head ranges drop added and modified symbols whose lines the patch left alone"""
+        # Arrange
+        base = "def f():\n    return 1\n"
+        head = "def f(x):\n    return x\n\n\ndef f():\n    return 1\n"
+
+        # Act
+        unbounded = diff_symbols(extract_symbols(base), extract_symbols(head))
+        bounded = diff_symbols(extract_symbols(base), extract_symbols(head), head_ranges=[(1, 4)])
+
+        # Assert
+        assert [symbol.start_line for symbol in unbounded.changed_symbols] == [5, 1]
+        assert [symbol.start_line for symbol in bounded.changed_symbols] == [1]
+        assert bounded.modified == unbounded.modified
@@ -0,0 +1,122 @@
+import random
+import time
+
+import pytest
+
+from src.github_app.analysis.symbol_extractor import IntervalIndex, extract_symbols
+
+SOURCE = '''import typing
+
+
+def top(a, b=1, *args, key: str = "x", **kwargs) -> int:
+    """Add things."""
+    def helper():
+        return a
+    return helper()
+
+
+@decorator
+class Widget(Base, metaclass=Meta):
+    """A widget."""
+
+    def draw(self):
+        pass
+
+    async def fetch(self, url):
+        """Fetch it."""
+        class Inner:
+            pass
+
+
+if typing.TYPE_CHECKING:
+    def typed() -> None: ...
+'''
+
+
+class TestSymbolExtractor:
+    """Test suite for AST symbol extraction"""
+
+    def test_extract_symbols(self):
+        """Test names, kinds, spans, signatures and docstrings of extracted symbols"""
+        # Act
+        table = extract_symbols(SOURCE)
+
+        # Assert
+        assert [(s.qualified_name, s.kind, s.start_line, s.end_line) for s in table] == [
+            ("top", "function", 4, 8),
+            ("top.<locals>.helper", "function", 6, 7),
+            ("Widget", "class", 11, 21),
+            ("Widget.draw", "method", 15, 16),
+            ("Widget.fetch", "method", 18, 21),
+            ("Widget.fetch.<locals>.Inner", "class", 20, 21),
+            ("typed", "function", 25, 25),
+        ]
+        assert table.get("top").signature == "def top(a, b=1, *args, key: str='x', **kwargs) -> int"
+        assert table.get("top").docstring == "Add things."
+        assert table.get("Widget").signature == "class Widget(Base, metaclass=Meta)"
+        assert table.get("Widget.fetch").signature == "async def fetch(self, url)"
+        assert table.get("Widget.draw").docstring is None
+
+    def test_overlapping_and_touched_by(self):
+        """Test line-range lookups return enclosing and nested symbols"""
+        # Arrange
+        table = extract_symbols(SOURCE)
+
+        # Act
+        overlapping = [s.qualified_name for s in table.overlapping(16, 19)]
+        touched = [s.qualified_name for s in table.touched_by([(7, 7), (11, 11), (100, 120)])]
+
+        # Assert
+        assert overlapping == ["Widget", "Widget.draw", "Widget.fetch"]
+        assert touched == ["top", "top.<locals>.helper", "Widget"]
+        assert table.overlapping(1, 3) == []
+
+    def test_extract_symbols_syntax_error(self):
+        """Test that unparsable modules raise SyntaxError"""
+        with pytest.raises(SyntaxError):
+            extract_symbols("def broken(:\n")
+
+    def test_interval_index_matches_linear_scan(self):
+        """Test the index against a brute-force scan on random intervals"""
+        # Arrange
+        rng = random.Random(7)
+        intervals = []
+        for _ in range(300):
+            start = rng.randint(1, 1000)
+            intervals.append((start, start + rng.randint(0, 50)))
+        index = IntervalIndex(intervals)
+
+        for _ in range(200):
+            first = rng.randint(1, 1100)
+            last = first + rng.randint(0, 20)
+
+            # Act
+            found = index.overlapping(first, last)
+
+            # Assert
+            expected = {i for i, (start, end) in enumerate(intervals) if start <= last and first <= end}
+            assert set(found) == expected
+            assert len(found) == len(expected)
+
+    def test_interval_index_empty(self):
+        """Test queries on an empty index"""
+        assert IntervalIndex([]).overlapping(1, 10) == []
+
+    def test_extract_symbols_large_module(self):
+        """Test that a 10k-line module is extracted and queried quickly"""
+        # Arrange
+        source = "\n".join(
+            f"class C{i}:\n    def m(self, x):\n        \"\"\"Doc.\"\"\"\n        return x + {i}\n"
+            for i in range(2000)
+        )
+
+        # Act
+        started = time.perf_counter()
+        table = extract_symbols(source)
+        touched = table.touched_by([(line, line) for line in range(2, 10000, 50)])
+        elapsed = time.perf_counter() - started
+
+        # Assert
+        assert len(table) == 4000
+        assert len(touched) == 400
+        assert elapsed < 2.0
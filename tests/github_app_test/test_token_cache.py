@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.github_app.security.token_cache import InstallationTokenCache
+
+
+class TestInstallationTokenCache:
+    """Test suite for InstallationTokenCache class"""
+
+    @staticmethod
+    def make_token(mocker, token, expires_in):
+        return mocker.Mock(token=token, expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in))
+
+    def test_reuses_token_until_refresh_margin(self, mocker):
+        """Test that a fresh token is minted once and then served from cache"""
+        # Arrange
+        mint = mocker.Mock(return_value=self.make_token(mocker, "tok-1", 3600))
+        cache = InstallationTokenCache(mint, refresh_margin_seconds=300)
+
+        # Act
+        tokens = [cache.get_token(12345) for _ in range(5)]
+
+        # Assert
+        assert tokens == ["tok-1"] * 5
+        mint.assert_called_once_with(12345)
+        assert cache.stats() == {"hits": 4, "misses": 1, "size": 1}
+
+    def test_refreshes_token_inside_margin(self, mocker):
+        """Test that a token close to expiry is refreshed ahead of time"""
+        # Arrange
+        mint = mocker.Mock(side_effect=[
+            self.make_token(mocker, "tok-old", 60),
+            self.make_token(mocker, "tok-new", 3600),
+        ])
+        cache = InstallationTokenCache(mint, refresh_margin_seconds=300)
+
+        # Act
+        first = cache.get_token(12345)
+        second = cache.get_token(12345)
+
+        # Assert
+        assert (first, second) == ("tok-old", "tok-new")
+        assert mint.call_count == 2
+
+    def test_tokens_are_cached_per_installation(self, mocker):
+        """Test that installations do not share tokens"""
+        # Arrange
+        mint = mocker.Mock(side_effect=lambda installation_id: self.make_token(mocker, f"tok-{installation_id}", 3600))
+        cache = InstallationTokenCache(mint)
+
+        # Act / Assert
+        assert cache.get_token(1) == "tok-1"
+        assert cache.get_token(2) == "tok-2"
+        assert cache.get_token(1) == "tok-1"
+        assert mint.call_count == 2
+
+    def test_invalidate_forces_new_token(self, mocker):
+        """Test that invalidating an installation mints a new token on next use"""
+        # Arrange
+        mint = mocker.Mock(side_effect=[
+            self.make_token(mocker, "tok-1", 3600),
+            self.make_token(mocker, "tok-2", 3600),
+        ])
+        cache = InstallationTokenCache(mint)
+        cache.get_token(12345)
+
+        # Act
+        cache.invalidate(12345)
+
+        # Assert
+        assert cache.get_token(12345) == "tok-2"
+
+    def test_concurrent_callers_share_single_refresh(self, mocker):
+        """Test that only one refresh runs when many callers miss at once"""
+        # Arrange
+        def slow_mint(installation_id):
+            time.sleep(0.05)
+            return self.make_token(mocker, "tok-1", 3600)
+
+        mint = mocker.Mock(side_effect=slow_mint)
+        cache = InstallationTokenCache(mint)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_token(12345)))
+            for _ in range(8)
+        ]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert results == ["tok-1"] * 8
+        mint.assert_called_once_with(12345)
+        assert cache.misses == 1
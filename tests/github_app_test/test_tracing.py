@@ -0,0 +1,217 @@
+import json
+import os
+import uuid
+
+import pytest
+
+from src.github_app.handlers.github_executor import GitHubExecutor
+from src.github_app.monitoring.tracing import (
+    NOOP_SPAN, JsonlSpanExporter, OtlpHttpSpanExporter, SpanExporter, Tracer, create_span_exporter, current_span,
+    set_attributes,
+)
+
+
+class ListExporter(SpanExporter):
+    """Keeps exported spans in memory"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class TestTracer:
+    """Test suite for Tracer"""
+
+    @pytest.fixture
+    def exporter(self):
+        return ListExporter()
+
+    @pytest.fixture
+    def tracer(self, exporter):
+        tracer = Tracer(exporter, repositories=["owner/repo"])
+        yield tracer
+        tracer.shutdown()
+
+    def test_spans_outside_a_trace_are_noops(self, tracer, exporter):
+        """Test that untraced code pays for nothing but a context lookup"""
+        # Act
+        with tracer.span("get_file_content", path="a.py") as span:
+            span.set("cache_hit", True)
+            set_attributes(size_bytes=10)
+        tracer.flush()
+
+        # Assert
+        assert span is NOOP_SPAN
+        assert exporter.spans == []
+
+    def test_untraced_repositories_get_no_trace(self, tracer):
+        """Test that only enabled repositories are traced"""
+        # Act / Assert
+        assert tracer.start_trace("pull_request opened", "owner/other") is None
+        assert Tracer(None, repositories=["*"]).start_trace("pull_request opened", "owner/repo") is None
+        assert tracer.start_trace("pull_request opened", "owner/repo") is not None
+
+    def test_delivery_id_becomes_trace_id(self, tracer):
+        """Test that a delivery can be found in the export by its X-GitHub-Delivery ID"""
+        # Arrange
+        delivery_id = str(uuid.uuid4())
+
+        # Act
+        root = tracer.start_trace("pull_request opened", "owner/repo", delivery_id)
+        other = tracer.start_trace("pull_request opened", "owner/repo", "not-a-uuid")
+
+        # Assert
+        assert root.trace_id == delivery_id.replace("-", "")
+        assert root.attributes["delivery_id"] == delivery_id
+        assert len(other.trace_id) == 32
+
+    def test_spans_nest_and_are_exported(self, tracer, exporter):
+        """Test that child spans record their parent, attributes and errors"""
+        # Arrange
+        root = tracer.start_trace("pull_request opened", "owner/repo", pr_number=1)
+
+        # Act
+        with tracer.activate(root):
+            with tracer.span("process_opened") as process:
+                with tracer.span("get_file_content", path="a.py"):
+                    set_attributes(cache_hit=False, size_bytes=42)
+                with pytest.raises(ValueError):
+                    with tracer.span("parse"):
+                        raise ValueError("bad source")
+        tracer.flush()
+
+        # Assert
+        spans = {span.name: span for span in exporter.spans}
+        assert set(spans) == {"pull_request opened", "process_opened", "get_file_content", "parse"}
+        assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+        assert spans["process_opened"].parent_id == root.span_id
+        assert spans["get_file_content"].parent_id == process.span_id
+        assert spans["get_file_content"].attributes == {"path": "a.py", "cache_hit": False, "size_bytes": 42}
+        assert spans["parse"].error == "ValueError: bad source"
+        assert all(span.end_ns >= span.start_ns for span in exporter.spans)
+        assert current_span() is None
+
+    @pytest.mark.asyncio
+    async def test_spans_follow_calls_into_executor_threads(self, tracer, exporter):
+        """Test that blocking calls run in the GitHub executor nest under the span that started them"""
+        # Arrange
+        executor = GitHubExecutor(max_workers=2)
+        root = tracer.start_trace("pull_request opened", "owner/repo")
+
+        def blocking_call():
+            with tracer.span("GET /repos/{owner}/{repo}", "client"):
+                pass
+
+        # Act
+        with tracer.activate(root):
+            await executor.run(blocking_call)
+        executor.shutdown()
+        tracer.flush()
+
+        # Assert
+        http = next(span for span in exporter.spans if span.kind == "client")
+        assert http.parent_id == root.span_id
+
+    def test_repositories_can_be_switched_at_runtime(self, tracer, tmp_path):
+        """Test that enable/disable and the repositories file take effect without a restart"""
+        # Arrange
+        repositories_file = tmp_path / "traced.txt"
+        repositories_file.write_text("owner/a  # investigating slow PRs\n")
+        tracer.enable("owner/b")
+
+        # Act / Assert
+        assert tracer.enabled_for("owner/b")
+        tracer.disable("owner/b")
+        assert not tracer.enabled_for("owner/b")
+
+        tracer.configure(tracer.exporter, repositories_file=str(repositories_file), reload_seconds=0)
+        assert tracer.enabled_for("owner/a")
+        repositories_file.write_text("owner/c\n")
+        os.utime(repositories_file, ns=(0, 10**9))
+        assert not tracer.enabled_for("owner/a")
+        assert tracer.enabled_for("owner/c")
+
+    def test_failed_export_is_counted_not_raised(self, tracer, exporter, mocker, capsys):
+        """Test that a broken exporter never affects the traced code"""
+        # Arrange
+        mocker.patch.object(exporter, "export", side_effect=OSError("collector down"))
+
+        # Act
+        tracer.end(tracer.start_trace("pull_request opened", "owner/repo"))
+        tracer.flush()
+
+        # Assert
+        assert tracer.stats()["dropped"] == 1
+        assert "Error exporting 1 spans: collector down" in capsys.readouterr().out
+
+
+class TestSpanExporters:
+    """Test suite for the JSONL and OTLP exporters"""
+
+    @pytest.fixture
+    def spans(self):
+        tracer = Tracer(ListExporter(), repositories=["*"])
+        root = tracer.start_trace("pull_request opened", "owner/repo", str(uuid.uuid4()))
+        with tracer.activate(root):
+            with tracer.span("GET /repos/{owner}/{repo}", "client", status_code=200, cache_hit=True):
+                pass
+        tracer.flush()
+        return tracer.exporter.spans
+
+    def test_jsonl_exporter_appends_one_line_per_span(self, spans, tmp_path):
+        """Test that spans are written as JSON lines with their duration"""
+        # Arrange
+        path = tmp_path / "traces.jsonl"
+        exporter = JsonlSpanExporter(str(path))
+
+        # Act
+        exporter.export(spans[:1])
+        exporter.export(spans[1:])
+
+        # Assert
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["GET /repos/{owner}/{repo}", "pull_request opened"]
+        assert lines[0]["parent_id"] == lines[1]["span_id"]
+        assert lines[0]["attributes"] == {"status_code": 200, "cache_hit": True}
+        assert lines[0]["duration_ms"] >= 0
+
+    def test_otlp_exporter_posts_otlp_json(self, spans, mocker):
+        """Test that spans are encoded in the OTLP/HTTP JSON mapping"""
+        # Arrange
+        exporter = OtlpHttpSpanExporter("http://collector:4318/v1/traces")
+        post = mocker.patch.object(exporter.session, "post")
+
+        # Act
+        exporter.export(spans)
+
+        # Assert
+        url, = post.call_args.args
+        assert url == "http://collector:4318/v1/traces"
+        encoded = post.call_args.kwargs["json"]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        client, root = encoded
+        assert client["kind"] == 3 and root["kind"] == 2
+        assert client["parentSpanId"] == root["spanId"] and "parentSpanId" not in root
+        assert {"key": "status_code", "value": {"intValue": "200"}} in client["attributes"]
+        assert {"key": "cache_hit", "value": {"boolValue": True}} in client["attributes"]
+        assert root["status"] == {"code": 1}
+
+    def test_create_span_exporter(self, tmp_path):
+        """Test that the exporter follows TRACING_EXPORTER"""
+        # Act / Assert
+        assert create_span_exporter("", "traces.jsonl", "") is None
+        assert isinstance(create_span_exporter("jsonl", str(tmp_path / "t.jsonl"), ""), JsonlSpanExporter)
+        assert isinstance(create_span_exporter("otlp", "", "http://collector:4318/v1/traces"), OtlpHttpSpanExporter)
+        with pytest.raises(ValueError):
+            create_span_exporter("zipkin", "", "")
+
+    def test_exporter_must_implement_export(self):
+        """Test that the exporter interface cannot be used without an export method"""
+        # Arrange
+        class Incomplete(SpanExporter):
+            pass
+
+        # Act / Assert
+        with pytest.raises(TypeError):
+            Incomplete()